@@ -0,0 +1,238 @@
+"""Score model generations against COLLIE constraints in parallel.
+
+Input: JSONL, one generation per line:
+  {"split": "wiki_c14", "idx": 0, "generation": "...", "id": "optional passthrough"}
+where (split, idx) addresses `all_data.dill[split][idx]` (same addressing as the
+`collie_stats.py` SQLite cache).
+
+Output: JSONL in input order, one line per generation:
+  {"split", "idx", "id", "pass", "n_atomic", "n_atomic_pass", "atomic": [bool, ...]}
+`atomic` lists atomic-constraint outcomes in tree order (null when the tree could not be
+decomposed; `pass` then comes from calling the root constraint directly).
+
+Evaluation:
+- instances are unpickled once and shared with worker processes (fork) or reloaded once
+  per worker (spawn)
+- generations are evaluated in chunks in a process pool
+- `All`/`And` and `Any`/`Or` nodes are walked explicitly, passing `targets[i]` to child i,
+  so every atomic result is recorded; atomic results are memoized per chunk on
+  (constraint structure, generation, targets), the structure being the
+  `collie_stats.encode_constraint` JSON, so equal sub-constraints of different instances
+  of one template share results
+- per-constraint timing is aggregated by (constraint id, tree path)
+
+Usage:
+  python3 Projects/v2g/datasets/collie_eval.py --generations gens.jsonl --out scored.jsonl --workers 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from collie_stats import REPO, collie_imports, encode_constraint, load_instances, split_source_cid
+
+ALL_NODES = {"All", "And"}
+ANY_NODES = {"Any", "Or"}
+
+# Worker-global state: {(split, idx): instance}, the atomic Constraint class.
+_INSTANCES: Dict[Tuple[str, int], dict] = {}
+_CONSTRAINT_CLS = None
+
+
+def index_instances(instances: list) -> Dict[Tuple[str, int], dict]:
+    out: Dict[Tuple[str, int], dict] = {}
+    per_split: Dict[str, int] = {}
+    for inst in instances:
+        sp = inst["_collie_split"]
+        idx = per_split.get(sp, 0)
+        per_split[sp] = idx + 1
+        out[(sp, idx)] = inst
+    return out
+
+
+def _init_worker(repo: str) -> None:
+    global _INSTANCES, _CONSTRAINT_CLS
+    if _INSTANCES:
+        return
+    _, _CONSTRAINT_CLS = collie_imports(Path(repo))
+    _INSTANCES = index_instances(load_instances(Path(repo)))
+
+
+def _children(node, targets) -> Optional[List[tuple]]:
+    """(child, child_targets) pairs for a logic node, or None if it can't be decomposed."""
+    if hasattr(node, "callables"):
+        kids = list(node.callables)
+    elif hasattr(node, "callable_1") and hasattr(node, "callable_2"):
+        kids = [node.callable_1, node.callable_2]
+    else:
+        return None
+    if not isinstance(targets, (list, tuple)) or len(targets) != len(kids):
+        return None
+    return list(zip(kids, targets))
+
+
+class _Evaluator:
+    def __init__(self, constraint_cls):
+        self.constraint_cls = constraint_cls
+        self.memo: Dict[tuple, bool] = {}
+        self.structures: Dict[int, tuple] = {}  # id(node) -> (node, structure); holding node keeps the id unique
+        self.timings: Dict[str, List[float]] = {}  # "cid/path" -> [calls, seconds]
+
+    def _structure(self, node) -> str:
+        hit = self.structures.get(id(node))
+        if hit is None:
+            enc = json.dumps(encode_constraint(node, self.constraint_cls), sort_keys=True, default=repr)
+            hit = self.structures[id(node)] = (node, enc)
+        return hit[1]
+
+    def _atomic(self, node, text: str, targets, timing_key: str) -> bool:
+        key = (self._structure(node), text, repr(targets))
+        hit = self.memo.get(key)
+        if hit is not None:
+            return hit
+        t0 = time.perf_counter()
+        ok = bool(node(text, targets))
+        t = self.timings.setdefault(timing_key, [0, 0.0])
+        t[0] += 1
+        t[1] += time.perf_counter() - t0
+        self.memo[key] = ok
+        return ok
+
+    def _walk(self, node, text: str, targets, cid: str, path: str, out: List[bool]) -> Optional[bool]:
+        if isinstance(node, self.constraint_cls):
+            ok = self._atomic(node, text, targets, f"{cid}/{path}")
+            out.append(ok)
+            return ok
+        name = type(node).__name__
+        kids = _children(node, targets) if name in ALL_NODES | ANY_NODES else None
+        if kids is None:
+            return None
+        results = []
+        for i, (child, child_targets) in enumerate(kids):
+            r = self._walk(child, text, child_targets, cid, f"{path}.{i}", out)
+            if r is None:
+                return None
+            results.append(r)
+        return all(results) if name in ALL_NODES else any(results)
+
+    def evaluate(self, inst: dict, text: str) -> Tuple[bool, Optional[List[bool]]]:
+        _, cid = split_source_cid(inst["_collie_split"])
+        atomic: List[bool] = []
+        ok = self._walk(inst["constraint"], text, inst["targets"], cid, "0", atomic)
+        if ok is None:
+            # Unknown node type / target layout: trust COLLIE's own evaluation.
+            return self._atomic(inst["constraint"], text, inst["targets"], f"{cid}/root"), None
+        return ok, atomic
+
+
+def _eval_chunk(chunk: List[dict]) -> Tuple[List[dict], Dict[str, List[float]]]:
+    ev = _Evaluator(_CONSTRAINT_CLS)
+    out = []
+    for item in chunk:
+        key = (item["split"], int(item["idx"]))
+        rec = {"split": key[0], "idx": key[1], "id": item.get("id")}
+        inst = _INSTANCES.get(key)
+        if inst is None:
+            rec.update({"pass": None, "error": "unknown instance"})
+        else:
+            try:
+                ok, atomic = ev.evaluate(inst, item.get("generation") or "")
+                rec.update({
+                    "pass": ok,
+                    "n_atomic": len(atomic) if atomic is not None else None,
+                    "n_atomic_pass": sum(atomic) if atomic is not None else None,
+                    "atomic": atomic,
+                })
+            except Exception as e:
+                rec.update({"pass": False, "error": f"{type(e).__name__}: {e}"})
+        out.append(rec)
+    return out, ev.timings
+
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def evaluate_generations(items: List[dict], workers: int = 1, chunk_size: int = 256,
+                         repo: Path = REPO) -> Tuple[List[dict], Dict[str, List[float]]]:
+    """Evaluate (instance, generation) items; returns (records in input order, timings)."""
+    _init_worker(str(repo))  # load once in the parent; forked workers inherit it
+    timings: Dict[str, List[float]] = {}
+    results: List[dict] = []
+
+    def absorb(part):
+        recs, t = part
+        results.extend(recs)
+        for k, (n, s) in t.items():
+            acc = timings.setdefault(k, [0, 0.0])
+            acc[0] += n
+            acc[1] += s
+
+    if workers <= 1:
+        for chunk in _chunks(items, chunk_size):
+            absorb(_eval_chunk(chunk))
+        return results, timings
+
+    ctx = mp.get_context("fork") if "fork" in mp.get_all_start_methods() else None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(str(repo),)) as ex:
+        for part in ex.map(_eval_chunk, _chunks(items, chunk_size)):
+            absorb(part)
+    return results, timings
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--generations", required=True, help="JSONL with split, idx, generation")
+    ap.add_argument("--out", required=True, help="Output JSONL path")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--chunk-size", type=int, default=256)
+    ap.add_argument("--timings", default=None, help="Optional JSON path for per-constraint timings")
+    args = ap.parse_args()
+
+    with open(args.generations, encoding="utf-8") as f:
+        items = [json.loads(line) for line in f if line.strip()]
+
+    t0 = time.perf_counter()
+    results, timings = evaluate_generations(items, workers=args.workers, chunk_size=args.chunk_size)
+    elapsed = time.perf_counter() - t0
+
+    Path(args.out).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        for rec in results:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+
+    # pass rate per constraint id
+    by_cid: Dict[str, List[int]] = {}
+    for rec in results:
+        if rec["pass"] is None:
+            continue
+        acc = by_cid.setdefault(split_source_cid(rec["split"])[1], [0, 0])
+        acc[0] += int(rec["pass"])
+        acc[1] += 1
+    n_pass = sum(p for p, _ in by_cid.values())
+    n_eval = sum(n for _, n in by_cid.values())
+    print(f"evaluated {n_eval}/{len(results)} generations in {elapsed:.2f}s "
+          f"({len(results) / max(elapsed, 1e-9):.0f}/s), pass_rate={n_pass / max(n_eval, 1):.3f}")
+    print("pass_rate_by_cid", {k: round(p / n, 3) for k, (p, n) in sorted(by_cid.items())})
+
+    timing_rows = {k: {"calls": n, "total_s": s, "mean_us": 1e6 * s / n} for k, (n, s) in sorted(timings.items())}
+    if args.timings:
+        Path(args.timings).write_text(json.dumps(timing_rows, indent=2) + "\n", encoding="utf-8")
+    slowest = sorted(timing_rows.items(), key=lambda kv: -kv[1]["total_s"])[:10]
+    for k, t in slowest:
+        print(f"  {k:<24} calls={t['calls']:<8} total={t['total_s']:.3f}s mean={t['mean_us']:.1f}us",
+              file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,76 +5,254 @@ It relies on the local clone at:
   Projects/v2g/datasets/collie_repo/
 which vendors dill and provides stubs for nltk/rich.
 
+The pickle is only read once: the first run converts it into an indexed SQLite table
+(collie_repo/data/all_data.sqlite; one row per instance with split, source, constraint id,
+atomic constraint count, prompt/targets and a JSON encoding of the constraint tree).
+Later runs answer stats and filter queries from that table without unpickling anything.
+The cache is rebuilt automatically when all_data.dill is newer.
+
 Usage:
   python3 Projects/v2g/datasets/collie_stats.py
+  python3 Projects/v2g/datasets/collie_stats.py --source wiki --min-atomic 3 --show 5
+  python3 Projects/v2g/datasets/collie_stats.py --rebuild-cache
 """
 
 from __future__ import annotations
 
+import argparse
+import json
 import re
-import collections
+import sqlite3
+import sys
 from pathlib import Path
 
+REPO = Path(__file__).resolve().parent / "collie_repo"
+CACHE_PATH = REPO / "data" / "all_data.sqlite"
 
-def main():
-    repo = Path(__file__).resolve().parent / "collie_repo"
+# Bump when the table layout or the constraint encoding changes.
+CACHE_VERSION = 1
 
-    import sys
 
-    sys.path.insert(0, str(repo / "fake_deps"))
-    sys.path.insert(0, str(repo / "third_party" / "dill-0.3.8"))
-    sys.path.insert(0, str(repo))
+def collie_imports(repo: Path = REPO):
+    for p in (repo / "fake_deps", repo / "third_party" / "dill-0.3.8", repo):
+        if str(p) not in sys.path:
+            sys.path.insert(0, str(p))
 
     import dill  # type: ignore
     from collie.constraints import Constraint  # type: ignore
 
-    obj = dill.load(open(repo / "data" / "all_data.dill", "rb"))
+    return dill, Constraint
+
+
+def load_instances(repo: Path = REPO) -> list:
+    """Unpickle all_data.dill; each instance gets its split key as `_collie_split`."""
+    dill, _ = collie_imports(repo)
+    with open(repo / "data" / "all_data.dill", "rb") as f:
+        obj = dill.load(f)
 
     instances = []
     for k, lst in obj.items():
         for inst in lst:
             inst["_collie_split"] = k
             instances.append(inst)
+    return instances
 
-    print(f"total_instances {len(instances)}")
 
-    # Source + constraint_id counts
-    cid_counts = collections.Counter()
-    source_counts = collections.Counter()
+def split_source_cid(split: str) -> tuple[str, str]:
+    m = re.match(r"(.*)_(c\d+[a-z]?)$", split)
+    if m:
+        return m.group(1), m.group(2)
+    return split, split
+
+
+def count_atomic(constr, constraint_cls) -> int:
+    if isinstance(constr, constraint_cls):
+        return 1
+    if hasattr(constr, "callables"):
+        return sum(count_atomic(c, constraint_cls) for c in constr.callables)
+    if hasattr(constr, "callable_1") and hasattr(constr, "callable_2"):
+        return count_atomic(constr.callable_1, constraint_cls) + count_atomic(constr.callable_2, constraint_cls)
+    return 1
+
+
+def encode_constraint(constr, constraint_cls) -> dict:
+    """JSON-serializable constraint tree: logic nodes keep children, atomic nodes their attributes."""
+    name = type(constr).__name__
+    if isinstance(constr, constraint_cls):
+        return {"type": name, "atomic": True, "attrs": {k: repr(v) for k, v in vars(constr).items()}}
+    if hasattr(constr, "callables"):
+        return {"type": name, "children": [encode_constraint(c, constraint_cls) for c in constr.callables]}
+    if hasattr(constr, "callable_1") and hasattr(constr, "callable_2"):
+        return {
+            "type": name,
+            "children": [
+                encode_constraint(constr.callable_1, constraint_cls),
+                encode_constraint(constr.callable_2, constraint_cls),
+            ],
+        }
+    return {"type": name, "atomic": True, "repr": repr(constr)}
+
+
+def _json(obj) -> str:
+    return json.dumps(obj, ensure_ascii=False, default=repr)
+
+
+def build_cache(repo: Path = REPO, cache_path: Path = CACHE_PATH) -> None:
+    """One-time conversion of all_data.dill into the indexed SQLite table."""
+    _, constraint_cls = collie_imports(repo)
+    instances = load_instances(repo)
+
+    tmp = cache_path.with_suffix(".sqlite.tmp")
+    tmp.unlink(missing_ok=True)
+    con = sqlite3.connect(tmp)
+    con.executescript(
+        """
+        CREATE TABLE instances (
+            row_id INTEGER PRIMARY KEY,
+            split TEXT NOT NULL,
+            idx INTEGER NOT NULL,
+            source TEXT NOT NULL,
+            cid TEXT NOT NULL,
+            n_atomic INTEGER NOT NULL,
+            prompt TEXT,
+            targets TEXT,
+            example TEXT,
+            metadata TEXT,
+            constraint_tree TEXT
+        );
+        CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT);
+        """
+    )
+    rows = []
+    per_split: dict = {}
     for inst in instances:
         sp = inst["_collie_split"]
-        m = re.match(r"(.*)_(c\d+[a-z]?)$", sp)
-        if m:
-            source, cid = m.group(1), m.group(2)
-        else:
-            source, cid = sp, sp
-        cid_counts[cid] += 1
-        source_counts[source] += 1
+        idx = per_split.get(sp, 0)
+        per_split[sp] = idx + 1
+        source, cid = split_source_cid(sp)
+        constr = inst.get("constraint")
+        rows.append((
+            sp,
+            idx,
+            source,
+            cid,
+            count_atomic(constr, constraint_cls),
+            inst.get("prompt"),
+            _json(inst.get("targets")),
+            _json(inst.get("example")),
+            _json(inst.get("metadata")),
+            _json(encode_constraint(constr, constraint_cls)),
+        ))
+    con.executemany(
+        "INSERT INTO instances (split, idx, source, cid, n_atomic, prompt, targets, example, metadata,"
+        " constraint_tree) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        rows,
+    )
+    con.executescript(
+        """
+        CREATE INDEX ix_split ON instances (split, idx);
+        CREATE INDEX ix_source ON instances (source);
+        CREATE INDEX ix_cid ON instances (cid);
+        CREATE INDEX ix_atomic ON instances (n_atomic);
+        """
+    )
+    con.executemany(
+        "INSERT INTO meta VALUES (?, ?)",
+        [("version", str(CACHE_VERSION)), ("dill_mtime", str((repo / "data" / "all_data.dill").stat().st_mtime))],
+    )
+    con.commit()
+    con.close()
+    tmp.replace(cache_path)
 
-    print("sources", dict(source_counts))
-    print("constraint_ids", len(cid_counts), dict(sorted(cid_counts.items())))
 
-    # Atomic constraints per instance
-    def count_atomic(constr):
-        if isinstance(constr, Constraint):
-            return 1
-        if hasattr(constr, "callables"):
-            return sum(count_atomic(c) for c in constr.callables)
-        if hasattr(constr, "callable_1") and hasattr(constr, "callable_2"):
-            return count_atomic(constr.callable_1) + count_atomic(constr.callable_2)
-        return 1
+def _cache_is_fresh(repo: Path, cache_path: Path) -> bool:
+    if not cache_path.exists():
+        return False
+    dill_path = repo / "data" / "all_data.dill"
+    con = sqlite3.connect(cache_path)
+    try:
+        meta = dict(con.execute("SELECT key, value FROM meta"))
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        con.close()
+    if meta.get("version") != str(CACHE_VERSION):
+        return False
+    return not dill_path.exists() or float(meta.get("dill_mtime", 0)) >= dill_path.stat().st_mtime
+
+
+def open_cache(repo: Path = REPO, cache_path: Path = CACHE_PATH, rebuild: bool = False) -> sqlite3.Connection:
+    """Connection to the instance table, (re)building it from the pickle when needed."""
+    if rebuild or not _cache_is_fresh(repo, cache_path):
+        print(f"building COLLIE cache {cache_path}", file=sys.stderr)
+        build_cache(repo, cache_path)
+    con = sqlite3.connect(cache_path)
+    con.row_factory = sqlite3.Row
+    return con
+
+
+def _where(args) -> tuple[str, list]:
+    clauses, params = [], []
+    if args.source:
+        clauses.append("source = ?")
+        params.append(args.source)
+    if args.cid:
+        clauses.append("cid = ?")
+        params.append(args.cid)
+    if args.min_atomic is not None:
+        clauses.append("n_atomic >= ?")
+        params.append(args.min_atomic)
+    if args.max_atomic is not None:
+        clauses.append("n_atomic <= ?")
+        params.append(args.max_atomic)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
 
-    atomic_counts = [count_atomic(inst["constraint"]) for inst in instances]
-    mean_atomic = sum(atomic_counts) / len(atomic_counts)
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--cache", default=str(CACHE_PATH), help="SQLite cache path")
+    ap.add_argument("--rebuild-cache", action="store_true", help="Re-read all_data.dill")
+    ap.add_argument("--source", default=None, help="Filter: source (e.g. wiki, ccnews, guten)")
+    ap.add_argument("--cid", default=None, help="Filter: constraint id (e.g. c07)")
+    ap.add_argument("--min-atomic", type=int, default=None, help="Filter: min atomic constraints")
+    ap.add_argument("--max-atomic", type=int, default=None, help="Filter: max atomic constraints")
+    ap.add_argument("--show", type=int, default=0, help="Print the first N matching prompts")
+    args = ap.parse_args()
+
+    con = open_cache(REPO, Path(args.cache), rebuild=args.rebuild_cache)
+    where, params = _where(args)
+
+    total = con.execute(f"SELECT COUNT(*) FROM instances{where}", params).fetchone()[0]
+    print(f"total_instances {total}")
+    if total == 0:
+        return
+
+    # Source + constraint_id counts
+    source_counts = dict(con.execute(
+        f"SELECT source, COUNT(*) FROM instances{where} GROUP BY source ORDER BY MIN(row_id)", params).fetchall())
+    cid_counts = dict(con.execute(
+        f"SELECT cid, COUNT(*) FROM instances{where} GROUP BY cid ORDER BY cid", params).fetchall())
+    print("sources", source_counts)
+    print("constraint_ids", len(cid_counts), cid_counts)
+
+    # Atomic constraints per instance
+    mean_atomic, min_atomic, max_atomic = con.execute(
+        f"SELECT AVG(n_atomic), MIN(n_atomic), MAX(n_atomic) FROM instances{where}", params).fetchone()
     print(
         "atomic_constraints_per_instance",
         {
             "mean": mean_atomic,
-            "min": min(atomic_counts),
-            "max": max(atomic_counts),
+            "min": min_atomic,
+            "max": max_atomic,
         },
     )
 
+    if args.show:
+        for r in con.execute(
+                f"SELECT split, idx, n_atomic, prompt FROM instances{where} ORDER BY row_id LIMIT ?",
+                params + [args.show]):
+            print(f"[{r['split']}#{r['idx']}] atomic={r['n_atomic']} {r['prompt']}")
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,113 @@
+"""Lexical fast path for verify_qa_with_wikipedia.py.
+
+All answer variants of one question are compiled into a single Aho–Corasick automaton
+and matched against the (normalized) evidence text in one pass. For each answer the
+result is one of:
+
+- "self"     only this answer's variants occur in the evidence
+- "others"   this answer does not occur, but another answer to the question does
+- "both"     this answer and another answer occur
+- "none"     no answer occurs
+
+Matches must fall on word boundaries, and variants shorter than `min_chars` are
+ignored so that answers like "a" or "1" do not match everywhere.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple
+
+
+class AhoCorasick:
+    """Multi-pattern exact matcher; `find_all` yields (start, end, pattern index)."""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[int]] = [[]]
+        for i, p in enumerate(self.patterns):
+            node = 0
+            for ch in p:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                node = nxt
+            self.out[node].append(i)
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find_all(self, text: str) -> Iterator[Tuple[int, int, int]]:
+        node = 0
+        for pos, ch in enumerate(text):
+            while node and ch not in self.goto[node]:
+                node = self.fail[node]
+            node = self.goto[node].get(ch, 0)
+            for i in self.out[node]:
+                yield pos + 1 - len(self.patterns[i]), pos + 1, i
+
+
+def _on_boundary(text: str, start: int, end: int) -> bool:
+    return (start == 0 or not text[start - 1].isalnum()) and (end == len(text) or not text[end].isalnum())
+
+
+class QuestionMatcher:
+    """Automaton over every answer variant of one question.
+
+    `variants` and `normalize` are the verifier's `answer_variants` / `norm_text`.
+    """
+
+    def __init__(self, answers: Sequence[str], variants: Callable[[str], List[str]],
+                 normalize: Callable[[str], str], min_chars: int = 3):
+        self.answers = list(answers)
+        self.normalize = normalize
+        patterns: List[str] = []
+        owner: List[int] = []
+        for a_idx, ans in enumerate(self.answers):
+            for v in {normalize(v) for v in variants(ans)}:
+                if len(v) >= min_chars:
+                    patterns.append(v)
+                    owner.append(a_idx)
+        self.owner = owner
+        self.automaton = AhoCorasick(patterns) if patterns else None
+
+    def matched_answers(self, evidence_text: str) -> set:
+        """Indices of answers with at least one variant in the evidence."""
+        if self.automaton is None or not evidence_text:
+            return set()
+        text = self.normalize(evidence_text)
+        hits = set()
+        for start, end, i in self.automaton.find_all(text):
+            if _on_boundary(text, start, end):
+                hits.add(self.owner[i])
+        return hits
+
+    def classify(self, answer_idx: int, hits: set) -> str:
+        own = answer_idx in hits
+        others = bool(hits - {answer_idx})
+        if own:
+            return "both" if others else "self"
+        return "others" if others else "none"
+
+
+# --fast-path rule sets: match class -> verdict decided without the LLM. The verifier
+# matches against evidence retrieved for the question alone. "others" never decides
+# UNSUPPORTED: a question may have several correct answers.
+FAST_PATH_RULES = {
+    "off": {},
+    "supported": {"self": "supported"},
+}
@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+"""Scaling benchmark for the candidate pipeline in nnd_plots.py.
+
+Generates synthetic NND-style inputs at configurable sizes and times each stage:
+  load      load_mqm / load_summeval / load_frank / load_quizdesign on the generated file
+  counts    per_prompt_counts on the loaded table
+  grid      filter_grid over the 6x6 N1/N2 grid used by nnd_plots.py
+  plot      plot_distributions (Agg backend, written under --work-dir)
+
+Generated files mimic the real layouts (MQM TSV with one row per error annotation,
+SummEval aligned JSONL with 3 expert annotations, FRANK sentence-annotation JSON plus
+split file, QuizDesign group JSONL). Candidates per prompt are drawn from a lognormal
+around the dataset's typical group size; --skew is its sigma (0 = every prompt the same
+size). Sizes are candidate rows as the loader emits them; files are cached in --work-dir
+by (format, size, seed, skew).
+
+Each stage is timed with perf_counter (best of --repeat runs). Two memory passes follow
+(--no-memory skips both; tracemalloc is slow at 10^7 rows):
+  peak_mb      Python-heap peak under tracemalloc
+  rss_peak_mb  peak RSS growth of the stage run in a forked child (ru_maxrss minus the
+               RSS at fork); unlike tracemalloc this sees Arrow buffers, which back
+               the string columns under pandas 3, and other native allocations; it also
+               counts inherited pages the stage touches (copy-on-write), a floor of
+               roughly 10-20MB, so compare it against its own baseline
+Results go to --out as JSON. With --baseline, a stage fails when its time or either
+memory peak exceeds the baseline by more than --max-regression (and by more than the
+--min-seconds / --min-mb noise floors); the script then exits 1.
+--update-baseline writes the current results as the new baseline instead.
+
+Usage:
+  python3 scripts/bench_candidates.py --sizes 1e3,1e4,1e5 --out outputs/bench_candidates.json
+  python3 scripts/bench_candidates.py --sizes 1e5 --formats mqm,summeval --stages load,counts \
+    --baseline outputs/bench_candidates.baseline.json --max-regression 0.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import numpy as np
+import pandas as pd
+
+import nnd_plots
+from stage_trace import rss_bytes
+
+WORDS = ("the a of to in and for on with by from at as is was were has had will would said year "
+         "government minister police report company market city school court team season game win "
+         "people country state official week month percent million growth price share plan deal "
+         "president council hospital study water energy election vote law trade bank music film").split()
+
+
+def group_sizes(n: int, mean: float, skew: float, rng: np.random.Generator, max_size: int = 200) -> np.ndarray:
+    """Candidates per prompt summing to n: lognormal around `mean` with sigma `skew`, clipped to [1, max_size]."""
+    n_groups = max(int(n / mean * 1.2) + 8, 1)
+    draws = mean * rng.lognormal(-skew ** 2 / 2, skew, size=n_groups) if skew > 0 else np.full(n_groups, mean)
+    sizes = np.clip(np.rint(draws), 1, max_size).astype(np.int64)
+    while sizes.sum() < n:
+        sizes = np.concatenate([sizes, sizes])
+    cum = np.cumsum(sizes)
+    last = int(np.searchsorted(cum, n))
+    sizes = sizes[: last + 1].copy()
+    sizes[-1] -= int(cum[last] - n)
+    return sizes[sizes > 0]
+
+
+class TextPool:
+    """Random sentences drawn from a fixed pool, so generation stays cheap at 10^7 rows."""
+
+    def __init__(self, rng: np.random.Generator, n: int = 2000, words: int = 20):
+        vocab = np.array(WORDS)
+        self.rng = rng
+        self.sentences = [" ".join(vocab[rng.integers(0, len(vocab), words)]).capitalize() + "." for _ in range(n)]
+
+    def sentence(self) -> str:
+        return self.sentences[self.rng.integers(0, len(self.sentences))]
+
+    def text(self, n_sentences: int) -> str:
+        idx = self.rng.integers(0, len(self.sentences), n_sentences)
+        return " ".join(self.sentences[i] for i in idx)
+
+
+def gen_mqm(path: str, n: int, skew: float, rng: np.random.Generator) -> None:
+    pool = TextPool(rng)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f, delimiter="\t", quoting=csv.QUOTE_MINIMAL)
+        w.writerow(["system", "doc", "doc_id", "seg_id", "rater", "source", "target", "category", "severity"])
+        for g, k in enumerate(group_sizes(n, 10, skew, rng)):
+            doc, seg, source = f"doc{g // 20}", str(g % 20 + 1), pool.sentence()
+            for s in range(k):
+                target = pool.sentence()
+                if rng.random() < 0.3:
+                    w.writerow([f"sys{s}", doc, doc, seg, "rater1", source, target, "No-error", "No-error"])
+                    continue
+                for _ in range(int(rng.integers(1, 4))):
+                    cat = ("Accuracy/Mistranslation", "Fluency/Grammar", "Style/Awkward")[rng.integers(0, 3)]
+                    sev = ("Minor", "Major")[rng.integers(0, 2)]
+                    w.writerow([f"sys{s}", doc, doc, seg, f"rater{rng.integers(1, 4)}", source, target, cat, sev])
+
+
+def gen_summeval(path: str, n: int, skew: float, rng: np.random.Generator) -> None:
+    # every line becomes 4 candidates (one per dimension)
+    pool = TextPool(rng)
+    dims = ["consistency", "coherence", "fluency", "relevance"]
+    with open(path, "w", encoding="utf-8") as f:
+        for g, k in enumerate(group_sizes(max(n // 4, 1), 16, skew, rng)):
+            for m in range(k):
+                experts = [{d: int(rng.integers(3, 6)) for d in dims} for _ in range(3)]
+                rec = {"id": f"dm-test-{g:08d}", "model_id": f"M{m}", "decoded": pool.text(3),
+                       "expert_annotations": experts}
+                f.write(json.dumps(rec) + "\n")
+
+
+def gen_frank(path: str, n: int, skew: float, rng: np.random.Generator) -> None:
+    pool = TextPool(rng)
+    hashes, records = [], []
+    for g, k in enumerate(group_sizes(n, 5, skew, rng)):
+        h = hashlib.sha1(str(g).encode()).hexdigest()
+        hashes.append(h)
+        article = pool.text(4)
+        for m in range(k):
+            anns = [{f"annotator_{a}": ["NoE" if rng.random() < 0.8 else "OutE"] for a in range(3)}
+                    for _ in range(int(rng.integers(1, 4)))]
+            records.append({"hash": h, "model_name": f"model{m}", "article": article, "summary": pool.text(2),
+                            "summary_sentences_annotations": anns})
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(records, f)
+    with open(frank_split(path), "w") as f:
+        f.write("\n".join(hashes) + "\n")
+
+
+def gen_quizdesign(path: str, n: int, skew: float, rng: np.random.Generator) -> None:
+    pool = TextPool(rng)
+    reasons = ["No error", "Disfluent", "Off target", "Wrong context"]
+    with open(path, "w", encoding="utf-8") as f:
+        for g, k in enumerate(group_sizes(n, 8, skew, rng)):
+            qs = [{"question": pool.sentence(), "model_name": f"qgen{m}",
+                   "reason": reasons[0] if rng.random() < 0.6 else reasons[rng.integers(1, 4)]} for m in range(k)]
+            f.write(json.dumps({"group_id": g, "answer_span": pool.sentence()[:30], "context": pool.text(3),
+                                "questions": qs}) + "\n")
+
+
+def frank_split(path: str) -> str:
+    return path + ".split.txt"
+
+
+FORMATS = {
+    "mqm": (gen_mqm, ".tsv", nnd_plots.load_mqm),
+    "summeval": (gen_summeval, ".jsonl", nnd_plots.load_summeval),
+    "frank": (gen_frank, ".json", lambda p: nnd_plots.load_frank(p, frank_split(p))),
+    "quizdesign": (gen_quizdesign, ".jsonl", nnd_plots.load_quizdesign),
+}
+
+
+def generate(fmt: str, n: int, seed: int, skew: float, work_dir: str) -> str:
+    gen, ext, _ = FORMATS[fmt]
+    path = os.path.join(work_dir, f"{fmt}_n{n}_s{seed}_k{skew:g}{ext}")
+    if not os.path.exists(path):
+        tmp = path + ".tmp"
+        gen(tmp, n, skew, np.random.default_rng(seed))
+        if fmt == "frank":
+            os.replace(frank_split(tmp), frank_split(path))
+        os.replace(tmp, path)
+    return path
+
+
+def rss_peak(fn) -> float | None:
+    """Peak RSS growth (MB) while `fn` runs in a forked child, or None without fork.
+
+    The child's high-water mark starts at its RSS at fork, so inputs built by the parent
+    are not counted.
+    """
+    if not hasattr(os, "fork"):
+        return None
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            os.close(r)
+            rss0 = rss_bytes() or 0
+            fn()
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024  # KiB on Linux
+            os.write(w, repr(max(peak - rss0, 0) / 2**20).encode())
+            code = 0
+        finally:
+            os._exit(code)
+    os.close(w)
+    with os.fdopen(r, "rb") as f:
+        data = f.read()
+    _, status = os.waitpid(pid, 0)
+    return float(data) if data and status == 0 else None
+
+
+def measure(fn, repeat: int, memory: bool) -> tuple:
+    """(result of the last run, best seconds, tracemalloc peak MB, RSS peak MB); memory peaks None without memory."""
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        out = None
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    peak = rss = None
+    if memory:
+        out = None
+        rss = rss_peak(fn)
+        tracemalloc.start()
+        try:
+            out = fn()
+            peak = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return out, best, peak, rss
+
+
+def run(fmt: str, n: int, path: str, stages: list, args) -> dict:
+    load = FORMATS[fmt][2]
+    plot_dir = os.path.join(args.work_dir, "plots", f"{fmt}_n{n}")
+    results = {}
+    df, dt, peak, rss = measure(lambda: load(path), args.repeat, not args.no_memory)
+    if "load" in stages:
+        results["load"] = {"seconds": dt, "peak_mb": peak, "rss_peak_mb": rss, "rows": len(df)}
+    counts, dt, peak, rss = measure(lambda: nnd_plots.per_prompt_counts(df), args.repeat, not args.no_memory)
+    if "counts" in stages:
+        results["counts"] = {"seconds": dt, "peak_mb": peak, "rss_peak_mb": rss, "rows": len(counts)}
+    if "grid" in stages:
+        grid, dt, peak, rss = measure(lambda: nnd_plots.filter_grid(counts, nnd_plots.N1_VALUES,
+                                                                    nnd_plots.N2_VALUES),
+                                      args.repeat, not args.no_memory)
+        results["grid"] = {"seconds": dt, "peak_mb": peak, "rss_peak_mb": rss, "rows": len(grid)}
+    if "plot" in stages:
+        _, dt, peak, rss = measure(lambda: nnd_plots.plot_distributions(counts, plot_dir), args.repeat,
+                                   not args.no_memory)
+        results["plot"] = {"seconds": dt, "peak_mb": peak, "rss_peak_mb": rss, "rows": len(counts)}
+    return results
+
+
+def compare(current: dict, baseline: dict, max_regression: float, min_seconds: float, min_mb: float) -> list:
+    """Regression messages for every (case, stage, metric) worse than the baseline."""
+    failures = []
+    for case, stages in current.items():
+        for stage, cur in stages.items():
+            base = baseline.get(case, {}).get(stage)
+            if not base:
+                continue
+            for metric, floor in (("seconds", min_seconds), ("peak_mb", min_mb), ("rss_peak_mb", min_mb)):
+                b, c = base.get(metric), cur.get(metric)
+                if b is None or c is None:
+                    continue
+                if c > b * (1 + max_regression) and c - b > floor:
+                    failures.append(f"{case}/{stage} {metric}: {c:.3f} vs baseline {b:.3f} (+{(c / b - 1) * 100:.0f}%)")
+    return failures
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1e3,1e4,1e5", help="Comma-separated candidate counts (1e3..1e7)")
+    ap.add_argument("--formats", default=",".join(FORMATS))
+    ap.add_argument("--stages", default="load,counts,grid,plot")
+    ap.add_argument("--skew", type=float, default=0.75, help="Sigma of the lognormal group-size distribution")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=1, help="Timed runs per stage (best is kept)")
+    ap.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc and forked RSS passes")
+    ap.add_argument("--work-dir", default=os.path.join(tempfile.gettempdir(), "bench_candidates"))
+    ap.add_argument("--out", default=None, help="Optional JSON results path")
+    ap.add_argument("--baseline", default=None, help="Baseline JSON to check against")
+    ap.add_argument("--update-baseline", action="store_true", help="Write the results to --baseline instead")
+    ap.add_argument("--max-regression", type=float, default=0.25, help="Allowed relative slowdown / growth")
+    ap.add_argument("--min-seconds", type=float, default=0.05, help="Ignore time regressions below this")
+    ap.add_argument("--min-mb", type=float, default=1.0, help="Ignore memory regressions below this")
+    args = ap.parse_args()
+
+    sizes = [int(float(s)) for s in args.sizes.split(",")]
+    formats = args.formats.split(",")
+    stages = args.stages.split(",")
+    os.makedirs(args.work_dir, exist_ok=True)
+
+    results = {}
+    generate_s = {}
+    for fmt in formats:
+        for n in sizes:
+            t0 = time.perf_counter()
+            path = generate(fmt, n, args.seed, args.skew, args.work_dir)
+            generate_s[f"{fmt}/{n}"] = time.perf_counter() - t0
+            case = f"{fmt}/{n}"
+            results[case] = run(fmt, n, path, stages, args)
+            for stage, r in results[case].items():
+                mem = " ".join(f"{r[k]:9.1f}MB" if r.get(k) is not None else "        -  "
+                               for k in ("peak_mb", "rss_peak_mb"))
+                print(f"{case:<20} {stage:<7} {r['seconds']:9.3f}s {mem} rows={r['rows']}")
+
+    report = {
+        "meta": {"python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+                 "platform": platform.platform(), "sizes": sizes, "skew": args.skew, "seed": args.seed,
+                 "repeat": args.repeat, "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "generate_s": generate_s},
+        "results": results,
+    }
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline and args.update_baseline:
+        os.makedirs(os.path.dirname(args.baseline) or ".", exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"baseline written: {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        failures = compare(results, baseline, args.max_regression, args.min_seconds, args.min_mb)
+        for msg in failures:
+            print("REGRESSION", msg)
+        if failures:
+            sys.exit(1)
+        print(f"no regressions vs {args.baseline} (max {args.max_regression:.0%})")
+
+
+if __name__ == "__main__":
+    main()
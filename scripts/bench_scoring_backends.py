@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Benchmark CPU inference backends for the scoring stages.
+
+Runs score_generator / score_validator on a fixed random sample of candidate-table
+rows (whole prompts are sampled, so the shared-prefix path is exercised) with each
+backend, and reports:
+- wall time and rows/s per (stage, backend), after a short warm-up
+- score agreement of each backend against the float PyTorch reference:
+  Pearson / Spearman correlation, mean / max absolute difference, and for the validator
+  the share of rows where the log-odds sign (Yes vs No) agrees
+
+Usage:
+  python3 scripts/bench_scoring_backends.py --candidates outputs/candidates.parquet \
+    --model Qwen/Qwen2.5-0.5B --sample-prompts 200 --threads 8 --out outputs/bench_backends.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import score_generator
+import score_validator
+from scoring import BACKENDS, load_model, read_candidates, set_threads
+
+
+def sample_prompts(df: pd.DataFrame, n_prompts: int, seed: int) -> pd.DataFrame:
+    keys = df[["dataset", "prompt_id"]].drop_duplicates()
+    keys = keys.sample(n=min(n_prompts, len(keys)), random_state=seed)
+    return df.merge(keys, on=["dataset", "prompt_id"]).reset_index(drop=True)
+
+
+def run_generator(df, tok, model, args) -> np.ndarray:
+    out = score_generator.score_table(df, tok, model, batch_size=args.batch_size, log_every=0)
+    return out["gen_logprob"].to_numpy()
+
+
+def run_validator(df, tok, model, args) -> np.ndarray:
+    head = score_validator.TwoTokenHead(model, score_validator.target_id(tok, " Yes"),
+                                        score_validator.target_id(tok, " No"))
+    cache = score_validator.TemplateCache(tok, max_prompt_tokens=1536)
+    pad_id = tok.pad_token_id if tok.pad_token_id is not None else 0
+    out = score_validator.score_rows(df, cache, head, pad_id, "cpu", args.batch_size, 8192, 512)
+    return out["val_logodds"].to_numpy()
+
+
+STAGES = {"generator": run_generator, "validator": run_validator}
+
+
+def agreement(ref: np.ndarray, other: np.ndarray, stage: str) -> dict:
+    a, b = pd.Series(ref), pd.Series(other)
+    diff = np.abs(ref - other)
+    out = {
+        "pearson": float(a.corr(b)),
+        "spearman": float(a.rank().corr(b.rank())),
+        "mean_abs_diff": float(diff.mean()),
+        "max_abs_diff": float(diff.max()),
+    }
+    if stage == "validator":
+        out["sign_agreement"] = float(np.mean(np.sign(ref) == np.sign(other)))
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", required=True)
+    ap.add_argument("--model", required=True)
+    ap.add_argument("--backends", default=",".join(BACKENDS), help="Comma-separated; first is the reference")
+    ap.add_argument("--stages", default="generator,validator")
+    ap.add_argument("--sample-prompts", type=int, default=100)
+    ap.add_argument("--warmup-prompts", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--threads", type=int, default=0)
+    ap.add_argument("--interop-threads", type=int, default=0)
+    ap.add_argument("--out", default=None, help="Optional JSON report path")
+    args = ap.parse_args()
+
+    set_threads(args.threads, args.interop_threads)
+    df = read_candidates(args.candidates)
+    sample = sample_prompts(df, args.sample_prompts, args.seed)
+    warm = sample_prompts(sample, args.warmup_prompts, args.seed + 1)
+    backends = args.backends.split(",")
+    stages = args.stages.split(",")
+
+    results = {"rows": len(sample), "prompts": int(sample.groupby(["dataset", "prompt_id"]).ngroups),
+               "threads": args.threads, "runs": {}, "agreement": {}}
+    scores = {}
+    for backend in backends:
+        tok, model = load_model(args.model, backend=backend)
+        for stage in stages:
+            fn = STAGES[stage]
+            fn(warm, tok, model, args)
+            t0 = time.perf_counter()
+            scores[(stage, backend)] = fn(sample, tok, model, args)
+            dt = time.perf_counter() - t0
+            results["runs"][f"{stage}/{backend}"] = {"seconds": dt, "rows_per_s": len(sample) / max(dt, 1e-9)}
+            print(f"{stage:<10} {backend:<6} {dt:8.2f}s {len(sample) / max(dt, 1e-9):8.1f} rows/s")
+        del model
+
+    ref = backends[0]
+    for stage in stages:
+        for backend in backends[1:]:
+            agr = agreement(scores[(stage, ref)], scores[(stage, backend)], stage)
+            speedup = results["runs"][f"{stage}/{ref}"]["seconds"] / max(results["runs"][f"{stage}/{backend}"]["seconds"], 1e-9)
+            agr["speedup_vs_ref"] = speedup
+            results["agreement"][f"{stage}/{backend}_vs_{ref}"] = agr
+            print(f"{stage:<10} {backend} vs {ref}: " + " ".join(f"{k}={v:.4f}" for k, v in agr.items()))
+
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
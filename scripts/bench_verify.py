@@ -0,0 +1,378 @@
+#!/usr/bin/env python3
+"""Offline benchmark for verify_qa_with_wikipedia.py against local stub services.
+
+Starts one local HTTP server that mimics the three backends the verifier talks to:
+  GET  /w/api.php                       WIKI_API (list=search and prop=extracts)
+  GET  /api/rest_v1/page/summary/<t>    WIKI_REST_SUMMARY
+  POST /v1/messages                     Anthropic messages endpoint (ANTHROPIC_BASE_URL)
+Each backend (wiki, llm) has its own latency (lognormal around --*-latency-ms with
+sigma --jitter), error rate (HTTP 500) and rate limit (token bucket in requests/s; over
+the limit it answers 429 with Retry-After). Stub verdicts are drawn deterministically
+from the prompt hash, so reruns see the same answers.
+
+The verifier runs as a subprocess on a synthetic input CSV (--questions x
+--answers-per-question), with the endpoints pointed at the stubs through environment
+variables. The benchmark reports:
+- full run: wall time, pairs/s, ERROR rows, per-pair and per-operation latency
+  quantiles (from the verifier's --metrics-json), server-side request stats
+- resume no-op: a rerun over the finished output (cost of loading done keys and
+  skipping every pair)
+- restart (--kill-at f): kill the verifier after a fraction f of the pairs, rerun it,
+  and report time lost, duplicate keys and the rerun's time to completion
+
+Extra verifier flags go through --verifier-args, e.g. to compare caching or the fast path:
+  python3 scripts/bench_verify.py --questions 200 --verifier-args "--fast-path supported" --out outputs/bench_verify.json
+  python3 scripts/bench_verify.py --llm-latency-ms 800 --llm-rate-limit 20 --error-rate 0.01 --kill-at 0.5
+--serve-only keeps the stubs running and prints the environment to use them by hand.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import re
+import shlex
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlparse
+
+import numpy as np
+
+VERIFIER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "verify_qa_with_wikipedia.py")
+
+
+@dataclass
+class Backend:
+    latency_ms: float
+    jitter: float = 0.5
+    error_rate: float = 0.0
+    rate_limit: float = 0.0  # requests/s, 0 = unlimited
+    _tokens: float = 0.0
+    _last: float = field(default_factory=time.monotonic)
+    _lock: threading.Lock = field(default_factory=threading.Lock)
+    _rng: np.random.Generator = field(default_factory=lambda: np.random.default_rng(0))
+
+    def admit(self) -> bool:
+        """Token-bucket check (burst = one second of traffic)."""
+        if self.rate_limit <= 0:
+            return True
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.rate_limit, self._tokens + (now - self._last) * self.rate_limit)
+            self._last = now
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                return True
+            return False
+
+    def delay(self) -> bool:
+        """Sleep for one sampled latency; True when this request should fail."""
+        with self._lock:
+            z = self._rng.lognormal(-self.jitter ** 2 / 2, self.jitter) if self.jitter > 0 else 1.0
+            fail = self._rng.random() < self.error_rate
+        time.sleep(self.latency_ms / 1000 * z)
+        return fail
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.status = defaultdict(int)  # (route, status) -> n
+        self.seconds = defaultdict(list)  # route -> service times
+
+    def record(self, route: str, status: int, seconds: float) -> None:
+        with self.lock:
+            self.status[(route, status)] += 1
+            self.seconds[route].append(seconds)
+
+    def to_dict(self) -> dict:
+        out = {}
+        with self.lock:
+            for route, xs in sorted(self.seconds.items()):
+                a = np.asarray(xs)
+                out[route] = {"requests": len(a),
+                              "status": {str(s): n for (r, s), n in sorted(self.status.items()) if r == route},
+                              **{f"p{q}_ms": float(np.percentile(a, q) * 1000) for q in (50, 90, 99)}}
+        return out
+
+
+def _digest(text: str) -> int:
+    return int(hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest(), 16)
+
+
+def page_title(query: str) -> str:
+    m = re.search(r"Question (\d+)", query)
+    return f"Topic {m.group(1) if m else _digest(query) % 1000}"
+
+
+def page_text(title: str, sentences: int = 30) -> str:
+    n = _digest(title)
+    return " ".join(f"{title} fact {i} mentions Answer {n % 7 + i % 3} of the synthetic page." for i in range(sentences))
+
+
+def stub_verdict(prompt: str) -> dict:
+    u = _digest(prompt) % 1000 / 1000
+    verdict = "SUPPORTED" if u < 0.85 else "UNSUPPORTED" if u < 0.93 else "UNKNOWN"
+    return {"verdict": verdict, "confidence": round(0.5 + u / 2, 3), "short_reason": "stub", "quote": ""}
+
+
+def make_handler(wiki: Backend, llm: Backend, stats: Stats):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True  # headers and body go out in separate writes
+
+        def log_message(self, *a):
+            pass
+
+        def _send(self, route: str, t0: float, status: int, body: dict, headers: dict = None) -> None:
+            data = json.dumps(body).encode("utf-8")
+            try:
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+            except (BrokenPipeError, ConnectionResetError):
+                # the client went away (the restart test SIGKILLs the verifier mid-request)
+                self.close_connection = True
+            stats.record(route, status, time.perf_counter() - t0)
+
+        def _gate(self, route: str, backend: Backend, t0: float) -> bool:
+            if not backend.admit():
+                self._send(route, t0, 429, {"type": "error", "error": {"type": "rate_limit_error",
+                                                                       "message": "stub rate limit"}},
+                           {"Retry-After": "1"})
+                return False
+            if backend.delay():
+                self._send(route, t0, 500, {"type": "error", "error": {"type": "api_error", "message": "stub error"}})
+                return False
+            return True
+
+        def do_GET(self):
+            t0 = time.perf_counter()
+            url = urlparse(self.path)
+            if url.path.startswith("/api/rest_v1/page/summary/"):
+                if not self._gate("wiki_summary", wiki, t0):
+                    return
+                title = unquote(url.path.rsplit("/", 1)[1]).replace("_", " ")
+                self._send("wiki_summary", t0, 200, {
+                    "title": title, "extract": page_text(title, 3),
+                    "content_urls": {"desktop": {"page": f"http://stub/wiki/{title.replace(' ', '_')}"}}})
+            elif url.path == "/w/api.php":
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                route = "wiki_search" if q.get("list") == "search" else "wiki_extract"
+                if not self._gate(route, wiki, t0):
+                    return
+                if route == "wiki_search":
+                    body = {"query": {"search": [{"title": page_title(q.get("srsearch", ""))}]}}
+                else:
+                    title = q.get("titles", "")
+                    body = {"query": {"pages": {"1": {"title": title, "extract": page_text(title)}}}}
+                self._send(route, t0, 200, body)
+            else:
+                self._send("other", t0, 404, {})
+
+        def do_POST(self):
+            t0 = time.perf_counter()
+            payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+            if urlparse(self.path).path != "/v1/messages":
+                self._send("other", t0, 404, {})
+                return
+            if not self._gate("llm", llm, t0):
+                return
+            prompt = "".join(m.get("content", "") if isinstance(m.get("content"), str) else ""
+                             for m in payload.get("messages", []))
+            text = json.dumps(stub_verdict(prompt))
+            self._send("llm", t0, 200, {
+                "id": f"msg_{_digest(prompt):016x}", "type": "message", "role": "assistant",
+                "model": payload.get("model", "stub"), "content": [{"type": "text", "text": text}],
+                "stop_reason": "end_turn", "stop_sequence": None,
+                "usage": {"input_tokens": len(prompt) // 4, "output_tokens": len(text) // 4}})
+
+    return Handler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # The restart test SIGKILLs the verifier; its keep-alive connections then reset
+        # while the handler waits for the next request line. Nothing to report there.
+        if isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            return
+        super().handle_error(request, client_address)
+
+
+def start_stubs(wiki: Backend, llm: Backend, port: int = 0):
+    stats = Stats()
+    server = StubServer(("127.0.0.1", port), make_handler(wiki, llm, stats))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, stats
+
+
+def stub_env(port: int) -> dict:
+    base = f"http://127.0.0.1:{port}"
+    return {"WIKI_API": f"{base}/w/api.php", "WIKI_REST_SUMMARY": f"{base}/api/rest_v1/page/summary/{{}}",
+            "ANTHROPIC_BASE_URL": base, "ANTHROPIC_API_KEY": "stub", "NO_PROXY": "127.0.0.1,localhost"}
+
+
+def write_input(path: str, n_questions: int, per_question: int) -> int:
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        w = csv.writer(f)
+        w.writerow(["id", "question", "Num answers", "Answers"])
+        for i in range(n_questions):
+            answers = [f"Answer {j}" for j in range(per_question)]
+            w.writerow([f"bench_{i}", f"Question {i}: which answer does the synthetic page mention?",
+                        per_question, "; ".join(answers)])
+    return n_questions * per_question
+
+
+def read_output(path: str) -> tuple:
+    """(rows, unique keys, ERROR rows) of a verifier output CSV."""
+    if not os.path.exists(path):
+        return 0, 0, 0
+    csv.field_size_limit(sys.maxsize)
+    n = errors = 0
+    keys = set()
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            n += 1
+            keys.add(row.get("key"))
+            errors += (row.get("evidence_text") or "").startswith("ERROR:")
+    return n, len(keys), errors
+
+
+def verifier_cmd(args, input_csv: str, output: str, metrics_json: str) -> list:
+    return ([sys.executable, VERIFIER, "--input", input_csv, "--output", output, "--sleep", str(args.sleep),
+             "--metrics-json", metrics_json, "--metrics-every", "1"] + shlex.split(args.verifier_args))
+
+
+def run_verifier(cmd: list, env: dict, log_path: str) -> float:
+    t0 = time.perf_counter()
+    with open(log_path, "a") as log:
+        proc = subprocess.run(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode != 0:
+        raise SystemExit(f"verifier exited {proc.returncode}; see {log_path}")
+    return time.perf_counter() - t0
+
+
+def latency_report(metrics_json: str) -> dict:
+    with open(metrics_json) as f:
+        snap = json.load(f)
+    return {op: {k: h[k] for k in ("count", "mean", "p50", "p90", "p99", "max")}
+            for op, h in snap["latency_s"].items()}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--questions", type=int, default=100)
+    ap.add_argument("--answers-per-question", type=int, default=10)
+    ap.add_argument("--wiki-latency-ms", type=float, default=50.0)
+    ap.add_argument("--llm-latency-ms", type=float, default=300.0)
+    ap.add_argument("--jitter", type=float, default=0.5, help="Lognormal sigma of the stub latencies")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="Share of stub requests answered with HTTP 500")
+    ap.add_argument("--wiki-rate-limit", type=float, default=0.0, help="Wiki requests/s before 429 (0 = none)")
+    ap.add_argument("--llm-rate-limit", type=float, default=0.0, help="LLM requests/s before 429 (0 = none)")
+    ap.add_argument("--sleep", type=float, default=0.0, help="Verifier --sleep between network calls")
+    ap.add_argument("--verifier-args", default="", help="Extra flags passed to verify_qa_with_wikipedia.py")
+    ap.add_argument("--kill-at", type=float, default=0.5, help="Restart test: kill after this fraction (0 = skip)")
+    ap.add_argument("--port", type=int, default=0)
+    ap.add_argument("--work-dir", default=None)
+    ap.add_argument("--out", default=None, help="Optional JSON report path")
+    ap.add_argument("--serve-only", action="store_true", help="Only run the stubs until interrupted")
+    args = ap.parse_args()
+
+    wiki = Backend(args.wiki_latency_ms, args.jitter, args.error_rate, args.wiki_rate_limit)
+    llm = Backend(args.llm_latency_ms, args.jitter, args.error_rate, args.llm_rate_limit,
+                  _rng=np.random.default_rng(1))
+    server, stats = start_stubs(wiki, llm, args.port)
+    port = server.server_address[1]
+    env = {**os.environ, **stub_env(port)}
+
+    if args.serve_only:
+        for k, v in stub_env(port).items():
+            print(f"export {k}='{v}'")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            return
+
+    work = args.work_dir or tempfile.mkdtemp(prefix="bench_verify_")
+    os.makedirs(work, exist_ok=True)
+    input_csv = os.path.join(work, "input.csv")
+    n_pairs = write_input(input_csv, args.questions, args.answers_per_question)
+    log_path = os.path.join(work, "verifier.log")
+    report = {"config": {k: v for k, v in vars(args).items() if k != "serve_only"}, "pairs": n_pairs}
+
+    # full run
+    out = os.path.join(work, "full.csv")
+    metrics_json = os.path.join(work, "full.metrics.json")
+    for p in (out, metrics_json):
+        if os.path.exists(p):
+            os.remove(p)
+    cmd = verifier_cmd(args, input_csv, out, metrics_json)
+    full_s = run_verifier(cmd, env, log_path)
+    rows, keys, errors = read_output(out)
+    report["full"] = {"seconds": full_s, "rows": rows, "pairs_per_s": rows / full_s if full_s else 0.0,
+                      "error_rows": errors, "latency_s": latency_report(metrics_json), "server": stats.to_dict()}
+    print(f"full: {rows} pairs in {full_s:.2f}s ({rows / full_s:.1f} pairs/s) errors={errors}")
+    pair = report["full"]["latency_s"].get("pair")
+    if pair:
+        print(f"pair latency: p50={pair['p50']:.3f}s p90={pair['p90']:.3f}s p99={pair['p99']:.3f}s max={pair['max']:.3f}s")
+
+    # rerun over the finished output: nothing left to do
+    noop_s = run_verifier(cmd, env, log_path)
+    report["resume_noop"] = {"seconds": noop_s, "rows_after": read_output(out)[0]}
+    print(f"resume no-op: {noop_s:.2f}s")
+
+    # kill part-way, then resume
+    if args.kill_at > 0:
+        out = os.path.join(work, "restart.csv")
+        metrics_json = os.path.join(work, "restart.metrics.json")
+        for p in (out, metrics_json):
+            if os.path.exists(p):
+                os.remove(p)
+        cmd = verifier_cmd(args, input_csv, out, metrics_json)
+        target = max(int(n_pairs * args.kill_at), 1)
+        t0 = time.perf_counter()
+        with open(log_path, "a") as log:
+            proc = subprocess.Popen(cmd, env=env, stdout=log, stderr=subprocess.STDOUT)
+            while proc.poll() is None and read_output(out)[0] < target:
+                time.sleep(0.05)
+            if proc.poll() is None:
+                proc.send_signal(signal.SIGKILL)
+            proc.wait()
+        first_s = time.perf_counter() - t0
+        killed_rows = read_output(out)[0]
+        resume_s = run_verifier(cmd, env, log_path)
+        rows, keys, errors = read_output(out)
+        total_s = first_s + resume_s
+        report["restart"] = {"killed_after_rows": killed_rows, "first_s": first_s, "resume_s": resume_s,
+                             "total_s": total_s, "overhead_s": total_s - full_s, "rows": rows,
+                             "duplicate_rows": rows - keys, "missing_pairs": n_pairs - keys, "error_rows": errors}
+        print(f"restart: killed at {killed_rows} rows after {first_s:.2f}s, resumed in {resume_s:.2f}s, "
+              f"overhead vs full={total_s - full_s:+.2f}s duplicates={rows - keys} missing={n_pairs - keys}")
+
+    server.shutdown()
+    report["work_dir"] = work
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Small content-addressed DAG runner with a persistent artifact store.
+
+A stage is a module-level function plus what its result depends on:
+
+    Stage("counts", count_fn, deps=["candidates"], params={"n1": [0, 1, 2]})
+
+The stage key hashes the stage name, `version`, the source of `code` (default: the
+function itself), `params`, the content of the `inputs` files / directories and the
+output hashes of `deps`. The result is pickled to `<store>/objects/<key>.pkl`, and its
+output hash is the hash of those bytes. A stage runs again only when its key changes.
+If the re-run produces the same output, its dependents keep their keys and stay
+cached.
+
+Stages with `files=True` return a list of paths they wrote (figures, CSVs); a cache
+hit also requires those files to still exist with the recorded content.
+
+Ready stages run concurrently in a process pool (`jobs` > 1). Dependency results
+are loaded from the store inside the worker, so only paths cross the process
+boundary. File digests are memoised by (size, mtime) in `<store>/files.json`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+
+@dataclass
+class Stage:
+    name: str
+    fn: Callable
+    deps: Sequence[str] = ()
+    inputs: Sequence[str] = ()
+    params: Dict[str, Any] = field(default_factory=dict)
+    code: Sequence[Callable] = ()
+    version: str = "1"
+    files: bool = False
+
+
+@dataclass
+class Outcome:
+    status: str  # cached | ran | failed | skipped
+    key: str = ""
+    output_hash: str = ""
+    seconds: float = 0.0
+    error: str = ""
+
+
+def _sha(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def code_digest(fns: Sequence[Callable]) -> str:
+    parts = []
+    for fn in fns:
+        try:
+            parts.append(inspect.getsource(fn))
+        except (OSError, TypeError):
+            parts.append(getattr(fn, "__qualname__", repr(fn)))
+    return _sha("\n".join(parts).encode("utf-8"))
+
+
+class ArtifactStore:
+    def __init__(self, root: str):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "meta"), exist_ok=True)
+        self._files_path = os.path.join(root, "files.json")
+        try:
+            with open(self._files_path) as f:
+                self._file_cache = json.load(f)
+        except (OSError, ValueError):
+            self._file_cache = {}
+
+    def object_path(self, key: str) -> str:
+        return os.path.join(self.root, "objects", f"{key}.pkl")
+
+    def meta_path(self, key: str) -> str:
+        return os.path.join(self.root, "meta", f"{key}.json")
+
+    def file_digest(self, path: str) -> str:
+        """Content hash of a file (memoised by size + mtime), directory (all files) or "missing"."""
+        if os.path.isdir(path):
+            entries = []
+            for root, dirs, names in os.walk(path):
+                dirs.sort()
+                for n in sorted(names):
+                    p = os.path.join(root, n)
+                    entries.append(f"{os.path.relpath(p, path)}\t{self.file_digest(p)}")
+            return _sha("\n".join(entries).encode("utf-8"))
+        try:
+            st = os.stat(path)
+        except OSError:
+            return "missing"
+        ap = os.path.abspath(path)
+        hit = self._file_cache.get(ap)
+        if hit and hit[0] == st.st_size and hit[1] == st.st_mtime_ns:
+            return hit[2]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+        self._file_cache[ap] = [st.st_size, st.st_mtime_ns, h.hexdigest()]
+        return h.hexdigest()
+
+    def save_file_cache(self) -> None:
+        tmp = f"{self._files_path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self._file_cache, f)
+        os.replace(tmp, self._files_path)
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Meta of a usable cached result, or None."""
+        try:
+            with open(self.meta_path(key)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(self.object_path(key)):
+            return None
+        for path, digest in meta.get("files", {}).items():
+            if self.file_digest(path) != digest:
+                return None
+        return meta
+
+    def record(self, key: str, meta: dict) -> None:
+        tmp = f"{self.meta_path(key)}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp, self.meta_path(key))
+
+
+def _load(path: str) -> Any:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+def _execute(fn: Callable, dep_paths: Dict[str, str], params: dict, out_path: str) -> tuple:
+    """Run one stage (in a worker): load deps, call fn, pickle the result; (output hash, seconds)."""
+    t0 = time.perf_counter()
+    deps = {name: _load(p) for name, p in dep_paths.items()}
+    result = fn(**deps, **params)
+    data = pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)
+    tmp = f"{out_path}.tmp{os.getpid()}"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, out_path)
+    return _sha(data), time.perf_counter() - t0
+
+
+class DAG:
+    def __init__(self, stages: Sequence[Stage], store: ArtifactStore):
+        self.stages = {s.name: s for s in stages}
+        self.store = store
+        for s in stages:
+            for d in s.deps:
+                if d not in self.stages:
+                    raise ValueError(f"stage {s.name!r} depends on unknown stage {d!r}")
+
+    def key(self, stage: Stage, dep_hashes: Dict[str, str]) -> str:
+        doc = {
+            "name": stage.name,
+            "version": stage.version,
+            "code": code_digest(stage.code or [stage.fn]),
+            "params": stage.params,
+            "inputs": {p: self.store.file_digest(p) for p in stage.inputs},
+            "deps": dep_hashes,
+        }
+        return _sha(json.dumps(doc, sort_keys=True, default=str).encode("utf-8"))
+
+    def result(self, name: str, outcomes: Dict[str, Outcome]) -> Any:
+        return _load(self.store.object_path(outcomes[name].key))
+
+    def run(self, jobs: int = 1, force: Sequence[str] = (), dry_run: bool = False,
+            log: Optional[Callable[[str], None]] = print) -> Dict[str, Outcome]:
+        outcomes: Dict[str, Outcome] = {}
+        running: Dict[Future, tuple] = {}
+        pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 and not dry_run else None
+        try:
+            while len(outcomes) < len(self.stages):
+                progressed = False
+                for s in self.stages.values():
+                    if s.name in outcomes or any(f[0].name == s.name for f in running.values()):
+                        continue
+                    if any(outcomes.get(d) is None for d in s.deps):
+                        continue
+                    progressed = True
+                    if any(outcomes[d].status in ("failed", "skipped") for d in s.deps):
+                        outcomes[s.name] = Outcome("skipped")
+                        continue
+                    key = self.key(s, {d: outcomes[d].output_hash for d in s.deps})
+                    meta = None if s.name in force else self.store.lookup(key)
+                    if meta is not None:
+                        outcomes[s.name] = Outcome("cached", key, meta["output_hash"], meta.get("seconds", 0.0))
+                        continue
+                    if dry_run:
+                        outcomes[s.name] = Outcome("ran", key, f"pending:{key}")
+                        if log:
+                            log(f"would run {s.name}")
+                        continue
+                    args = (s.fn, {d: self.store.object_path(outcomes[d].key) for d in s.deps}, s.params,
+                            self.store.object_path(key))
+                    if pool is None:
+                        outcomes[s.name] = self._finish(s, key, lambda: _execute(*args), log)
+                    else:
+                        running[pool.submit(_execute, *args)] = (s, key)
+                if running:
+                    done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        s, key = running.pop(fut)
+                        outcomes[s.name] = self._finish(s, key, fut.result, log)
+                elif not progressed:
+                    missing = sorted(set(self.stages) - set(outcomes))
+                    raise ValueError(f"dependency cycle among {missing}")
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True, cancel_futures=True)
+            self.store.save_file_cache()
+        return outcomes
+
+    def _finish(self, s: Stage, key: str, get: Callable[[], tuple], log) -> Outcome:
+        try:
+            output_hash, seconds = get()
+        except Exception as e:
+            if log:
+                log(f"FAILED {s.name}: {type(e).__name__}: {e}")
+            return Outcome("failed", key, error=f"{type(e).__name__}: {e}")
+        files = {}
+        if s.files:
+            files = {p: self.store.file_digest(p) for p in _load(self.store.object_path(key))}
+        self.store.record(key, {"stage": s.name, "output_hash": output_hash, "seconds": seconds, "files": files,
+                                "created": time.strftime("%Y-%m-%dT%H:%M:%S")})
+        if log:
+            log(f"ran {s.name} in {seconds:.2f}s")
+        return Outcome("ran", key, output_hash, seconds)
+
+
+def summary(outcomes: Dict[str, Outcome]) -> str:
+    counts: Dict[str, int] = {}
+    for o in outcomes.values():
+        counts[o.status] = counts.get(o.status, 0) + 1
+    ran = sum(o.seconds for o in outcomes.values() if o.status == "ran")
+    saved = sum(o.seconds for o in outcomes.values() if o.status == "cached")
+    return (" ".join(f"{k}={v}" for k, v in sorted(counts.items()))
+            + f" ran_s={ran:.2f} cached_s_saved={saved:.2f}")
+
+
+def snapshot(paths: List[str]) -> Dict[str, tuple]:
+    """(size, mtime) of every file under `paths`, for cheap change polling."""
+    out = {}
+    for p in paths:
+        if os.path.isdir(p):
+            for root, _, names in os.walk(p):
+                for n in names:
+                    fp = os.path.join(root, n)
+                    try:
+                        st = os.stat(fp)
+                    except OSError:
+                        continue
+                    out[fp] = (st.st_size, st.st_mtime_ns)
+        elif os.path.exists(p):
+            st = os.stat(p)
+            out[p] = (st.st_size, st.st_mtime_ns)
+    return out
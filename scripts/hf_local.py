@@ -0,0 +1,196 @@
+"""Offline-first access to the QuAC / QASC / ASQA data materialized under `datasets/raw`.
+
+The download scripts (`quac_download.py`, `qasc_asqa_download.py`) write each split to
+  datasets/raw/<name>/<split>/hf_datasets/   (Arrow shards from `save_to_disk`)
+  datasets/raw/<name>/<split>/data.jsonl     (one example per line)
+
+This module reads those files directly with pyarrow, memory-mapping the Arrow shards,
+so the EDA / stats / candidate scripts start instantly and work without network.
+The Hugging Face hub (`load_dataset`) is only used when a split is not on disk.
+
+Uniform API (all scripts):
+- `load_splits(name)`   -> {split: dataset}, where each dataset supports `len(ds)`,
+                           `ds[i]` (a python dict) and `ds.column_names`
+- `open_table(name, split, columns=...)`  -> memory-mapped `pyarrow.Table`
+- `iter_batches(name, split, columns=...)` -> `pyarrow.RecordBatch` stream
+- `import_hf_datasets()` -> the real Hugging Face `datasets` module (not our `datasets/` dir)
+
+Example:
+  from hf_local import load_splits
+  quac = load_splits("quac")
+  print({k: len(v) for k, v in quac.items()})
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# Hugging Face ids for the datasets we materialize locally.
+HF_IDS = {
+    "quac": "allenai/quac",
+    "qasc": "allenai/qasc",
+    "asqa": "din0s/asqa",
+}
+
+DEFAULT_RAW_DIR = Path(__file__).resolve().parent.parent / "datasets" / "raw"
+
+# Preferred split order when there is no manifest.
+_SPLIT_ORDER = ["train", "validation", "dev", "test"]
+
+
+def import_hf_datasets():
+    """Import the Hugging Face `datasets` package.
+
+    Avoids importing the local `datasets/` directory as a python module when running
+    from the repo root.
+    """
+    cwd = os.getcwd()
+    if "" in sys.path:
+        sys.path.remove("")
+    if cwd in sys.path:
+        sys.path.remove(cwd)
+
+    import datasets  # type: ignore
+
+    return datasets
+
+
+def _raw_dir(raw_dir: Optional[os.PathLike]) -> Path:
+    return Path(raw_dir) if raw_dir is not None else DEFAULT_RAW_DIR
+
+
+def split_dir(name: str, split: str, raw_dir: Optional[os.PathLike] = None) -> Path:
+    return _raw_dir(raw_dir) / name / split
+
+
+def local_splits(name: str, raw_dir: Optional[os.PathLike] = None) -> List[str]:
+    """Splits of `name` that are materialized on disk (manifest order when available)."""
+    base = _raw_dir(raw_dir) / name
+    if not base.is_dir():
+        return []
+    manifest = base / "manifest.json"
+    if manifest.exists():
+        names = list(json.loads(manifest.read_text(encoding="utf-8")).get("splits", {}))
+    else:
+        names = sorted(
+            (p.name for p in base.iterdir() if p.is_dir()),
+            key=lambda s: (_SPLIT_ORDER.index(s) if s in _SPLIT_ORDER else len(_SPLIT_ORDER), s),
+        )
+    return [s for s in names if _shard_files(base / s)]
+
+
+def _shard_files(sdir: Path) -> List[Path]:
+    """Data files for one split, in read order.
+
+    Preference: `save_to_disk` Arrow shards, then parquet shards, then `data.jsonl`.
+    """
+    hf_dir = sdir / "hf_datasets"
+    state = hf_dir / "state.json"
+    if state.exists():
+        files = json.loads(state.read_text(encoding="utf-8")).get("_data_files", [])
+        paths = [hf_dir / f["filename"] for f in files]
+        if paths and all(p.exists() for p in paths):
+            return paths
+    if hf_dir.is_dir():
+        arrows = sorted(hf_dir.glob("*.arrow"))
+        if arrows:
+            return arrows
+    parquets = sorted(sdir.glob("*.parquet"))
+    if parquets:
+        return parquets
+    jsonl = sdir / "data.jsonl"
+    if jsonl.exists():
+        return [jsonl]
+    return []
+
+
+def _read_file(path: Path, columns: Optional[Sequence[str]]):
+    import pyarrow as pa
+
+    if path.suffix == ".arrow":
+        source = pa.memory_map(str(path), "r")
+        try:
+            table = pa.ipc.open_stream(source).read_all()
+        except pa.ArrowInvalid:
+            table = pa.ipc.open_file(source).read_all()
+    elif path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(str(path), columns=list(columns) if columns else None, memory_map=True)
+    else:
+        import pyarrow.json as pj
+
+        table = pj.read_json(str(path))
+    if columns:
+        table = table.select(list(columns))
+    return table
+
+
+def open_table(name: str, split: str, raw_dir: Optional[os.PathLike] = None,
+               columns: Optional[Sequence[str]] = None):
+    """Memory-mapped `pyarrow.Table` for a materialized split (optionally projected)."""
+    import pyarrow as pa
+
+    files = _shard_files(split_dir(name, split, raw_dir))
+    if not files:
+        raise FileNotFoundError(f"{name}/{split} is not materialized under {_raw_dir(raw_dir)}")
+    tables = [_read_file(p, columns) for p in files]
+    return tables[0] if len(tables) == 1 else pa.concat_tables(tables)
+
+
+def iter_batches(name: str, split: str, raw_dir: Optional[os.PathLike] = None,
+                 columns: Optional[Sequence[str]] = None, batch_size: int = 4096,
+                 start: int = 0, stop: Optional[int] = None) -> Iterator[Any]:
+    """Yield `pyarrow.RecordBatch`es over rows [start, stop) of a materialized split."""
+    table = open_table(name, split, raw_dir, columns=columns)
+    stop = table.num_rows if stop is None else min(stop, table.num_rows)
+    for off in range(start, stop, batch_size):
+        for batch in table.slice(off, min(batch_size, stop - off)).to_batches():
+            yield batch
+
+
+class LocalSplit:
+    """Minimal `datasets.Dataset`-like view over a memory-mapped Arrow table."""
+
+    def __init__(self, table):
+        self.table = table
+
+    def __len__(self) -> int:
+        return self.table.num_rows
+
+    @property
+    def column_names(self) -> List[str]:
+        return list(self.table.column_names)
+
+    def __getitem__(self, i: int) -> Dict[str, Any]:
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError(i)
+        return self.table.slice(i, 1).to_pylist()[0]
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for batch in self.table.to_batches():
+            yield from batch.to_pylist()
+
+
+def load_splits(name: str, raw_dir: Optional[os.PathLike] = None, hf_id: Optional[str] = None,
+                allow_hub: bool = True) -> Dict[str, Any]:
+    """Return {split: dataset} for `name`, reading local files when present.
+
+    Falls back to `datasets.load_dataset(hf_id)` only when no split is materialized.
+    """
+    splits = local_splits(name, raw_dir)
+    if splits:
+        return {s: LocalSplit(open_table(name, s, raw_dir)) for s in splits}
+
+    if not allow_hub:
+        raise FileNotFoundError(f"{name} is not materialized under {_raw_dir(raw_dir)}")
+    hf_id = hf_id or HF_IDS[name]
+    print(f"==> {name} not found under {_raw_dir(raw_dir)}; loading {hf_id} from the hub", file=sys.stderr)
+    return dict(import_hf_datasets().load_dataset(hf_id))
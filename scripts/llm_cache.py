@@ -0,0 +1,104 @@
+"""Content-addressed SQLite cache of LLM responses.
+
+Entries are keyed by sha256 of (model, temperature, max_tokens, fully rendered prompt),
+so a re-run that renders the same prompt (same question, answer and evidence) is served
+from disk, while any change to the evidence or model misses. The cache is bounded by
+the total size of stored responses + prompts; when it grows past `max_bytes`, least
+recently used entries are evicted down to 90% of the limit.
+
+Usage (see verify_qa_with_wikipedia.py --llm-cache):
+  cache = LLMCache("outputs/llm_cache.sqlite", max_bytes=512 << 20)
+  hit = cache.get(model, 0, 250, prompt)          # (output, input_tokens, output_tokens) or None
+  cache.put(model, 0, 250, prompt, output, 1234, 56)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from typing import Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    output TEXT NOT NULL,
+    input_tokens INTEGER NOT NULL,
+    output_tokens INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_last_used ON responses(last_used);
+"""
+
+
+def cache_key(model: str, temperature: float, max_tokens: int, prompt: str) -> str:
+    payload = json.dumps([model, float(temperature), int(max_tokens), prompt], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMCache:
+    def __init__(self, path: str, max_bytes: int = 512 << 20):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.conn = sqlite3.connect(path, timeout=60)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, model: str, temperature: float, max_tokens: int, prompt: str) -> Optional[Tuple[str, int, int]]:
+        key = cache_key(model, temperature, max_tokens, prompt)
+        row = self.conn.execute(
+            "SELECT output, input_tokens, output_tokens FROM responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        with self.conn:
+            self.conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0], int(row[1]), int(row[2])
+
+    def put(self, model: str, temperature: float, max_tokens: int, prompt: str, output: str,
+            input_tokens: int = 0, output_tokens: int = 0) -> None:
+        key = cache_key(model, temperature, max_tokens, prompt)
+        size = len(output.encode("utf-8")) + len(prompt.encode("utf-8"))
+        now = time.time()
+        with self.conn:
+            old = self.conn.execute("SELECT size FROM responses WHERE key = ?", (key,)).fetchone()
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, model, output, int(input_tokens), int(output_tokens), size, now, now))
+        self.total += size - (old[0] if old else 0)
+        if self.total > self.max_bytes:
+            self.evict(int(self.max_bytes * 0.9))
+
+    def evict(self, target_bytes: int) -> int:
+        """Drop least recently used entries until the stored size is <= target_bytes."""
+        self.total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        excess = self.total - target_bytes
+        if excess <= 0:
+            return 0
+        keys, freed = [], 0
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            keys.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        with self.conn:
+            self.conn.executemany("DELETE FROM responses WHERE key = ?", keys)
+        self.total -= freed
+        return len(keys)
+
+    def stats(self) -> str:
+        n = self.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return f"hits={self.hits} misses={self.misses} entries={n} bytes={self.total}"
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Merge per-shard outputs of verify_qa_with_wikipedia.py --shard i/n into one CSV.
+
+- Rows are deduplicated by `key` (sha1 of id + answer). When a key appears more than
+  once, a row with a real verdict wins over an ERROR row, otherwise the first seen.
+- With `--input`, the expected key set is recomputed from the source CSV: the merged
+  file is written in input order and missing / unexpected keys are reported
+  (`--strict` exits non-zero when any key is missing). The input is the verifier's
+  own input (id, question, Num answers, Answers); per-pair CSVs with an `answer`
+  column (id, question, answer) work too.
+
+Usage:
+  python3 scripts/merge_shards.py --shards 'outputs/results.shard*of4.csv' \
+    --input questions.csv --output outputs/results.csv
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import os
+import sys
+
+from verify_qa_with_wikipedia import iter_input_rows, key_for, parse_answers_field
+
+FIELDS = ["key", "id", "question", "answer", "verdict", "confidence", "evidence_url", "evidence_text", "llm_output"]
+
+
+def _is_error(row: dict) -> bool:
+    return (row.get("evidence_text") or "").startswith("ERROR:")
+
+
+def expected_keys(input_csv: str) -> list:
+    """Keys in input order, as verify_qa_with_wikipedia.py produces them."""
+    keys = []
+    for row in iter_input_rows(input_csv):
+        qid = (row.get("id") or "").strip()
+        if "Answers" in row:
+            answers = parse_answers_field(row.get("Answers") or "")
+        else:  # one pair per row (plausibleqa-remaining.csv layout)
+            answers = [a for a in [(row.get("answer") or "").strip()] if a]
+        keys.extend(key_for(qid, a) for a in answers or [""])
+    return keys
+
+
+def merge(paths: list) -> tuple:
+    """(rows by key in first-seen order, number of duplicate rows dropped)."""
+    rows: dict = {}
+    dupes = 0
+    for path in paths:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                k = (row.get("key") or "").strip()
+                if not k:
+                    continue
+                old = rows.get(k)
+                if old is None:
+                    rows[k] = row
+                    continue
+                dupes += 1
+                if _is_error(old) and not _is_error(row):
+                    rows[k] = row
+    return rows, dupes
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--shards", nargs="+", required=True, help="Shard CSVs or glob patterns")
+    ap.add_argument("--output", required=True)
+    ap.add_argument("--input", default=None, help="Source CSV, to check and order keys")
+    ap.add_argument("--strict", action="store_true", help="Exit 1 if any input key is missing")
+    args = ap.parse_args()
+
+    csv.field_size_limit(sys.maxsize)
+    paths = sorted({p for pat in args.shards for p in (glob.glob(pat) or [pat]) if os.path.exists(p)})
+    if not paths:
+        raise SystemExit("no shard files found")
+    rows, dupes = merge(paths)
+
+    order = list(rows)
+    missing, extra = [], []
+    if args.input:
+        exp = expected_keys(args.input)
+        exp_set = set(exp)
+        missing = [k for k in dict.fromkeys(exp) if k not in rows]
+        extra = [k for k in order if k not in exp_set]
+        order = [k for k in dict.fromkeys(exp) if k in rows] + extra
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    tmp = args.output + ".tmp"
+    with open(tmp, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS, extrasaction="ignore")
+        writer.writeheader()
+        for k in order:
+            writer.writerow(rows[k])
+    os.replace(tmp, args.output)
+
+    print(f"shards={len(paths)} keys={len(order)} duplicates_dropped={dupes} "
+          f"errors={sum(_is_error(rows[k]) for k in order)} out={args.output}")
+    if args.input:
+        print(f"expected_keys={len(exp_set)} missing={len(missing)} unexpected={len(extra)}")
+        if missing and args.strict:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""Incremental version of nnd_plots.py: load -> count -> grid / summary / figures as a cached DAG.
+
+Stages (see dag.py for keys, caching and parallelism):
+  load_<source>            one nnd_plots loader per dataset file found (inputs: its files)
+  counts_<source>          per_prompt_counts of that source
+  counts                   all per-source counts concatenated
+  grid                     filter_grid over --n1 x --n2 -> --write-csv (default <out>/filter_grid.csv)
+  summary                  summary_stats -> <out>/summary.json
+  plot_<figure>__<source>  one stage per figure function in nnd_plots.FIGURES and source
+  candidates               with --write-candidates: the full candidate table
+
+Only stages whose inputs, parameters, code or upstream outputs changed are re-run:
+editing a figure function re-draws that figure only, changing --n1/--n2 recomputes
+the grid only, and touching one source file reloads that source. A reloaded source
+whose table did not change leaves everything downstream cached. Independent stages
+run in parallel with --jobs. --watch polls the source files and re-runs
+incrementally after every change.
+
+Usage:
+  python3 scripts/nnd_pipeline.py --nnd-data datasets/candidates/nnd_data --out figures/nnd --jobs 4
+  python3 scripts/nnd_pipeline.py --nnd-data datasets/candidates/nnd_data --out figures/nnd --watch
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import os
+import time
+
+os.environ.setdefault("MPLBACKEND", "Agg")
+
+import pandas as pd
+
+import nnd_plots
+import row_builder
+from dag import DAG, ArtifactStore, Stage, snapshot, summary
+
+# Project code the loaders call, hashed into the load_<source> keys with the loader itself.
+LOADER_CODE = [nnd_plots._source_digest, row_builder]
+LOADER_MODULES = {  # loader -> modules it imports lazily (imported here only when the source is present)
+    "load_raw_qa": ["qa_candidates", "hf_local"],
+    "load_plausibleqa_verified": ["plausibleqa"],
+}
+
+
+def stage_load(loader: str, args: list) -> pd.DataFrame:
+    return getattr(nnd_plots, loader)(*args)
+
+
+def stage_counts(**deps) -> pd.DataFrame:
+    (df,) = deps.values()
+    return nnd_plots.per_prompt_counts(df)
+
+
+def stage_concat(**deps) -> pd.DataFrame:
+    return pd.concat([deps[k] for k in sorted(deps)], ignore_index=True)
+
+
+def stage_grid(counts: pd.DataFrame, n1_values: list, n2_values: list, path: str) -> list:
+    grid = nnd_plots.filter_grid(counts, n1_values, n2_values)
+    nnd_plots.ensure_dir(os.path.dirname(path) or ".")
+    grid.to_csv(path, index=False)
+    return [path]
+
+
+def stage_summary(counts: pd.DataFrame, path: str) -> list:
+    nnd_plots.ensure_dir(os.path.dirname(path) or ".")
+    with open(path, "w") as f:
+        json.dump(nnd_plots.summary_stats(counts), f, indent=2, default=float)
+    return [path]
+
+
+def stage_plot(figure: str, out_dir: str, **deps) -> list:
+    (counts,) = deps.values()
+    nnd_plots.ensure_dir(out_dir)
+    return [nnd_plots.FIGURES[figure](sub.copy(), dataset, out_dir) for dataset, sub in counts.groupby("dataset", observed=True)]
+
+
+def stage_candidates(path: str, **deps) -> list:
+    nnd_plots.write_table(pd.concat([deps[k] for k in sorted(deps)], ignore_index=True), path)
+    return [path]
+
+
+def loader_code(fn) -> list:
+    return [stage_load, fn, *LOADER_CODE,
+            *(importlib.import_module(m) for m in LOADER_MODULES.get(fn.__name__, []))]
+
+
+def build_stages(args) -> list:
+    sources = nnd_plots.candidate_sources(args.nnd_data, args.raw_data, args.plausibleqa, args.plausibleqa_verified)
+    if not sources:
+        raise SystemExit("No datasets found under --nnd-data / --raw-data / --plausibleqa")
+
+    stages = []
+    for name, fn, fn_args, inputs in sources:
+        stages.append(Stage(f"load_{name}", stage_load, inputs=inputs,
+                            params={"loader": fn.__name__, "args": list(fn_args)}, code=loader_code(fn)))
+        stages.append(Stage(f"counts_{name}", stage_counts, deps=[f"load_{name}"],
+                            code=[stage_counts, nnd_plots.per_prompt_counts]))
+        for fig, plot_fn in nnd_plots.FIGURES.items():
+            stages.append(Stage(f"plot_{fig}__{name}", stage_plot, deps=[f"counts_{name}"],
+                                params={"figure": fig, "out_dir": args.out}, code=[stage_plot, plot_fn], files=True))
+
+    names = [name for name, *_ in sources]
+    stages.append(Stage("counts", stage_concat, deps=[f"counts_{n}" for n in names]))
+    stages.append(Stage("grid", stage_grid, deps=["counts"], files=True,
+                        params={"n1_values": args.n1, "n2_values": args.n2,
+                                "path": args.write_csv or os.path.join(args.out, "filter_grid.csv")},
+                        code=[stage_grid, nnd_plots.filter_grid]))
+    stages.append(Stage("summary", stage_summary, deps=["counts"], files=True,
+                        params={"path": os.path.join(args.out, "summary.json")},
+                        code=[stage_summary, nnd_plots.summary_stats, nnd_plots.quantiles]))
+    if args.write_candidates:
+        stages.append(Stage("candidates", stage_candidates, deps=[f"load_{n}" for n in names], files=True,
+                            params={"path": args.write_candidates}, code=[stage_candidates, nnd_plots.write_table]))
+    return stages
+
+
+def run_once(args, store: ArtifactStore) -> bool:
+    t0 = time.time()
+    dag = DAG(build_stages(args), store)
+    outcomes = dag.run(jobs=args.jobs, force=args.force, dry_run=args.dry_run,
+                       log=None if args.quiet else print)
+    print(f"pipeline: {summary(outcomes)} wall_s={time.time() - t0:.2f}")
+    failed = [n for n, o in outcomes.items() if o.status in ("failed", "skipped")]
+    if failed:
+        print(f"failed or skipped: {', '.join(sorted(failed))}")
+        return False
+    if not args.dry_run:
+        with open(dag.result("summary", outcomes)[0]) as f:
+            for dataset, stats in json.load(f).items():
+                print(dataset, stats)
+    return True
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nnd-data", required=True, help="Path to nnd_data folder")
+    ap.add_argument("--out", required=True, help="Output directory for plots, grid and summary")
+    ap.add_argument("--write-csv", default=None, help="Filter grid CSV (default <out>/filter_grid.csv)")
+    ap.add_argument("--raw-data", default=None, help="Optional datasets/raw folder (QASC/ASQA/QuAC)")
+    ap.add_argument("--plausibleqa", default=None, help="Optional PlausibleQA source")
+    ap.add_argument("--plausibleqa-verified", nargs="*",
+                    default=["outputs/plausibleqa-verified.csv", "outputs/plausibleqa-verified2.csv"])
+    ap.add_argument("--write-candidates", default=None, help="Optional .parquet/.csv path for the candidate table")
+    ap.add_argument("--n1", type=lambda s: [int(x) for x in s.split(",")], default=nnd_plots.N1_VALUES,
+                    help="Comma-separated N1_min_pos values")
+    ap.add_argument("--n2", type=lambda s: [int(x) for x in s.split(",")], default=nnd_plots.N2_VALUES,
+                    help="Comma-separated N2_min_neg values")
+    ap.add_argument("--store", default="outputs/nnd_pipeline_cache", help="Artifact store directory")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="Parallel stage workers")
+    ap.add_argument("--force", nargs="*", default=[], help="Stage names to re-run regardless of the cache")
+    ap.add_argument("--dry-run", action="store_true", help="Only list the stages that would run")
+    ap.add_argument("--quiet", action="store_true", help="Do not log individual stages")
+    ap.add_argument("--watch", action="store_true", help="Re-run whenever a source file changes")
+    ap.add_argument("--watch-interval", type=float, default=2.0, help="Seconds between source polls")
+    args = ap.parse_args()
+
+    store = ArtifactStore(args.store)
+    ok = run_once(args, store)
+    if not args.watch:
+        raise SystemExit(0 if ok else 1)
+
+    watched = [p for p in [args.nnd_data, args.raw_data, args.plausibleqa] if p]
+    if args.plausibleqa:
+        watched += args.plausibleqa_verified
+    state = snapshot(watched)
+    print(f"watching {len(state)} files under {', '.join(watched)} (Ctrl-C to stop)")
+    try:
+        while True:
+            time.sleep(args.watch_interval)
+            new = snapshot(watched)
+            if new != state:
+                changed = sorted(p for p in set(state) | set(new) if state.get(p) != new.get(p))
+                print(f"changed: {', '.join(changed[:5])}{' ...' if len(changed) > 5 else ''}")
+                state = new
+                run_once(args, store)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
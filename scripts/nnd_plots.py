@@ -11,16 +11,21 @@ This script:
 - computes per-prompt counts of pos/neg candidates
 - produces distribution plots (histograms + heatmaps)
 - reports how many prompts remain after filtering for pos>=N1 and neg>=N2 for a grid of values
+- with --profile, times every loader, count/grid stage and figure (see stage_trace.py)
 
 POS/NEG definitions:
 - MT MQM: POS iff category==No-error and severity==No-error for that system on that segment.
 - QA Challenge300: POS iff credit==1.0 (NEG credit==0.0)
 - QGen QuizDesign: POS iff reason=="No error"
 - Summ GPT3 (cnn/bbc): POS iff max score among {gpt3,t0,brio}, where score = (#best) - (#worst)
+- QASC / ASQA / QuAC (with --raw-data): see scripts/qa_candidates.py
+- PlausibleQA (with --plausibleqa): POS iff verdict=="supported" (or unverified gold answer),
+  NEG iff verdict=="unsupported"; see scripts/plausibleqa.py
 
 """
 
 import argparse
+import hashlib
 import os
 import json
 import csv
@@ -31,6 +36,15 @@ import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+import stage_trace
+from row_builder import CandidateRows
+from scoring import write_table
+from stage_trace import span, traced
+
+
+N1_VALUES = [0, 1, 2, 3, 5, 10]
+N2_VALUES = [0, 1, 2, 3, 5, 10]
+
 
 def ensure_dir(p):
     os.makedirs(p, exist_ok=True)
@@ -48,6 +62,12 @@ def quantiles(x):
     )
 
 
+def _source_digest(text: str) -> int:
+    """Stable 12-digit id for a source sentence (unlike `hash()`, identical across processes)."""
+    return int(hashlib.blake2b(text.encode("utf-8"), digest_size=8).hexdigest(), 16) % 10**12
+
+
+@traced()
 def load_mqm(mqm_path: str) -> pd.DataFrame:
     # aggregate to segment+system level
     seg_sys = {}
@@ -72,24 +92,23 @@ def load_mqm(mqm_path: str) -> pd.DataFrame:
             d["cats"].add(row["category"])
             d["sevs"].add(row["severity"])
 
-    rows = []
+    rows = CandidateRows()
     for d in seg_sys.values():
         cats = d["cats"]
         sevs = d["sevs"]
         pos = (cats == {"No-error"} and sevs == {"No-error"})
-        rows.append(
-            {
-                "dataset": "mt_mqm",
-                "prompt_id": f"{d['doc_id']}:{d['seg_id']}:{abs(hash(d['source']))%10**12}",
-                "prompt": d["source"],
-                "candidate": d["target"],
-                "system": d["system"],
-                "pos": int(pos),
-            }
+        rows.add(
+            dataset="mt_mqm",
+            prompt_id=f"{d['doc_id']}:{d['seg_id']}:{_source_digest(d['source'])}",
+            prompt=d["source"],
+            candidate=d["target"],
+            system=d["system"],
+            pos=int(pos),
         )
-    return pd.DataFrame(rows)
+    return rows.frame()
 
 
+@traced()
 def load_challenge300(c300_path: str) -> pd.DataFrame:
     model_names = [
         "Macaw-11B",
@@ -98,7 +117,7 @@ def load_challenge300(c300_path: str) -> pd.DataFrame:
         "Jurassic-1-jumbo",
         "T5-XXL-SSM-NQ",
     ]
-    rows = []
+    rows = CandidateRows()
     with open(c300_path, newline="", encoding="utf-8") as f:
         r = csv.DictReader(f, delimiter="\t")
         for row in r:
@@ -111,43 +130,41 @@ def load_challenge300(c300_path: str) -> pd.DataFrame:
                 credit = float(credit_raw)
                 if credit not in (0.0, 1.0):
                     continue
-                rows.append(
-                    {
-                        "dataset": "qa_challenge300",
-                        "prompt_id": qid,
-                        "prompt": q,
-                        "candidate": row[mn],
-                        "system": mn,
-                        "pos": int(credit == 1.0),
-                    }
+                rows.add(
+                    dataset="qa_challenge300",
+                    prompt_id=qid,
+                    prompt=q,
+                    candidate=row[mn],
+                    system=mn,
+                    pos=int(credit == 1.0),
                 )
-    return pd.DataFrame(rows)
+    return rows.frame()
 
 
+@traced()
 def load_quizdesign(qd_path: str) -> pd.DataFrame:
-    rows = []
+    rows = CandidateRows()
     with open(qd_path, encoding="utf-8") as f:
         for line in f:
             g = json.loads(line)
             prompt_id = str(g["group_id"])
             prompt = f"ANSWER_SPAN: {g['answer_span']}\nCONTEXT: {g['context']}"
             for q in g["questions"]:
-                rows.append(
-                    {
-                        "dataset": "qgen_quizdesign",
-                        "prompt_id": prompt_id,
-                        "prompt": prompt,
-                        "candidate": q["question"],
-                        "system": q.get("model_name", "unknown"),
-                        "pos": int(q.get("reason") == "No error"),
-                    }
+                rows.add(
+                    dataset="qgen_quizdesign",
+                    prompt_id=prompt_id,
+                    prompt=prompt,
+                    candidate=q["question"],
+                    system=q.get("model_name", "unknown"),
+                    pos=int(q.get("reason") == "No error"),
                 )
-    return pd.DataFrame(rows)
+    return rows.frame()
 
 
+@traced()
 def load_gpt3_summ(json_path: str, name: str) -> pd.DataFrame:
     data = json.load(open(json_path))
-    rows = []
+    rows = CandidateRows()
     for doc_id, doc in data.items():
         if "annotators" not in doc:
             continue
@@ -157,19 +174,18 @@ def load_gpt3_summ(json_path: str, name: str) -> pd.DataFrame:
             scores[anno["worst_summary"][0]] -= 1
         mx = max(scores.values())
         for sys in ["gpt3", "t0", "brio"]:
-            rows.append(
-                {
-                    "dataset": f"summ_gpt3_{name}",
-                    "prompt_id": str(doc_id),
-                    "prompt": doc["article"],
-                    "candidate": doc[sys]["text"],
-                    "system": sys,
-                    "pos": int(scores[sys] == mx),
-                }
+            rows.add(
+                dataset=f"summ_gpt3_{name}",
+                prompt_id=str(doc_id),
+                prompt=doc["article"],
+                candidate=doc[sys]["text"],
+                system=sys,
+                pos=int(scores[sys] == mx),
             )
-    return pd.DataFrame(rows)
+    return rows.frame()
 
 
+@traced()
 def load_frank(human_annotations_sentence_json: str, split_file: str) -> pd.DataFrame:
     """Load FRANK and build a V2G view similar to NND's cnndm-only subset.
 
@@ -184,7 +200,7 @@ def load_frank(human_annotations_sentence_json: str, split_file: str) -> pd.Data
         valid = set(line.strip() for line in f if line.strip())
 
     raw = json.load(open(human_annotations_sentence_json))
-    rows = []
+    rows = CandidateRows()
     for d in raw:
         h = d.get("hash")
         if h not in valid:
@@ -223,20 +239,19 @@ def load_frank(human_annotations_sentence_json: str, split_file: str) -> pd.Data
             else:
                 error_type = "Unknown"
 
-        rows.append(
-            {
-                "dataset": "summ_frank_cnndm_test",
-                "prompt_id": h,
-                "prompt": d.get("article", ""),
-                "candidate": d.get("summary", ""),
-                "system": d.get("model_name", "unknown"),
-                "pos": int(error_type == "NoE"),
-            }
+        rows.add(
+            dataset="summ_frank_cnndm_test",
+            prompt_id=h,
+            prompt=d.get("article", ""),
+            candidate=d.get("summary", ""),
+            system=d.get("model_name", "unknown"),
+            pos=int(error_type == "NoE"),
         )
 
-    return pd.DataFrame(rows)
+    return rows.frame()
 
 
+@traced()
 def load_summeval(model_annotations_aligned_jsonl: str) -> pd.DataFrame:
     """Load public SummEval aligned annotations.
 
@@ -249,7 +264,7 @@ def load_summeval(model_annotations_aligned_jsonl: str) -> pd.DataFrame:
 
     This yields 4 derived binary-label datasets, one per dimension.
     """
-    rows = []
+    rows = CandidateRows()
     dims = ["consistency", "coherence", "fluency", "relevance"]
     with open(model_annotations_aligned_jsonl, encoding="utf-8") as f:
         for line in f:
@@ -264,43 +279,45 @@ def load_summeval(model_annotations_aligned_jsonl: str) -> pd.DataFrame:
                 # expect 3
                 num_5 = sum(1 for v in vals if v == 5)
                 pos = (n > 0) and (num_5 > n / 2)
-                rows.append(
-                    {
-                        "dataset": f"summ_summeval_{dim}",
-                        "prompt_id": str(pid),
-                        "prompt": "",
-                        "candidate": decoded,
-                        "system": model_id,
-                        "pos": int(pos),
-                    }
+                rows.add(
+                    dataset=f"summ_summeval_{dim}",
+                    prompt_id=str(pid),
+                    prompt="",
+                    candidate=decoded,
+                    system=model_id,
+                    pos=int(pos),
                 )
-    return pd.DataFrame(rows)
+    return rows.frame()
 
 
+@traced()
 def per_prompt_counts(df: pd.DataFrame) -> pd.DataFrame:
-    g = df.groupby(["dataset", "prompt_id"], as_index=False)["pos"].agg(["count", "sum"])
+    g = df.groupby(["dataset", "prompt_id"], as_index=False, observed=True)["pos"].agg(["count", "sum"])
     g = g.reset_index()
     g.rename(columns={"count": "n_total", "sum": "n_pos"}, inplace=True)
     g["n_neg"] = g["n_total"] - g["n_pos"]
     return g
 
 
-def plot_distributions(counts: pd.DataFrame, out_dir: str):
-    ensure_dir(out_dir)
-
-    for dataset, sub in counts.groupby("dataset"):
-        sub = sub.copy()
-        # histogram of total candidates
+def plot_hist_n_total(sub: pd.DataFrame, dataset: str, out_dir: str) -> str:
+    """Histogram of candidates per prompt; returns the PNG path."""
+    path = os.path.join(out_dir, f"{dataset}__hist_n_total.png")
+    with span("plot_hist_n_total", rows=len(sub), dataset=dataset):
         plt.figure(figsize=(7, 4))
         sns.histplot(sub["n_total"], bins=30)
         plt.title(f"{dataset}: candidates per prompt")
         plt.xlabel("# candidates")
         plt.ylabel("# prompts")
         plt.tight_layout()
-        plt.savefig(os.path.join(out_dir, f"{dataset}__hist_n_total.png"), dpi=200)
+        plt.savefig(path, dpi=200)
         plt.close()
+    return path
 
-        # histogram of pos/neg
+
+def plot_hist_pos_neg(sub: pd.DataFrame, dataset: str, out_dir: str) -> str:
+    """Side-by-side histograms of #POS and #NEG per prompt; returns the PNG path."""
+    path = os.path.join(out_dir, f"{dataset}__hist_pos_neg.png")
+    with span("plot_hist_pos_neg", rows=len(sub), dataset=dataset):
         fig, ax = plt.subplots(1, 2, figsize=(12, 4))
         sns.histplot(sub["n_pos"], bins=30, ax=ax[0])
         ax[0].set_title(f"{dataset}: #POS per prompt")
@@ -310,10 +327,15 @@ def plot_distributions(counts: pd.DataFrame, out_dir: str):
             a.set_xlabel("count")
             a.set_ylabel("# prompts")
         plt.tight_layout()
-        plt.savefig(os.path.join(out_dir, f"{dataset}__hist_pos_neg.png"), dpi=200)
+        plt.savefig(path, dpi=200)
         plt.close()
+    return path
+
 
-        # heatmap: n_pos x n_neg counts
+def plot_heatmap_pos_vs_neg(sub: pd.DataFrame, dataset: str, out_dir: str) -> str:
+    """Heatmap of #prompts by (n_pos, n_neg); returns the PNG path."""
+    path = os.path.join(out_dir, f"{dataset}__heatmap_pos_vs_neg.png")
+    with span("plot_heatmap_pos_vs_neg", rows=len(sub), dataset=dataset):
         pivot = (
             sub.groupby(["n_pos", "n_neg"]).size().reset_index(name="n_prompts")
         )
@@ -329,13 +351,48 @@ def plot_distributions(counts: pd.DataFrame, out_dir: str):
         plt.xlabel("n_neg")
         plt.ylabel("n_pos")
         plt.tight_layout()
-        plt.savefig(os.path.join(out_dir, f"{dataset}__heatmap_pos_vs_neg.png"), dpi=200)
+        plt.savefig(path, dpi=200)
         plt.close()
+    return path
 
 
+FIGURES = {
+    "hist_n_total": plot_hist_n_total,
+    "hist_pos_neg": plot_hist_pos_neg,
+    "heatmap_pos_vs_neg": plot_heatmap_pos_vs_neg,
+}
+
+
+def plot_distributions(counts: pd.DataFrame, out_dir: str, figures=None) -> list:
+    """Every figure in FIGURES (or the named subset) for every dataset; returns the PNG paths."""
+    ensure_dir(out_dir)
+    paths = []
+    for dataset, sub in counts.groupby("dataset", observed=True):
+        sub = sub.copy()
+        for name in figures or FIGURES:
+            paths.append(FIGURES[name](sub, dataset, out_dir))
+    return paths
+
+
+def summary_stats(counts: pd.DataFrame) -> dict:
+    """Per-dataset prompt count, POS share and quantiles of n_total / n_pos / n_neg."""
+    stats = {}
+    for dataset, sub in counts.groupby("dataset", observed=True):
+        pos_share = sub["n_pos"].sum() / sub["n_total"].sum()
+        stats[dataset] = {
+            "num_prompts": len(sub),
+            "pos_share": float(pos_share),
+            "n_total": quantiles(sub["n_total"].tolist()),
+            "n_pos": quantiles(sub["n_pos"].tolist()),
+            "n_neg": quantiles(sub["n_neg"].tolist()),
+        }
+    return stats
+
+
+@traced()
 def filter_grid(counts: pd.DataFrame, n1_values, n2_values) -> pd.DataFrame:
     rows = []
-    for dataset, sub in counts.groupby("dataset"):
+    for dataset, sub in counts.groupby("dataset", observed=True):
         for n1 in n1_values:
             for n2 in n2_values:
                 kept = ((sub["n_pos"] >= n1) & (sub["n_neg"] >= n2)).sum()
@@ -352,72 +409,123 @@ def filter_grid(counts: pd.DataFrame, n1_values, n2_values) -> pd.DataFrame:
     return pd.DataFrame(rows)
 
 
-def main():
-    ap = argparse.ArgumentParser()
-    ap.add_argument("--nnd-data", required=True, help="Path to nnd_data folder")
-    ap.add_argument("--out", required=True, help="Output directory for plots")
-    ap.add_argument("--write-csv", default=None, help="Optional CSV path for filter grid")
-    args = ap.parse_args()
+@traced()
+def load_raw_qa(raw_data: str) -> pd.DataFrame:
+    """QASC / ASQA / QuAC (Arrow splits written by the *_download.py scripts) as one table."""
+    from qa_candidates import load_all as load_qa_candidates
+
+    dfs = load_qa_candidates(raw_data)
+    return pd.concat(dfs, ignore_index=True) if dfs else CandidateRows().frame()
+
+
+@traced()
+def load_plausibleqa_verified(source: str, verified=()) -> pd.DataFrame:
+    """PlausibleQA source joined with the verifier's verdicts (missing verified files are skipped)."""
+    from plausibleqa import load_plausibleqa
 
-    nnd = args.nnd_data
-    dfs = []
+    return load_plausibleqa(source, [p for p in verified if os.path.exists(p)])
+
+
+def candidate_sources(nnd: str, raw_data: str = None, plausibleqa: str = None, plausibleqa_verified=()) -> list:
+    """(name, loader, args, input paths) for every dataset found under `nnd` (and `raw_data`, `plausibleqa`)."""
+    sources = []
 
     mqm_path = os.path.join(nnd, "mqm_newstest2021_ende.tsv")
     if os.path.exists(mqm_path):
-        dfs.append(load_mqm(mqm_path))
+        sources.append(("mqm", load_mqm, (mqm_path,), [mqm_path]))
 
     c300 = os.path.join(nnd, "challenge300-outputs.tsv")
     if os.path.exists(c300):
-        dfs.append(load_challenge300(c300))
+        sources.append(("challenge300", load_challenge300, (c300,), [c300]))
 
     qd = os.path.join(nnd, "quiz_design_groups.jsonl")
     if os.path.exists(qd):
-        dfs.append(load_quizdesign(qd))
+        sources.append(("quizdesign", load_quizdesign, (qd,), [qd]))
 
     ha = os.path.join(nnd, "human_annotations_unzipped", "human_annotations")
     for name in ["cnn", "bbc"]:
         fp = os.path.join(ha, f"{name}_human.json")
         if os.path.exists(fp):
-            dfs.append(load_gpt3_summ(fp, name))
+            sources.append((f"gpt3_{name}", load_gpt3_summ, (fp, name), [fp]))
 
     # FRANK (summary-level candidates per hash)
     frank_json = os.path.join(nnd, "frank", "human_annotations_sentence.json")
     frank_test = os.path.join(nnd, "frank", "test_split.txt")
     if os.path.exists(frank_json) and os.path.exists(frank_test):
-        dfs.append(load_frank(frank_json, frank_test))
+        sources.append(("frank", load_frank, (frank_json, frank_test), [frank_json, frank_test]))
 
     # SummEval (public aligned annotations)
     summeval_path = os.path.join(nnd, "summeval", "model_annotations.aligned.jsonl")
     if os.path.exists(summeval_path):
-        dfs.append(load_summeval(summeval_path))
+        sources.append(("summeval", load_summeval, (summeval_path,), [summeval_path]))
+
+    # QASC / ASQA / QuAC (Arrow splits written by the *_download.py scripts)
+    if raw_data:
+        sources.append(("raw_qa", load_raw_qa, (raw_data,), [raw_data]))
+
+    # PlausibleQA source joined with the verifier's verdicts
+    if plausibleqa:
+        verified = list(plausibleqa_verified)
+        sources.append(("plausibleqa", load_plausibleqa_verified, (plausibleqa, verified), [plausibleqa] + verified))
 
+    return sources
+
+
+def load_candidates(nnd: str, raw_data: str = None, plausibleqa: str = None, plausibleqa_verified=()) -> pd.DataFrame:
+    """Concatenated candidate table for every dataset found under `nnd` (and `raw_data`, `plausibleqa`)."""
+    dfs = [fn(*args) for _, fn, args, _ in candidate_sources(nnd, raw_data, plausibleqa, plausibleqa_verified)]
     if not dfs:
-        raise SystemExit("No datasets found under --nnd-data")
+        raise SystemExit("No datasets found under --nnd-data / --raw-data / --plausibleqa")
+
+    with span("concat_candidates"):
+        return pd.concat(dfs, ignore_index=True)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--nnd-data", required=True, help="Path to nnd_data folder")
+    ap.add_argument("--out", required=True, help="Output directory for plots")
+    ap.add_argument("--write-csv", default=None, help="Optional CSV path for filter grid")
+    ap.add_argument(
+        "--raw-data",
+        default=None,
+        help="Optional datasets/raw folder; adds materialized QASC/ASQA/QuAC splits",
+    )
+    ap.add_argument(
+        "--plausibleqa",
+        default=None,
+        help="Optional PlausibleQA source (.json/.jsonl/.csv); adds qa_plausibleqa with verifier verdicts",
+    )
+    ap.add_argument(
+        "--plausibleqa-verified",
+        nargs="*",
+        default=["outputs/plausibleqa-verified.csv", "outputs/plausibleqa-verified2.csv"],
+        help="Verified CSVs joined onto --plausibleqa (later files win; missing files are skipped)",
+    )
+    ap.add_argument(
+        "--write-candidates",
+        default=None,
+        help="Optional .parquet/.csv path for the full candidate table (input to score_*.py)",
+    )
+    stage_trace.add_arguments(ap, "figures/nnd/profile/nnd_plots.trace.json")
+    args = ap.parse_args()
+    stage_trace.from_args(args)
 
-    df = pd.concat(dfs, ignore_index=True)
+    df = load_candidates(args.nnd_data, args.raw_data, args.plausibleqa, args.plausibleqa_verified)
+    if args.write_candidates:
+        with span("write_table", rows=len(df)):
+            write_table(df, args.write_candidates)
     counts = per_prompt_counts(df)
 
     # print summary stats
     print("Datasets loaded:", sorted(df["dataset"].unique()))
-    for dataset, sub in counts.groupby("dataset"):
-        pos_share = sub["n_pos"].sum() / sub["n_total"].sum()
-        print(
-            dataset,
-            {
-                "num_prompts": len(sub),
-                "pos_share": float(pos_share),
-                "n_total": quantiles(sub["n_total"].tolist()),
-                "n_pos": quantiles(sub["n_pos"].tolist()),
-                "n_neg": quantiles(sub["n_neg"].tolist()),
-            },
-        )
+    for dataset, stats in summary_stats(counts).items():
+        print(dataset, stats)
 
     plot_distributions(counts, args.out)
 
     # filter grid
-    n1_values = [0, 1, 2, 3, 5, 10]
-    n2_values = [0, 1, 2, 3, 5, 10]
-    grid = filter_grid(counts, n1_values, n2_values)
+    grid = filter_grid(counts, N1_VALUES, N2_VALUES)
     if args.write_csv:
         ensure_dir(os.path.dirname(args.write_csv))
         grid.to_csv(args.write_csv, index=False)
@@ -425,6 +533,8 @@ def main():
         # print a small slice
         print(grid.sort_values(["dataset", "N1_min_pos", "N2_min_neg"]).head(50))
 
+    stage_trace.finish()
+
 
 if __name__ == "__main__":
     main()
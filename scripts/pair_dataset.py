@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""Training-ready (prompt, winner, loser) pair dataset built from the candidate table.
+
+Pairs are drawn only within a (dataset, prompt_id): every POS candidate is paired with
+every NEG candidate of the same prompt (optionally capped per prompt). Export writes a
+directory that training streams from without pandas:
+
+  <out>/
+    tokens.bin    flat int32 token ids of every unique text (prompts and candidates)
+    offsets.npy   int64, len n_texts + 1; text i = tokens[offsets[i]:offsets[i + 1]]
+    pairs.npy     int32 (n_pairs, 3): text index of (prompt, winner, loser)
+    pair_group.npy  int32 (n_pairs,): row of groups.csv each pair came from
+    groups.csv    dataset, prompt_id per group (group order = first appearance)
+    meta.json     tokenizer, separator, counts
+
+Prompts are stored as their first `--max-prompt-tokens` ids followed by the ids of `--sep`,
+prompt and separator tokenized separately (scoring.clip_prompt, as in score_generator.py,
+so the token cache entries are shared with the scorers); no BOS/EOS is added. Pairs are grouped by prompt on disk; `iter_pairs` reads contiguous
+blocks in a per-epoch random order and mixes them through a shuffle buffer, so reads
+stay local to the mmap while the stream is well shuffled. The order depends only on
+(seed, epoch, shard), so runs are reproducible and resumable by epoch.
+
+Usage:
+  python3 scripts/pair_dataset.py --candidates outputs/candidates.parquet \
+    --tokenizer Qwen/Qwen2.5-0.5B --out outputs/pairs/train --token-cache outputs/token_cache \
+    --splits outputs/splits.npz --split train
+
+  ds = PairDataset("outputs/pairs")
+  for prompt, win, lose in iter_pairs(ds, epoch=0, seed=0, rank=0, world=1): ...
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+from typing import Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from scoring import clip_prompt, encode, open_token_cache, prompt_groups, read_candidates
+
+try:
+    import torch
+    from torch.utils.data import IterableDataset, get_worker_info
+except ImportError:  # torch is only needed for PairStream
+    torch = None
+    IterableDataset = object
+
+
+def build_pairs(df: pd.DataFrame, max_pairs_per_prompt: int = 0, seed: int = 0):
+    """(pairs [n, 3] as row positions of (prompt row, winner row, loser row), pair_group, groups)."""
+    pos = df["pos"].to_numpy().astype(bool)
+    rng = np.random.default_rng(seed)
+    chunks, group_of, groups = [], [], []
+    for key, rows in prompt_groups(df):
+        w, l = rows[pos[rows]], rows[~pos[rows]]
+        if not len(w) or not len(l):
+            continue
+        p = np.empty((len(w) * len(l), 3), dtype=np.int64)
+        p[:, 0] = rows[0]
+        p[:, 1] = np.repeat(w, len(l))
+        p[:, 2] = np.tile(l, len(w))
+        if max_pairs_per_prompt and len(p) > max_pairs_per_prompt:
+            p = p[np.sort(rng.choice(len(p), max_pairs_per_prompt, replace=False))]
+        chunks.append(p)
+        group_of.append(np.full(len(p), len(groups), dtype=np.int32))
+        groups.append(key)
+    if not chunks:
+        return np.zeros((0, 3), dtype=np.int64), np.zeros(0, dtype=np.int32), groups
+    return np.concatenate(chunks), np.concatenate(group_of), groups
+
+
+def _write_tokens(texts, tok, token_cache, path: str, n_prompts: int = 0, sep_ids=(), max_prompt_tokens: int = 0,
+                  chunk_size: int = 4096) -> np.ndarray:
+    """Stream token ids of `texts` to `path`; returns the offsets array.
+
+    The first `n_prompts` texts are prompts: clipped to `max_prompt_tokens` and followed by `sep_ids`.
+    """
+    offsets = np.zeros(len(texts) + 1, dtype=np.int64)
+    if token_cache is not None:
+        token_cache.populate(texts)
+    with open(path, "wb") as f:
+        for start in range(0, len(texts), chunk_size):
+            batch = list(texts[start:start + chunk_size])
+            if token_cache is not None:
+                ids = token_cache.encode_many(batch)
+            else:
+                ids = tok(batch, add_special_tokens=False)["input_ids"]
+            for j, seq in enumerate(ids):
+                if start + j < n_prompts:
+                    seq = clip_prompt(seq, max_prompt_tokens) + list(sep_ids)
+                arr = np.asarray(seq, dtype=np.int32)
+                f.write(arr.tobytes())
+                offsets[start + j + 1] = offsets[start + j] + len(arr)
+    return offsets
+
+
+def export(df: pd.DataFrame, tok, out_dir: str, sep: str = "\n", max_pairs_per_prompt: int = 0,
+           seed: int = 0, token_cache=None, max_prompt_tokens: int = 1536) -> dict:
+    os.makedirs(out_dir, exist_ok=True)
+    pairs, pair_group, groups = build_pairs(df, max_pairs_per_prompt, seed)
+
+    # one text table: unique prompts first, then unique candidates
+    p_codes, prompts = pd.factorize(df["prompt"].to_numpy(dtype=object)[pairs[:, 0]])
+    c_codes, cands = pd.factorize(df["candidate"].to_numpy(dtype=object)[pairs[:, 1:].ravel()])
+    texts = np.concatenate([np.asarray(prompts, dtype=object), np.asarray(cands, dtype=object)])
+    n = len(pairs)
+    text_pairs = np.empty((n, 3), dtype=np.int32)
+    text_pairs[:, 0] = p_codes
+    text_pairs[:, 1:] = (c_codes + len(prompts)).reshape(n, 2)
+
+    sep_ids = encode(tok, [sep])[0] if sep else []
+    offsets = _write_tokens(texts, tok, token_cache, os.path.join(out_dir, "tokens.bin"), len(prompts), sep_ids,
+                            max_prompt_tokens)
+    np.save(os.path.join(out_dir, "offsets.npy"), offsets)
+    np.save(os.path.join(out_dir, "pairs.npy"), text_pairs)
+    np.save(os.path.join(out_dir, "pair_group.npy"), pair_group)
+    pd.DataFrame(groups, columns=["dataset", "prompt_id"]).to_csv(os.path.join(out_dir, "groups.csv"), index=False)
+
+    group_ds = np.asarray([g[0] for g in groups], dtype=object)
+    per_dataset = pd.Series(np.bincount(pair_group, minlength=len(groups)), index=group_ds).groupby(level=0).sum()
+    meta = {
+        "tokenizer": getattr(tok, "name_or_path", None),
+        "sep": sep,
+        "max_prompt_tokens": max_prompt_tokens,
+        "seed": seed,
+        "max_pairs_per_prompt": max_pairs_per_prompt,
+        "n_pairs": int(n),
+        "n_groups": len(groups),
+        "n_texts": len(texts),
+        "n_tokens": int(offsets[-1]),
+        "pairs_per_dataset": {k: int(v) for k, v in per_dataset.items()},
+    }
+    with open(os.path.join(out_dir, "meta.json"), "w") as f:
+        json.dump(meta, f, indent=2)
+    return meta
+
+
+class PairDataset:
+    """Read-only, memory-mapped view of an exported pair directory."""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.offsets = np.load(os.path.join(path, "offsets.npy"), mmap_mode="r")
+        self.pairs = np.load(os.path.join(path, "pairs.npy"), mmap_mode="r")
+        self.pair_group = np.load(os.path.join(path, "pair_group.npy"), mmap_mode="r")
+        n_tokens = int(self.offsets[-1])
+        self.tokens = (np.memmap(os.path.join(path, "tokens.bin"), dtype=np.int32, mode="r", shape=(n_tokens,))
+                       if n_tokens else np.zeros(0, dtype=np.int32))
+
+    def __len__(self) -> int:
+        return len(self.pairs)
+
+    def text(self, i: int) -> np.ndarray:
+        return self.tokens[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        p, w, l = self.pairs[i]
+        return self.text(p), self.text(w), self.text(l)
+
+    def groups(self) -> pd.DataFrame:
+        return pd.read_csv(os.path.join(self.path, "groups.csv"), dtype={"prompt_id": str}, keep_default_na=False)
+
+
+def epoch_indices(n_pairs: int, epoch: int, seed: int = 0, rank: int = 0, world: int = 1,
+                  block_size: int = 4096, buffer_size: int = 65536) -> Iterator[np.ndarray]:
+    """Chunks of pair indices for one shard of one epoch.
+
+    Contiguous blocks of `block_size` pairs are permuted with a (seed, epoch) RNG and
+    dealt round-robin to `world` shards; each shard passes its blocks through a shuffle
+    buffer of `buffer_size` indices seeded by (seed, epoch, rank).
+    """
+    n_blocks = -(-n_pairs // block_size)
+    blocks = np.random.default_rng([seed, epoch]).permutation(n_blocks)[rank::world]
+    rng = np.random.default_rng([seed, epoch, rank])
+    buf = np.zeros(0, dtype=np.int64)
+    for b in blocks:
+        buf = np.concatenate([buf, np.arange(b * block_size, min((b + 1) * block_size, n_pairs))])
+        if len(buf) > buffer_size:
+            buf = buf[rng.permutation(len(buf))]
+            yield buf[buffer_size:]
+            buf = buf[:buffer_size]
+    if len(buf):
+        yield buf[rng.permutation(len(buf))]
+
+
+def iter_pairs(ds: PairDataset, epoch: int, seed: int = 0, rank: int = 0, world: int = 1,
+               block_size: int = 4096, buffer_size: int = 65536):
+    """(prompt, winner, loser) token-id arrays for one shard of one epoch."""
+    pairs, offsets, tokens = ds.pairs, ds.offsets, ds.tokens
+    for idx in epoch_indices(len(ds), epoch, seed, rank, world, block_size, buffer_size):
+        rows = pairs[np.sort(idx)]
+        # restore the shuffled order after the sorted (mmap-friendly) gather
+        rows = rows[np.argsort(np.argsort(idx))]
+        starts, ends = offsets[rows], offsets[rows + 1]
+        for s, e in zip(starts.tolist(), ends.tolist()):
+            yield tokens[s[0]:e[0]], tokens[s[1]:e[1]], tokens[s[2]:e[2]]
+
+
+class PairStream(IterableDataset):
+    """torch IterableDataset over a PairDataset, sharded across DDP ranks and DataLoader workers.
+
+    Call `set_epoch(epoch)` before each epoch (in the main process; workers are
+    re-created per epoch unless persistent_workers=True).
+    """
+
+    def __init__(self, path: str, seed: int = 0, block_size: int = 4096, buffer_size: int = 65536):
+        if torch is None:
+            raise ImportError("PairStream requires torch")
+        self.path = path
+        self.seed = seed
+        self.block_size = block_size
+        self.buffer_size = buffer_size
+        self.epoch = 0
+        self._ds = None
+
+    def set_epoch(self, epoch: int) -> None:
+        self.epoch = epoch
+
+    def _shard(self) -> Tuple[int, int]:
+        rank, world = 0, 1
+        if torch.distributed.is_available() and torch.distributed.is_initialized():
+            rank, world = torch.distributed.get_rank(), torch.distributed.get_world_size()
+        info = get_worker_info()
+        if info is not None:
+            rank, world = rank * info.num_workers + info.id, world * info.num_workers
+        return rank, world
+
+    def __iter__(self):
+        if self._ds is None:  # open lazily so each worker maps the files itself
+            self._ds = PairDataset(self.path)
+        rank, world = self._shard()
+        for p, w, l in iter_pairs(self._ds, self.epoch, self.seed, rank, world, self.block_size, self.buffer_size):
+            yield torch.from_numpy(p.astype(np.int64)), torch.from_numpy(w.astype(np.int64)), \
+                torch.from_numpy(l.astype(np.int64))
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", required=True, help="Candidate table (.parquet/.csv) from nnd_plots.py")
+    ap.add_argument("--tokenizer", required=True, help="HF tokenizer id or local path")
+    ap.add_argument("--out", required=True, help="Output directory")
+    ap.add_argument("--datasets", default=None, help="Comma-separated dataset filter")
+    ap.add_argument("--sep", default="\n", help="Appended to every prompt (tokenized separately)")
+    ap.add_argument("--max-prompt-tokens", type=int, default=1536,
+                    help="Prompts keep their first N tokens (as in score_generator.py)")
+    ap.add_argument("--max-pairs-per-prompt", type=int, default=0, help="0 = all POS x NEG pairs")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--splits", default=None, help="Split file from prompt_splits.py (same candidate table)")
+    ap.add_argument("--split", default="train", help="Split to export when --splits is given")
+    ap.add_argument("--token-cache", default=None, help="Shared tokenization cache dir (see token_cache.py)")
+    ap.add_argument("--tokenize-workers", type=int, default=1)
+    args = ap.parse_args()
+
+    from transformers import AutoTokenizer
+
+    df = read_candidates(args.candidates)
+    if args.splits:
+        from prompt_splits import load_split_mask
+
+        df = df[load_split_mask(args.splits, args.split)].reset_index(drop=True)
+    if args.datasets:
+        df = df[df["dataset"].isin(args.datasets.split(","))].reset_index(drop=True)
+    tok = AutoTokenizer.from_pretrained(args.tokenizer)
+    meta = export(df, tok, args.out, sep=args.sep, max_pairs_per_prompt=args.max_pairs_per_prompt,
+                  seed=args.seed, token_cache=open_token_cache(args.token_cache, tok, args.tokenize_workers),
+                  max_prompt_tokens=args.max_prompt_tokens)
+    print(json.dumps(meta, indent=2))
+
+
+if __name__ == "__main__":
+    main()
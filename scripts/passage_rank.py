@@ -0,0 +1,151 @@
+"""Cheap local evidence selection for verify_qa_with_wikipedia.py.
+
+Instead of sending the first N characters of a page, the page text is split into
+sentences, each sentence is scored with BM25 against the question and the answer
+variants (sentence-level IDF within the page), and the best sentences are kept, in
+page order, until a token budget is reached. Sentences containing an answer variant
+verbatim get a bonus, so the sentence that decides the verdict is rarely cut off.
+
+Token counts are estimated as ceil(chars / 4); no tokenizer is needed.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import List, Sequence, Tuple
+
+_SENT_RE = re.compile(r"(?:(?<=[.!?])|(?<=[.!?][\"')\]]))\s+(?=[\"'(\[]?[A-Z0-9])|\n+")
+_HEADING_RE = re.compile(r"^=+[^=]*=+$")
+_ABBREV_RE = re.compile(r"(?:^|\s)(?:Mr|Mrs|Ms|Dr|St|Jr|Sr|Prof|Gen|Col|Lt|Sgt|Mt|Ft|vs|etc|ca|c|(?:[A-Za-z]\.)+[A-Za-z])\.$")
+_INITIAL_RE = re.compile(r"(?:^|\s)([A-Z])\.$")
+_NUMBER_ABBREV_RE = re.compile(r"(?:^|\s)No\.$")
+_NAME_START_RE = re.compile(r"[A-Z]\.|([A-Z][a-z]+)\b")
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+STOPWORDS = frozenset(
+    "a an the of in on at to for from by with and or is are was were be been being what which who whom "
+    "whose when where why how did do does this that these those it its as into than then".split()
+)
+
+K1 = 1.2
+B = 0.75
+ANSWER_WEIGHT = 2.0
+PHRASE_BONUS = 3.0
+SEPARATOR = " … "
+
+
+def _continues(prev: str, nxt: str) -> bool:
+    """True when the period ending `prev` did not end a sentence ("Dr.", "U.S.", "John F.", "No. 5")."""
+    if _ABBREV_RE.search(prev):
+        return True
+    if _NUMBER_ABBREV_RE.search(prev):
+        return nxt[:1].isdigit()
+    m = _INITIAL_RE.search(prev)
+    if m is None:
+        return False
+    # an initial is followed by another initial or a name; "World War I. The ..." is a sentence end
+    name = _NAME_START_RE.match(nxt)
+    if name is None:
+        return False
+    if name.group(1) is None:
+        return True
+    return m.group(1) not in "IVX" and name.group(1).lower() not in STOPWORDS
+
+
+def split_sentences(text: str) -> List[str]:
+    """Sentences of plain page text; section headings ("== History ==") are dropped."""
+    out: List[str] = []
+    for s in _SENT_RE.split(text or ""):
+        s = s.strip()
+        if not s or _HEADING_RE.match(s):
+            continue
+        if out and _continues(out[-1], s):
+            out[-1] = f"{out[-1]} {s}"
+        else:
+            out.append(s)
+    return out
+
+
+def tokenize(text: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(text.lower()) if w not in STOPWORDS]
+
+
+def approx_tokens(text: str) -> int:
+    return math.ceil(len(text) / 4)
+
+
+def score_sentences(sentences: Sequence[str], question: str, variants: Sequence[str]) -> List[float]:
+    """BM25 score of each sentence for the question + answer-variant query."""
+    docs = [tokenize(s) for s in sentences]
+    if not docs:
+        return []
+    n = len(docs)
+    avg_len = sum(len(d) for d in docs) / n or 1.0
+    df = Counter(w for d in docs for w in set(d))
+
+    weights = Counter()
+    for w in tokenize(question):
+        weights[w] = max(weights[w], 1.0)
+    for v in variants:
+        for w in tokenize(v):
+            weights[w] = max(weights[w], ANSWER_WEIGHT)
+
+    lowered = [v.lower() for v in variants if v]
+    scores = []
+    for sent, d in zip(sentences, docs):
+        tf = Counter(d)
+        s = 0.0
+        for w, qw in weights.items():
+            f = tf.get(w)
+            if not f:
+                continue
+            idf = math.log(1 + (n - df[w] + 0.5) / (df[w] + 0.5))
+            s += qw * idf * f * (K1 + 1) / (f + K1 * (1 - B + B * len(d) / avg_len))
+        low = sent.lower()
+        if any(v in low for v in lowered):
+            s += PHRASE_BONUS
+        scores.append(s)
+    return scores
+
+
+def select_passage(text: str, question: str, variants: Sequence[str], max_tokens: int = 200,
+                   max_sentences: int = 6) -> Tuple[str, int]:
+    """(selected text, number of sentences kept) within `max_tokens` estimated tokens.
+
+    Falls back to the leading sentences when nothing matches the query.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return "", 0
+    scores = score_sentences(sentences, question, variants)
+    ranked = max(scores) > 0
+    if ranked:
+        order = sorted(range(len(sentences)), key=lambda i: (-scores[i], i))
+        order = [i for i in order if scores[i] > 0]
+    else:
+        order = list(range(len(sentences)))
+
+    keep: List[int] = []
+    budget = max_tokens
+    for i in order:
+        if len(keep) >= max_sentences:
+            break
+        cost = approx_tokens(sentences[i])
+        if cost > budget:
+            if not keep:  # always return something: clip the best sentence
+                return sentences[i][: max_tokens * 4].rstrip() + "…", 1
+            if not ranked:  # leading sentences only: stop at the first one that does not fit
+                break
+            continue
+        keep.append(i)
+        budget -= cost
+    keep.sort()
+    parts = []
+    for j, i in enumerate(keep):
+        if j and i != keep[j - 1] + 1:
+            parts.append(SEPARATOR)
+        elif j:
+            parts.append(" ")
+        parts.append(sentences[i])
+    return "".join(parts), len(keep)
@@ -0,0 +1,190 @@
+"""Streaming reader for the PlausibleQA source (10K questions x ~10 candidate answers).
+
+Accepted layouts:
+- JSON list or JSONL of question records as released by PlausibleQA: `id`, `question`,
+  the gold `answer` (string or list) and `candidate_answers`, either a dict
+  {answer text: {score fields...}} or a list of dicts with an `answer`/`text` field
+- pair CSV with columns id, question, answer (outputs/plausibleqa-remaining.csv layout)
+- grouped CSV with columns id, question, Answers (';'-separated; the verifier's input)
+
+Every reader yields (id, question, answer, info) where `info` holds the numeric
+fields attached to the candidate (nested dicts are flattened with "_"), plus
+`is_gold` = 1.0 for the gold answer. CSV sources carry no scores.
+
+`load_plausibleqa` turns the source into the candidate-table schema used by
+nnd_plots.py / score_*.py, with verdicts from the verified CSVs attached.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import sys
+from typing import Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+Pair = Tuple[str, str, str, Dict[str, float]]
+
+
+def _numeric_fields(d, prefix: str = "") -> Dict[str, float]:
+    out: Dict[str, float] = {}
+    if not isinstance(d, dict):
+        return out
+    for k, v in d.items():
+        name = f"{prefix}{k}"
+        if isinstance(v, bool):
+            out[name] = float(v)
+        elif isinstance(v, (int, float)):
+            out[name] = float(v)
+        elif isinstance(v, dict):
+            out.update(_numeric_fields(v, name + "_"))
+    return out
+
+
+def _iter_json_records(path: str) -> Iterator[dict]:
+    with open(path, encoding="utf-8") as f:
+        first = f.read(1)
+        while first and first.isspace():
+            first = f.read(1)
+        f.seek(0)
+        if first == "[":
+            yield from json.load(f)
+        elif first == "{" and not path.endswith(".jsonl"):
+            data = json.load(f)
+            # {"data": [...]} or {id: record}
+            records = data.get("data") if isinstance(data.get("data"), list) else None
+            if records is None:
+                records = [dict(v, id=v.get("id", k)) for k, v in data.items() if isinstance(v, dict)]
+            yield from records
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _record_pairs(rec: dict) -> Iterator[Pair]:
+    qid = str(rec.get("id", "")).strip()
+    question = str(rec.get("question", "")).strip()
+    gold = rec.get("answer")
+    golds = [g for g in (gold if isinstance(gold, list) else [gold]) if isinstance(g, str) and g.strip()]
+    gold_set = {g.strip() for g in golds}
+
+    cands = rec.get("candidate_answers") or rec.get("candidates") or {}
+    items = []
+    if isinstance(cands, dict):
+        items = [(str(a).strip(), info) for a, info in cands.items()]
+    elif isinstance(cands, list):
+        for c in cands:
+            if isinstance(c, dict):
+                a = c.get("answer", c.get("text", c.get("candidate", "")))
+                items.append((str(a).strip(), c))
+            else:
+                items.append((str(c).strip(), {}))
+
+    seen = set()
+    for g in golds:
+        g = g.strip()
+        if g not in seen and g not in {a for a, _ in items}:
+            seen.add(g)
+            yield qid, question, g, {"is_gold": 1.0}
+    for a, info in items:
+        if not a or a in seen:
+            continue
+        seen.add(a)
+        fields = _numeric_fields(info)
+        fields["is_gold"] = 1.0 if a in gold_set else 0.0
+        yield qid, question, a, fields
+
+
+def iter_source(path: str) -> Iterator[Pair]:
+    """(id, question, answer, numeric info) for every candidate of the source, in file order."""
+    if path.endswith(".csv"):
+        csv.field_size_limit(sys.maxsize)
+        with open(path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            grouped = "answer" not in (reader.fieldnames or []) and "Answers" in (reader.fieldnames or [])
+            for row in reader:
+                qid = (row.get("id") or "").strip()
+                question = (row.get("question") or "").strip()
+                if grouped:
+                    for a in (p.strip() for p in (row.get("Answers") or "").split(";")):
+                        if a:
+                            yield qid, question, a, {}
+                else:
+                    a = (row.get("answer") or "").strip()
+                    if a:
+                        yield qid, question, a, {}
+        return
+    for rec in _iter_json_records(path):
+        yield from _record_pairs(rec)
+
+
+def iter_source_pairs(path: str) -> Iterator[Tuple[str, str, str]]:
+    for qid, question, answer, _ in iter_source(path):
+        yield qid, question, answer
+
+
+def _pair_hash(ids, answers) -> np.ndarray:
+    return pd.util.hash_pandas_object(pd.DataFrame({"id": ids, "answer": answers}), index=False).to_numpy()
+
+
+def load_verdicts(paths: Iterable[str]) -> pd.DataFrame:
+    """Last verdict / confidence per (id, answer) over the verified CSVs (later files win)."""
+    csv.field_size_limit(sys.maxsize)
+    frames = []
+    for path in paths:
+        cols = pd.read_csv(path, nrows=0).columns
+        use = [c for c in ("id", "answer", "verdict", "confidence") if c in cols]
+        df = pd.read_csv(path, usecols=use, dtype={"id": str, "answer": str, "verdict": str},
+                         keep_default_na=False)
+        frames.append(df)
+    if not frames:
+        return pd.DataFrame({"pair_hash": pd.Series(dtype="uint64"), "verdict": [], "confidence": []})
+    v = pd.concat(frames, ignore_index=True)
+    v["pair_hash"] = _pair_hash(v["id"].str.strip(), v["answer"].str.strip())
+    v["verdict"] = v["verdict"].str.strip().str.lower()
+    v["confidence"] = pd.to_numeric(v.get("confidence"), errors="coerce")
+    return v.drop_duplicates("pair_hash", keep="last")[["pair_hash", "verdict", "confidence"]]
+
+
+def load_plausibleqa(source: str, verified_paths: Iterable[str] = ()) -> pd.DataFrame:
+    """PlausibleQA as a candidate table (dataset, prompt_id, prompt, candidate, system, pos, ...).
+
+    Verdicts from the verified CSVs are attached with a hash join on (id, answer):
+    POS = verdict "supported", or no verdict and the gold answer; NEG = "unsupported".
+    Rows that are `unknown` or unverified non-gold answers are dropped. Numeric source
+    fields (plausibility scores, ranks) are kept as float columns, together with
+    `verdict` and `confidence`; `system` is "gold" or "candidate".
+    """
+    ids, questions, answers, infos = [], [], [], []
+    for qid, question, answer, info in iter_source(source):
+        ids.append(qid)
+        questions.append(question)
+        answers.append(answer)
+        infos.append(info)
+    df = pd.DataFrame({"prompt_id": ids, "prompt": questions, "candidate": answers})
+    scores = pd.DataFrame.from_records(infos, index=df.index).astype(np.float64)
+    df["pair_hash"] = _pair_hash(df["prompt_id"], df["candidate"])
+
+    df = df.merge(load_verdicts(list(verified_paths)), on="pair_hash", how="left")
+    is_gold = scores["is_gold"].fillna(0).to_numpy() > 0 if "is_gold" in scores else np.zeros(len(df), bool)
+    supported = (df["verdict"] == "supported").to_numpy()
+    unsupported = (df["verdict"] == "unsupported").to_numpy()
+    keep = supported | unsupported | (df["verdict"].isna().to_numpy() & is_gold)
+
+    out = pd.DataFrame({
+        "dataset": "qa_plausibleqa",
+        "prompt_id": df["prompt_id"],
+        "prompt": df["prompt"],
+        "candidate": df["candidate"],
+        "system": np.where(is_gold, "gold", "candidate"),
+        "pos": (supported | (df["verdict"].isna().to_numpy() & is_gold)).astype(int),
+        "verdict": df["verdict"].fillna(""),
+        "confidence": df["confidence"],
+    })
+    for col in scores.columns:
+        if col != "is_gold":
+            out[col] = scores[col].to_numpy()
+    return out[keep].reset_index(drop=True)
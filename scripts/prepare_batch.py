@@ -11,6 +11,13 @@ Writes:
 
 Usage:
   python scripts/prepare_batch.py [--batch-size N]
+  python scripts/prepare_batch.py --schedule threshold --n1 2 --n2 1
+
+With --schedule threshold the batch is not the next slice at the offset: pairs not yet
+in the verified CSVs are ranked by verify_scheduler.py so that questions closest to
+N1 supported / N2 unsupported answers are verified first. Such batches carry
+"schedule": "threshold" and no offset / batch number, and save_results.py leaves
+qa_offset.txt alone for them.
 
 Output format (/tmp/qa_batch.json):
 {
@@ -25,6 +32,7 @@ Output format (/tmp/qa_batch.json):
 """
 
 import csv
+import io
 import json
 import argparse
 from pathlib import Path
@@ -34,6 +42,10 @@ PROJECT_ROOT = Path(__file__).parent.parent
 REMAINING_CSV = PROJECT_ROOT / "outputs" / "plausibleqa-remaining.csv"
 OFFSET_FILE = PROJECT_ROOT / "outputs" / "qa_offset.txt"
 BATCH_OUTPUT = Path("/tmp/qa_batch.json")
+VERIFIED_CSVS = [
+    PROJECT_ROOT / "outputs" / "plausibleqa-verified.csv",
+    PROJECT_ROOT / "outputs" / "plausibleqa-verified2.csv",
+]
 
 DEFAULT_BATCH_SIZE = 20
 
@@ -45,9 +57,32 @@ def get_offset():
     return 0
 
 
+def load_row_index():
+    """Byte offsets of remaining.csv rows (written by reconcile_remaining.py), or None if missing/stale."""
+    idx_path = Path(f"{REMAINING_CSV}.idx.npy")
+    if not idx_path.exists() or idx_path.stat().st_mtime < REMAINING_CSV.stat().st_mtime:
+        return None
+    import numpy as np
+
+    return np.load(idx_path, mmap_mode="r")
+
+
 def read_batch(offset: int, batch_size: int):
     """Read batch_size rows from remaining.csv starting at offset."""
     items = []
+    index = load_row_index()
+    if index is not None:
+        # seek straight to the row instead of scanning `offset` rows
+        if offset >= len(index):
+            return items
+        with open(REMAINING_CSV, "rb") as fb:
+            fb.seek(int(index[offset]))
+            lines = io.TextIOWrapper(fb, encoding="utf-8", newline="")
+            for row in csv.reader(lines):
+                if len(items) >= batch_size:
+                    break
+                items.append({"id": row[0], "question": row[1], "answer": row[2]})
+        return items
     with open(REMAINING_CSV, newline='', encoding='utf-8') as f:
         reader = csv.DictReader(f)
         for i, row in enumerate(reader):
@@ -63,46 +98,76 @@ def read_batch(offset: int, batch_size: int):
     return items
 
 
+def read_scheduled_batch(batch_size: int, n1: int, n2: int):
+    """Highest-priority unverified pairs from remaining.csv (see verify_scheduler.py)."""
+    from verify_scheduler import ThresholdScheduler, load_verified
+
+    counts, done, (p_pos, p_neg) = load_verified([str(p) for p in VERIFIED_CSVS])
+    sched = ThresholdScheduler(n1, n2, p_pos, p_neg)
+    for qid, c in counts.items():
+        sched.set_counts(qid, *c)
+    with open(REMAINING_CSV, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            if (row["id"].strip(), row["answer"].strip()) in done:
+                continue
+            sched.add(row["id"], {"id": row["id"], "question": row["question"], "answer": row["answer"]})
+    sched.start()
+    items = [item for _, item in sched.take(batch_size)]
+    return items, sched.summary()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Prepare next batch of QA pairs")
     parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
                         help=f"Number of pairs per batch (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument("--schedule", choices=["offset", "threshold"], default="offset",
+                        help="offset = next rows in file order; threshold = prioritize questions near N1/N2")
+    parser.add_argument("--n1", type=int, default=1, help="Target supported answers per question")
+    parser.add_argument("--n2", type=int, default=1, help="Target unsupported answers per question")
     args = parser.parse_args()
 
     # Get current offset
     offset = get_offset()
     
     # Read batch
-    items = read_batch(offset, args.batch_size)
+    schedule_summary = None
+    if args.schedule == "threshold":
+        items, schedule_summary = read_scheduled_batch(args.batch_size, args.n1, args.n2)
+    else:
+        items = read_batch(offset, args.batch_size)
     
+    if args.schedule == "threshold":
+        # not taken at the offset: save_results.py must not advance it
+        output = {"schedule": "threshold"}
+    else:
+        output = {"batch_number": offset // args.batch_size + 1, "offset": offset}
     if not items:
         # No more items to process
-        output = {
-            "batch_number": offset // args.batch_size + 1,
-            "offset": offset,
+        output.update({
             "count": 0,
             "items": [],
             "status": "COMPLETE",
             "message": "All pairs have been processed!"
-        }
+        })
     else:
-        output = {
-            "batch_number": offset // args.batch_size + 1,
-            "offset": offset,
+        output.update({
             "count": len(items),
             "items": items,
             "status": "OK"
-        }
+        })
     
     # Write output
     BATCH_OUTPUT.write_text(json.dumps(output, indent=2))
     
     # Print summary for agent
     print(f"=== BATCH PREPARED ===")
-    print(f"Batch number: {output['batch_number']}")
-    print(f"Offset: {offset}")
+    if "offset" in output:
+        print(f"Batch number: {output['batch_number']}")
+        print(f"Offset: {offset}")
     print(f"Items in batch: {len(items)}")
     print(f"Output: {BATCH_OUTPUT}")
+    if schedule_summary:
+        print(f"Schedule: {schedule_summary}")
     if not items:
         print(f"STATUS: COMPLETE - No more pairs to verify!")
     else:
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Prompt-level train/dev/test splits for the candidate table.
+
+Every candidate of a (dataset, prompt_id) lands in the same split, so no prompt leaks
+between train and evaluation. Splits are derived from a keyed BLAKE2b hash of
+(dataset, prompt_id): the same key always gives the same assignment, on any machine
+and in any process (Python's `hash()` is salted per process).
+
+Modes:
+- default: a prompt goes to the split whose cumulative fraction interval contains its
+  hash (as a uniform number in [0, 1)). Fully stable: adding or removing prompts never
+  moves another prompt.
+- `--stratify`: prompts are grouped into strata (dataset, n_pos bucket, n_neg bucket),
+  with buckets 0, 1, 2, 3-4, 5-8, 9-16, 17+ on the counts from
+  `nnd_plots.per_prompt_counts`; within a stratum prompts are ordered by hash and cut
+  at the target fractions, so every stratum is split in proportion. Deterministic for
+  a given table, but a prompt can move when its stratum's membership changes.
+
+The candidate table is read in record batches (only dataset / prompt_id / pos), in two
+passes: counts, then per-row split codes. Outputs:
+  <out>.npz          codes: int8 split index per candidate-table row (table order);
+                     <split>: np.packbits row mask per split; names; n_rows; key
+  <out>.prompts.csv  dataset, prompt_id, n_pos, n_neg, stratum, split
+
+Downstream stages filter positionally, without joins:
+  mask = load_split_mask("outputs/splits.npz", "train")   # bool per table row
+  df = df[mask]
+
+Usage:
+  python3 scripts/prompt_splits.py --candidates outputs/candidates.parquet \
+    --out outputs/splits --fractions 0.8,0.1,0.1 --stratify
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+from typing import Iterator, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+from nnd_plots import per_prompt_counts
+
+SPLIT_NAMES = ["train", "dev", "test"]
+DEFAULT_KEY = "v2g-prompt-splits-v1"
+BUCKET_EDGES = np.array([0, 1, 2, 3, 5, 9, 17])
+
+
+def prompt_hash(dataset: str, prompt_id: str, key: str = DEFAULT_KEY) -> int:
+    """Keyed 64-bit hash of a prompt."""
+    h = hashlib.blake2b(f"{dataset}\x1f{prompt_id}".encode("utf-8"), digest_size=8,
+                        key=key.encode("utf-8"))
+    return int.from_bytes(h.digest(), "big")
+
+
+def hash_unit(datasets: Sequence[str], prompt_ids: Sequence[str], key: str = DEFAULT_KEY) -> np.ndarray:
+    """Prompt hashes mapped to [0, 1)."""
+    h = np.fromiter((prompt_hash(d, p, key) for d, p in zip(datasets, prompt_ids)), dtype=np.uint64,
+                    count=len(datasets))
+    return (h >> np.uint64(11)).astype(np.float64) / float(1 << 53)
+
+
+def count_bucket(n: np.ndarray) -> np.ndarray:
+    return np.searchsorted(BUCKET_EDGES, np.asarray(n), side="right") - 1
+
+
+def iter_key_batches(path: str, batch_size: int = 1 << 18) -> Iterator[pd.DataFrame]:
+    """(dataset, prompt_id, pos) record batches of a .parquet/.csv candidate table."""
+    cols = ["dataset", "prompt_id", "pos"]
+    if path.endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=cols):
+            df = batch.to_pandas()
+            df["dataset"] = df["dataset"].astype(str)  # categorical when written by the nnd loaders
+            df["prompt_id"] = df["prompt_id"].astype(str)
+            yield df
+    else:
+        yield from pd.read_csv(path, usecols=cols, dtype={"prompt_id": str}, keep_default_na=False,
+                               chunksize=batch_size)
+
+
+def prompt_table(path: str, batch_size: int = 1 << 18) -> pd.DataFrame:
+    """per_prompt_counts over the whole table, accumulated batch by batch."""
+    parts = [per_prompt_counts(b) for b in iter_key_batches(path, batch_size)]
+    counts = pd.concat(parts, ignore_index=True)
+    counts = counts.groupby(["dataset", "prompt_id"], as_index=False, sort=False, observed=True)[["n_total", "n_pos", "n_neg"]].sum()
+    return counts
+
+
+def assign(prompts: pd.DataFrame, fractions: Sequence[float], key: str = DEFAULT_KEY,
+           stratify: bool = False) -> pd.DataFrame:
+    """Adds `stratum` and `split` (int index into SPLIT_NAMES) columns."""
+    out = prompts.copy()
+    u = hash_unit(out["dataset"].tolist(), out["prompt_id"].tolist(), key)
+    cum = np.cumsum(np.asarray(fractions, dtype=np.float64))
+    cum /= cum[-1]
+    out["stratum"] = (out["dataset"] + ":p" + count_bucket(out["n_pos"]).astype(str)
+                      + ":n" + count_bucket(out["n_neg"]).astype(str))
+    if not stratify:
+        out["split"] = np.minimum(np.searchsorted(cum, u, side="right"), len(cum) - 1).astype(np.int8)
+        return out
+    # within each stratum: rank by hash, cut at the target fractions
+    out["_u"] = u
+    rank = out.groupby("stratum")["_u"].rank(method="first").to_numpy() - 1
+    size = out.groupby("stratum")["_u"].transform("size").to_numpy()
+    pos = (rank + 0.5) / size
+    out["split"] = np.minimum(np.searchsorted(cum, pos, side="right"), len(cum) - 1).astype(np.int8)
+    return out.drop(columns="_u")
+
+
+def row_codes(path: str, prompts: pd.DataFrame, batch_size: int = 1 << 18) -> np.ndarray:
+    """Split code of every candidate-table row, in table order."""
+    index = pd.MultiIndex.from_frame(prompts[["dataset", "prompt_id"]])
+    split = prompts["split"].to_numpy(dtype=np.int8)
+    codes: List[np.ndarray] = []
+    for b in iter_key_batches(path, batch_size):
+        loc = index.get_indexer(pd.MultiIndex.from_frame(b[["dataset", "prompt_id"]]))
+        codes.append(split[loc])
+    return np.concatenate(codes) if codes else np.zeros(0, dtype=np.int8)
+
+
+def write_splits(out: str, codes: np.ndarray, names: Sequence[str], key: str) -> str:
+    path = out if out.endswith(".npz") else out + ".npz"
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    masks = {name: np.packbits(codes == i) for i, name in enumerate(names)}
+    np.savez(path, codes=codes, names=np.asarray(names), n_rows=np.int64(len(codes)), key=np.asarray(key), **masks)
+    return path
+
+
+def load_split_codes(path: str) -> np.ndarray:
+    return np.load(path)["codes"]
+
+
+def load_split_mask(path: str, split: str) -> np.ndarray:
+    """Boolean row mask of `split`, aligned with the candidate table the file was built from."""
+    with np.load(path) as z:
+        return np.unpackbits(z[split], count=int(z["n_rows"])).astype(bool)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", required=True, help="Candidate table (.parquet/.csv) from nnd_plots.py")
+    ap.add_argument("--out", required=True, help="Output prefix (writes <out>.npz and <out>.prompts.csv)")
+    ap.add_argument("--fractions", default="0.8,0.1,0.1", help="Split fractions, in --names order")
+    ap.add_argument("--names", default=",".join(SPLIT_NAMES))
+    ap.add_argument("--key", default=DEFAULT_KEY, help="Hash key; change it to draw a different split")
+    ap.add_argument("--stratify", action="store_true", help="Stratify by dataset x n_pos/n_neg buckets")
+    ap.add_argument("--batch-size", type=int, default=1 << 18)
+    args = ap.parse_args()
+
+    names = args.names.split(",")
+    fractions = [float(x) for x in args.fractions.split(",")]
+    if len(names) != len(fractions):
+        raise SystemExit("--names and --fractions must have the same length")
+
+    prompts = assign(prompt_table(args.candidates, args.batch_size), fractions, args.key, args.stratify)
+    codes = row_codes(args.candidates, prompts, args.batch_size)
+    path = write_splits(args.out, codes, names, args.key)
+    table = prompts.assign(split=[names[i] for i in prompts["split"]])
+    table[["dataset", "prompt_id", "n_pos", "n_neg", "stratum", "split"]].to_csv(
+        os.path.splitext(path)[0] + ".prompts.csv", index=False)
+
+    summary = table.groupby(["dataset", "split"], observed=True).agg(prompts=("prompt_id", "size"), rows=("n_total", "sum"))
+    print(summary.unstack("split", fill_value=0).to_string())
+    print(f"DONE: rows={len(codes)} prompts={len(prompts)} out={path}")
+
+
+if __name__ == "__main__":
+    main()
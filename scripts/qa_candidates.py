@@ -0,0 +1,194 @@
+"""Candidate-table adapters for QASC, ASQA and QuAC.
+
+Each loader returns the same (dataset, prompt_id, prompt, candidate, system, pos) frame
+as the NND loaders in `nnd_plots.py`, so `per_prompt_counts` / `filter_grid` apply as-is.
+Data is read from the materialized Arrow splits (`hf_local`) batch by batch with column
+projection and exploded with pyarrow.compute; no per-row python dicts are built.
+
+POS/NEG definitions:
+- QASC: one row per choice; POS iff choice label == `answerKey`. Unlabeled rows (test) are skipped.
+- ASQA: one row per `short_answers` entry across `qa_pairs`; all rows are POS (references).
+- QuAC: one row per distinct reference span of a turn (`answers.texts`); all rows are POS.
+
+ASQA and QuAC therefore contribute positives only (n_neg == 0 per prompt).
+
+Usage (standalone summary):
+  python3 scripts/qa_candidates.py --raw-dir datasets/raw
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from hf_local import iter_batches, local_splits
+
+COLUMNS = ["dataset", "prompt_id", "prompt", "candidate", "system", "pos"]
+
+
+def _offsets_within(list_arr) -> np.ndarray:
+    """Position of each flattened element inside its parent list."""
+    parents = pc.list_parent_indices(list_arr).to_numpy(zero_copy_only=False)
+    offsets = list_arr.offsets.to_numpy()
+    starts = offsets[:-1] - offsets[0]
+    return np.arange(len(parents)) - starts[parents]
+
+
+def _prefixed(prefix: str, idx: np.ndarray) -> pa.Array:
+    return pc.binary_join_element_wise(prefix, pc.cast(pa.array(idx), pa.string()), "")
+
+
+def _table(dataset: str, prompt_id, prompt, candidate, system, pos) -> pa.Table:
+    n = len(candidate)
+    return pa.table({
+        "dataset": pa.array(np.full(n, dataset, dtype=object), pa.string()),
+        "prompt_id": prompt_id,
+        "prompt": prompt,
+        "candidate": candidate,
+        "system": system,
+        "pos": pos,
+    })
+
+
+def _to_frame(tables: List[pa.Table]) -> pd.DataFrame:
+    if not tables:
+        return pd.DataFrame(columns=COLUMNS)
+    return pa.concat_tables(tables).to_pandas()
+
+
+def _qasc_batch(batch: pa.RecordBatch, dataset: str) -> pa.Table:
+    choices = batch.column("choices")
+    texts = pc.struct_field(choices, "text")
+    labels = pc.list_flatten(pc.struct_field(choices, "label"))
+    parents = pc.list_parent_indices(texts)
+    key = pc.take(pc.fill_null(batch.column("answerKey"), ""), parents)
+    t = _table(
+        dataset,
+        pc.take(batch.column("id"), parents),
+        pc.take(batch.column("question"), parents),
+        pc.list_flatten(texts),
+        labels,
+        pc.cast(pc.equal(labels, key), pa.int64()),
+    )
+    return t.filter(pc.not_equal(key, ""))
+
+
+def _asqa_batch(batch: pa.RecordBatch, dataset: str) -> pa.Table:
+    qa_pairs = batch.column("qa_pairs")
+    pairs = pc.list_flatten(qa_pairs)
+    pair_q = pc.list_parent_indices(qa_pairs)
+    short = pc.struct_field(pairs, "short_answers")
+    short_pair = pc.list_parent_indices(short)
+    q_idx = pc.take(pair_q, short_pair)
+    pair_idx = pc.take(pa.array(_offsets_within(qa_pairs)), short_pair)
+    cand = pc.list_flatten(short)
+    return _table(
+        dataset,
+        pc.take(batch.column("sample_id"), q_idx),
+        pc.take(batch.column("ambiguous_question"), q_idx),
+        cand,
+        _prefixed("qa_pair_", pair_idx.to_numpy()),
+        pa.array(np.ones(len(cand), dtype=np.int64)),
+    )
+
+
+def _quac_batch(batch: pa.RecordBatch, dataset: str) -> pa.Table:
+    questions = batch.column("questions")
+    turn_ids = pc.list_flatten(batch.column("turn_ids"))
+    turn_dlg = pc.list_parent_indices(questions)
+    header = pc.binary_join_element_wise(
+        "TITLE: ", batch.column("wikipedia_page_title"), "\nSECTION: ", batch.column("section_title"), "")
+    prompt = pc.binary_join_element_wise(
+        pc.take(header, turn_dlg), "\nQUESTION: ", pc.list_flatten(questions), "")
+
+    answers = batch.column("answers")
+    field = "texts" if answers.type.get_field_index("texts") >= 0 else "text"
+    per_turn = pc.list_flatten(pc.struct_field(answers, field))
+    if not (pa.types.is_list(per_turn.type) or pa.types.is_large_list(per_turn.type)):
+        # single span per turn
+        per_turn = pa.ListArray.from_arrays(
+            pa.array(np.arange(len(per_turn) + 1, dtype=np.int32)), per_turn)
+    ref_turn = pc.list_parent_indices(per_turn)
+    cand = pc.list_flatten(per_turn)
+    return _table(
+        dataset,
+        pc.take(turn_ids, ref_turn),
+        pc.take(prompt, ref_turn),
+        cand,
+        _prefixed("ref_", _offsets_within(per_turn)),
+        pa.array(np.ones(len(cand), dtype=np.int64)),
+    )
+
+
+# name -> (projected columns, batch adapter)
+ADAPTERS = {
+    "qasc": (["id", "question", "choices", "answerKey"], _qasc_batch),
+    "asqa": (["sample_id", "ambiguous_question", "qa_pairs"], _asqa_batch),
+    "quac": (["wikipedia_page_title", "section_title", "turn_ids", "questions", "answers"], _quac_batch),
+}
+
+
+def load_qa_dataset(name: str, raw_dir: Optional[str] = None, splits: Optional[Sequence[str]] = None,
+                    batch_size: int = 8192) -> pd.DataFrame:
+    """Candidate table for one of qasc/asqa/quac; dataset column is `qa_<name>_<split>`."""
+    columns, adapter = ADAPTERS[name]
+    tables: List[pa.Table] = []
+    for split in splits or local_splits(name, raw_dir):
+        dataset = f"qa_{name}_{split}"
+        for batch in iter_batches(name, split, raw_dir, columns=columns, batch_size=batch_size):
+            t = adapter(batch, dataset)
+            if t.num_rows:
+                tables.append(t)
+    df = _to_frame(tables)
+    if name == "quac":
+        # QuAC dev/test repeat the same span across annotators.
+        df = df.drop_duplicates(["dataset", "prompt_id", "candidate"], ignore_index=True)
+    return df
+
+
+def load_qasc(raw_dir: Optional[str] = None, splits: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    return load_qa_dataset("qasc", raw_dir, splits)
+
+
+def load_asqa(raw_dir: Optional[str] = None, splits: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    return load_qa_dataset("asqa", raw_dir, splits)
+
+
+def load_quac(raw_dir: Optional[str] = None, splits: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    return load_qa_dataset("quac", raw_dir, splits)
+
+
+def load_all(raw_dir: Optional[str] = None, names: Iterable[str] = ("qasc", "asqa", "quac")) -> List[pd.DataFrame]:
+    """Candidate tables for every materialized dataset in `names` (missing ones are skipped)."""
+    return [load_qa_dataset(n, raw_dir) for n in names if local_splits(n, raw_dir)]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--raw-dir", default="datasets/raw")
+    ap.add_argument("--out", default=None, help="Optional parquet/CSV path for the candidate table")
+    args = ap.parse_args()
+
+    dfs = load_all(args.raw_dir)
+    if not dfs:
+        raise SystemExit(f"No QASC/ASQA/QuAC splits found under {args.raw_dir}")
+    df = pd.concat(dfs, ignore_index=True)
+    summary = df.groupby("dataset").agg(
+        n_candidates=("candidate", "size"), n_prompts=("prompt_id", "nunique"), pos_share=("pos", "mean"))
+    print(summary.to_string())
+    if args.out:
+        os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+        if args.out.endswith(".parquet"):
+            df.to_parquet(args.out, index=False)
+        else:
+            df.to_csv(args.out, index=False)
+
+
+if __name__ == "__main__":
+    main()
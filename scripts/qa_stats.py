@@ -0,0 +1,224 @@
+"""Full-corpus distribution stats for QuAC / QASC / ASQA.
+
+Computes per-split integer histograms (answers per question, references per QuAC turn,
+short answers per ASQA `qa_pairs`, whitespace token lengths, ...) in one vectorized pass
+over Arrow record batches, optionally sharding the rows of a split across processes.
+Histograms are plain {value: count} dicts, so shard results merge by addition.
+
+Used by `quac_eda.py` and `qasc_asqa_eda.py` (section "Statistics (full corpus)"), and
+runnable on its own:
+  python3 scripts/qa_stats.py --dataset quac --raw-dir datasets/raw --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from hf_local import iter_batches, local_splits, open_table
+
+Hist = Dict[int, int]
+Stats = Dict[str, Hist]
+
+
+def _hist(values) -> Hist:
+    """Histogram of an integer Arrow/NumPy array (nulls dropped)."""
+    if isinstance(values, np.ndarray):
+        vals, counts = np.unique(values, return_counts=True)
+        return {int(v): int(c) for v, c in zip(vals, counts)}
+    vc = pc.value_counts(pc.drop_null(values))
+    return {int(v): int(c) for v, c in zip(vc.field("values").to_pylist(), vc.field("counts").to_pylist())}
+
+
+def _merge(into: Stats, other: Stats) -> Stats:
+    for metric, hist in other.items():
+        dst = into.setdefault(metric, {})
+        for v, c in hist.items():
+            dst[v] = dst.get(v, 0) + c
+    return into
+
+
+def _n_tokens(strings) -> pa.Array:
+    """Whitespace token counts for a string array."""
+    return pc.list_value_length(pc.utf8_split_whitespace(strings))
+
+
+def _flatten(arr):
+    return pc.list_flatten(arr)
+
+
+def _quac_reference_texts(answers) -> Tuple[pa.Array, pa.Array]:
+    """(references per turn, flat reference strings) for a QuAC `answers` column.
+
+    Vectorized counterpart of `quac_eda._answers_for_turn`: uses `texts` (else `text`),
+    where each turn entry is either a list of reference spans or a single span.
+    """
+    field = "texts" if answers.type.get_field_index("texts") >= 0 else "text"
+    per_turn = _flatten(pc.struct_field(answers, field))
+    if pa.types.is_list(per_turn.type) or pa.types.is_large_list(per_turn.type):
+        refs = pc.list_value_length(per_turn)
+        return pc.if_else(pc.is_null(refs), 0, refs), _flatten(per_turn)
+    present = pc.cast(pc.is_valid(per_turn), pa.int32())
+    return present, pc.drop_null(per_turn)
+
+
+def quac_batch_stats(batch: pa.RecordBatch) -> Stats:
+    refs_per_turn, refs = _quac_reference_texts(batch.column("answers"))
+    refs_np = refs_per_turn.to_numpy(zero_copy_only=False)
+    return {
+        "turns_per_dialogue": _hist(pc.list_value_length(batch.column("questions"))),
+        "references_per_turn": _hist(refs_np),
+        "multi_reference_turns": _hist((refs_np > 1).astype(np.int64)),
+        "question_tokens": _hist(_n_tokens(_flatten(batch.column("questions")))),
+        "reference_tokens": _hist(_n_tokens(refs)),
+        "context_tokens": _hist(_n_tokens(batch.column("context"))),
+    }
+
+
+def qasc_batch_stats(batch: pa.RecordBatch) -> Stats:
+    choices = pc.struct_field(batch.column("choices"), "text")
+    answer_key = pc.fill_null(batch.column("answerKey"), "")
+    return {
+        "choices_per_question": _hist(pc.list_value_length(choices)),
+        "has_answer_key": _hist(pc.cast(pc.not_equal(answer_key, ""), pa.int32())),
+        "question_tokens": _hist(_n_tokens(batch.column("question"))),
+        "choice_tokens": _hist(_n_tokens(_flatten(choices))),
+    }
+
+
+def asqa_batch_stats(batch: pa.RecordBatch) -> Stats:
+    qa_pairs = batch.column("qa_pairs")
+    pairs = _flatten(qa_pairs)
+    short = pc.struct_field(pairs, "short_answers")
+    short_per_pair = pc.fill_null(pc.list_value_length(short), 0).to_numpy(zero_copy_only=False)
+    parents = pc.list_parent_indices(qa_pairs).to_numpy(zero_copy_only=False)
+    short_per_q = np.bincount(parents, weights=short_per_pair, minlength=batch.num_rows).astype(np.int64)
+    annotations = batch.column("annotations")
+    return {
+        "qa_pairs_per_question": _hist(pc.list_value_length(qa_pairs)),
+        "short_answers_per_qa_pair": _hist(short_per_pair),
+        "short_answers_per_question": _hist(short_per_q),
+        "annotations_per_question": _hist(pc.list_value_length(annotations)),
+        "question_tokens": _hist(_n_tokens(batch.column("ambiguous_question"))),
+        "short_answer_tokens": _hist(_n_tokens(_flatten(short))),
+        "long_answer_tokens": _hist(_n_tokens(pc.struct_field(_flatten(annotations), "long_answer"))),
+    }
+
+
+# name -> (projected columns, per-batch stats function)
+STAT_SPECS: Dict[str, Tuple[List[str], Callable[[pa.RecordBatch], Stats]]] = {
+    "quac": (["questions", "answers", "context"], quac_batch_stats),
+    "qasc": (["question", "choices", "answerKey"], qasc_batch_stats),
+    "asqa": (["ambiguous_question", "qa_pairs", "annotations"], asqa_batch_stats),
+}
+
+
+def table_stats(name: str, table: pa.Table, batch_size: int = 4096) -> Stats:
+    """Single-process stats over an in-memory / memory-mapped table."""
+    columns, fn = STAT_SPECS[name]
+    out: Stats = {}
+    for batch in table.select(columns).to_batches(max_chunksize=batch_size):
+        _merge(out, fn(batch))
+    return out
+
+
+def _shard_stats(name: str, split: str, raw_dir: Optional[str], start: int, stop: int,
+                 batch_size: int) -> Stats:
+    columns, fn = STAT_SPECS[name]
+    out: Stats = {}
+    for batch in iter_batches(name, split, raw_dir, columns=columns, batch_size=batch_size,
+                              start=start, stop=stop):
+        _merge(out, fn(batch))
+    return out
+
+
+def split_stats(name: str, split: str, raw_dir: Optional[str] = None, workers: int = 1,
+                batch_size: int = 4096) -> Stats:
+    """Stats for one materialized split; rows are sharded into `workers` contiguous ranges."""
+    n = open_table(name, split, raw_dir, columns=STAT_SPECS[name][0]).num_rows
+    if workers <= 1 or n < 2 * batch_size:
+        return _shard_stats(name, split, raw_dir, 0, n, batch_size)
+    step = -(-n // workers)
+    out: Stats = {}
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        futs = [ex.submit(_shard_stats, name, split, raw_dir, lo, min(lo + step, n), batch_size)
+                for lo in range(0, n, step)]
+        for f in futs:
+            _merge(out, f.result())
+    return out
+
+
+def summarize(hist: Hist) -> Dict[str, float]:
+    """n / mean / quantiles from a histogram (nearest-rank quantiles)."""
+    if not hist:
+        return dict(n=0, mean=float("nan"), min=0, p50=0, p90=0, max=0)
+    vals = np.array(sorted(hist), dtype=np.int64)
+    counts = np.array([hist[v] for v in vals], dtype=np.int64)
+    cum = np.cumsum(counts)
+    n = int(cum[-1])
+
+    def q(p: float) -> int:
+        return int(vals[np.searchsorted(cum, max(1, int(np.ceil(p * n))))])
+
+    return dict(n=n, mean=float((vals * counts).sum() / n), min=int(vals[0]),
+                p50=q(0.5), p90=q(0.9), max=int(vals[-1]))
+
+
+def render_markdown(stats_by_split: Dict[str, Stats], max_levels: int = 12) -> List[str]:
+    """Markdown lines: one summary table per split, plus exact counts for small-range metrics."""
+    lines: List[str] = []
+    for split, stats in stats_by_split.items():
+        lines.append(f"#### {split}")
+        lines.append("")
+        lines.append("| metric | n | mean | min | p50 | p90 | max | distribution |")
+        lines.append("|---|---:|---:|---:|---:|---:|---:|---|")
+        for metric, hist in stats.items():
+            s = summarize(hist)
+            dist = ""
+            if 0 < len(hist) <= max_levels:
+                dist = ", ".join(f"{v}: {hist[v]:,}" for v in sorted(hist))
+            lines.append(
+                f"| {metric} | {s['n']:,} | {s['mean']:.2f} | {s['min']} | {s['p50']} | {s['p90']} | {s['max']} | {dist} |"
+            )
+        lines.append("")
+    return lines
+
+
+def dataset_stats(name: str, ds_dict, raw_dir: Optional[str] = None, workers: int = 1) -> Dict[str, Stats]:
+    """Stats for every split in `ds_dict` (as returned by `hf_local.load_splits`)."""
+    on_disk = set(local_splits(name, raw_dir))
+    out: Dict[str, Stats] = {}
+    for split, ds in ds_dict.items():
+        if split in on_disk:
+            out[split] = split_stats(name, split, raw_dir, workers=workers)
+        else:
+            # Hub fallback: a `datasets.Dataset`, whose Arrow table we scan in-process.
+            out[split] = table_stats(name, ds.data.table)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--dataset", required=True, choices=sorted(STAT_SPECS))
+    ap.add_argument("--raw-dir", default="datasets/raw")
+    ap.add_argument("--splits", default=None, help="Comma-separated splits (default: all on disk)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--batch-size", type=int, default=4096)
+    args = ap.parse_args()
+
+    splits: Sequence[str] = args.splits.split(",") if args.splits else local_splits(args.dataset, args.raw_dir)
+    if not splits:
+        raise SystemExit(f"No materialized splits for {args.dataset} under {args.raw_dir}")
+    stats = {s: split_stats(args.dataset, s, args.raw_dir, workers=args.workers, batch_size=args.batch_size)
+             for s in splits}
+    print("\n".join(render_markdown(stats)))
+
+
+if __name__ == "__main__":
+    main()
@@ -6,6 +6,9 @@ Writes a markdown report with:
 - notes on where "multiple answers" live
 - a few concrete examples (Q + answers)
 
+Data is read from `datasets/raw/{qasc,asqa}` (see `qasc_asqa_download.py`) via `hf_local`;
+the hub is only contacted for datasets that are not materialized yet.
+
 Run (recommended):
   cd Projects/v2g
   ~/.openclaw/workspace/bin/uv run --no-project \
@@ -21,18 +24,8 @@ import random
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
-
-def _import_hf_datasets():
-    # Avoid importing the local `datasets/` directory as a python module.
-    cwd = os.getcwd()
-    if "" in os.sys.path:
-        os.sys.path.remove("")
-    if cwd in os.sys.path:
-        os.sys.path.remove(cwd)
-
-    from datasets import load_dataset  # type: ignore
-
-    return load_dataset
+from hf_local import load_splits
+from qa_stats import dataset_stats, render_markdown
 
 
 def _md_escape(s: str) -> str:
@@ -112,15 +105,17 @@ def main() -> None:
         help="Output markdown path",
     )
     ap.add_argument("--examples", type=int, default=3, help="Examples per dataset")
+    ap.add_argument("--raw-dir", default="datasets/raw", help="Materialized datasets (see qasc_asqa_download.py)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for full-corpus stats")
+    ap.add_argument("--no-stats", action="store_true", help="Skip full-corpus statistics")
     args = ap.parse_args()
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    load_dataset = _import_hf_datasets()
-
-    qasc = load_dataset("allenai/qasc")
-    asqa = load_dataset("din0s/asqa")
+    # Local Arrow files when materialized; hub fallback otherwise.
+    qasc = load_splits("qasc", raw_dir=args.raw_dir)
+    asqa = load_splits("asqa", raw_dir=args.raw_dir)
 
     lines: List[str] = []
     lines.append("# QASC + ASQA dataset exploration")
@@ -144,6 +139,10 @@ def main() -> None:
     lines.append("- `choices.text` contains **8 candidate answer strings**")
     lines.append("- `answerKey` selects the correct one")
     lines.append("")
+    if not args.no_stats:
+        lines.append("### Statistics (full corpus)")
+        lines.append("")
+        lines.extend(render_markdown(dataset_stats("qasc", qasc, raw_dir=args.raw_dir, workers=args.workers)))
     lines.append("### Examples (sampled across splits)")
     qasc_examples = _sample_across_splits(qasc, args.examples, seed=1)
     for i, (split, ex) in enumerate(qasc_examples, start=1):
@@ -168,6 +167,10 @@ def main() -> None:
     lines.append("- `qa_pairs` is a list: each element has a disambiguated `question` and a list of short answers in `short_answers`")
     lines.append("- `annotations` contains one or more long-form answers that (ideally) cover all disambiguations")
     lines.append("")
+    if not args.no_stats:
+        lines.append("### Statistics (full corpus)")
+        lines.append("")
+        lines.extend(render_markdown(dataset_stats("asqa", asqa, raw_dir=args.raw_dir, workers=args.workers)))
     lines.append("### Examples (sampled across splits)")
     asqa_examples = _sample_across_splits(asqa, args.examples, seed=2)
     for i, (split, ex) in enumerate(asqa_examples, start=1):
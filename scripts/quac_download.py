@@ -14,21 +14,9 @@ from __future__ import annotations
 
 import argparse
 import json
-import os
 from pathlib import Path
 
-
-def _import_hf_datasets():
-    # Avoid importing the local `datasets/` directory as a python module.
-    cwd = os.getcwd()
-    if "" in os.sys.path:
-        os.sys.path.remove("")
-    if cwd in os.sys.path:
-        os.sys.path.remove(cwd)
-
-    from datasets import load_dataset  # type: ignore
-
-    return load_dataset
+from hf_local import import_hf_datasets
 
 
 def _write_json(path: Path, obj) -> None:
@@ -49,7 +37,7 @@ def main() -> None:
     formats = {s.strip() for s in args.formats.split(",") if s.strip()}
     out_dir = Path(args.out_dir)
 
-    load_dataset = _import_hf_datasets()
+    load_dataset = import_hf_datasets().load_dataset
 
     hf_id = "allenai/quac"
     print(f"==> Loading {hf_id}")
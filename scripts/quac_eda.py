@@ -3,6 +3,9 @@
 QuAC records are dialogues; each record contains lists for questions, answers, etc.
 The dataset supports multiple reference answers for dev/test in `answers`.
 
+Data is read from `datasets/raw/quac` (see `quac_download.py`) via `hf_local`, so once
+materialized only pyarrow is needed and no network access happens.
+
 Run (recommended):
   cd Projects/v2g
   ~/.openclaw/workspace/bin/uv run --no-project \
@@ -18,18 +21,8 @@ import random
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
-
-def _import_hf_datasets():
-    # Avoid importing the local `datasets/` directory as a python module.
-    cwd = os.getcwd()
-    if "" in os.sys.path:
-        os.sys.path.remove("")
-    if cwd in os.sys.path:
-        os.sys.path.remove(cwd)
-
-    from datasets import load_dataset  # type: ignore
-
-    return load_dataset
+from hf_local import load_splits
+from qa_stats import dataset_stats, render_markdown
 
 
 def _md_escape(s: str) -> str:
@@ -121,15 +114,17 @@ def main() -> None:
     )
     ap.add_argument("--examples", type=int, default=2, help="Dialogues per split")
     ap.add_argument("--turns", type=int, default=3, help="Turns to show per dialogue")
+    ap.add_argument("--raw-dir", default="datasets/raw", help="Materialized datasets (see quac_download.py)")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Processes for full-corpus stats")
+    ap.add_argument("--no-stats", action="store_true", help="Skip full-corpus statistics")
     args = ap.parse_args()
 
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
-    load_dataset = _import_hf_datasets()
-
-    # QuAC is script-based; pin datasets version when running (see module docstring).
-    quac = load_dataset("allenai/quac")
+    # Reads datasets/raw/quac when materialized; otherwise falls back to the hub
+    # (QuAC is script-based there; pin datasets version, see module docstring).
+    quac = load_splits("quac", raw_dir=args.raw_dir)
 
     lines: List[str] = []
     lines.append("# QuAC dataset exploration")
@@ -156,6 +151,13 @@ def main() -> None:
     lines.append("- In multi-reference splits, `answers.texts[turn]` can contain multiple reference spans (a list).")
     lines.append("")
 
+    if not args.no_stats:
+        lines.append("### Statistics (full corpus)")
+        lines.append("")
+        lines.append("Token counts are whitespace tokens; `references_per_turn` follows `_answers_for_turn`.")
+        lines.append("")
+        lines.extend(render_markdown(dataset_stats("quac", quac, raw_dir=args.raw_dir, workers=args.workers)))
+
     # Examples across splits
     lines.append("### Examples (sampled across splits)")
 
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Regenerate outputs/plausibleqa-remaining.csv from the PlausibleQA source and all verified outputs.
+
+The remaining set is a hash anti-join: every (id, answer) pair of the source whose
+key (`key_for`, sha1 of id + TAB + answer) is not in any verified CSV. Verified files
+are streamed in chunks into a key set (their `key` column when present, else
+key_for(id, answer)); the source is then streamed once and unmatched pairs are written.
+
+Source formats (see plausibleqa.iter_source_pairs): pair CSV (id, question, answer),
+grouped CSV (id, question, Answers separated by ';'), or PlausibleQA JSON / JSONL.
+
+Outputs:
+  <out>                 id, question, answer (source order)
+  <out>.idx.npy         int64 byte offset of every data row, so prepare_batch.py can
+                        seek straight to its offset; len(idx) is the row count
+  <out>.meta.json       source / verified / remaining counts
+and resets outputs/qa_offset.txt to 0, since offsets into the old file are stale.
+
+Usage:
+  python3 scripts/reconcile_remaining.py --source datasets/plausibleqa/plausibleqa.json \
+    --verified outputs/plausibleqa-verified.csv outputs/plausibleqa-verified2.csv 'outputs/results*.csv'
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from plausibleqa import iter_source_pairs
+from verify_qa_with_wikipedia import key_for
+
+PROJECT_ROOT = Path(__file__).parent.parent
+REMAINING_CSV = PROJECT_ROOT / "outputs" / "plausibleqa-remaining.csv"
+OFFSET_FILE = PROJECT_ROOT / "outputs" / "qa_offset.txt"
+DEFAULT_VERIFIED = [
+    str(PROJECT_ROOT / "outputs" / "plausibleqa-verified.csv"),
+    str(PROJECT_ROOT / "outputs" / "plausibleqa-verified2.csv"),
+]
+
+
+def index_path(remaining_csv) -> str:
+    return f"{remaining_csv}.idx.npy"
+
+
+def verified_keys(paths, redo_errors: bool = False, chunksize: int = 100_000) -> set:
+    """Keys of every verified pair; with redo_errors, rows whose evidence is an ERROR are not counted."""
+    csv.field_size_limit(sys.maxsize)
+    keys = set()
+    for path in paths:
+        cols = pd.read_csv(path, nrows=0).columns
+        use = [c for c in ("key", "id", "answer", "evidence_text") if c in cols]
+        for chunk in pd.read_csv(path, usecols=use, dtype=str, keep_default_na=False, chunksize=chunksize):
+            if redo_errors and "evidence_text" in chunk:
+                chunk = chunk[~chunk["evidence_text"].str.startswith("ERROR:")]
+            if "key" in chunk:
+                keys.update(chunk["key"].str.strip())
+            else:
+                keys.update(key_for(i.strip(), a.strip()) for i, a in zip(chunk["id"], chunk["answer"]))
+    keys.discard("")
+    return keys
+
+
+def write_remaining(source: str, done: set, out: str) -> dict:
+    """Stream the anti-join to `out` and its row-offset index; returns counts."""
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    tmp = f"{out}.tmp"
+    offsets = []
+    n_source = n_verified = 0
+    seen = set()
+    with open(tmp, "wb") as f:
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        writer.writerow(["id", "question", "answer"])
+        pos = f.write(buf.getvalue().encode("utf-8"))
+        for qid, question, answer in iter_source_pairs(source):
+            k = key_for(qid, answer)
+            if k in seen:
+                continue
+            seen.add(k)
+            n_source += 1
+            if k in done:
+                n_verified += 1
+                continue
+            buf.seek(0)
+            buf.truncate()
+            writer.writerow([qid, question, answer])
+            offsets.append(pos)
+            pos += f.write(buf.getvalue().encode("utf-8"))
+    os.replace(tmp, out)
+    np.save(index_path(out), np.asarray(offsets, dtype=np.int64))
+    return {"source_pairs": n_source, "verified_pairs": n_verified, "remaining_pairs": len(offsets)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--source", required=True, help="PlausibleQA source (.json/.jsonl/.csv)")
+    ap.add_argument("--verified", nargs="*", default=DEFAULT_VERIFIED, help="Verified CSVs or glob patterns")
+    ap.add_argument("--out", default=str(REMAINING_CSV))
+    ap.add_argument("--redo-errors", action="store_true", help="Do not count ERROR rows as verified")
+    ap.add_argument("--keep-offset", action="store_true", help="Do not reset outputs/qa_offset.txt")
+    args = ap.parse_args()
+
+    t0 = time.time()
+    paths = sorted({p for pat in args.verified for p in (glob.glob(pat) or [pat]) if os.path.exists(p)})
+    done = verified_keys(paths, args.redo_errors)
+    counts = write_remaining(args.source, done, args.out)
+    meta = {"source": args.source, "verified_files": paths, "verified_keys": len(done), **counts,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    with open(f"{args.out}.meta.json", "w") as f:
+        json.dump(meta, f, indent=2)
+    if not args.keep_offset and os.path.abspath(args.out) == os.path.abspath(REMAINING_CSV):
+        OFFSET_FILE.write_text("0")
+
+    print(f"verified_files={len(paths)} verified_keys={len(done)} source_pairs={counts['source_pairs']} "
+          f"already_verified={counts['verified_pairs']} remaining={counts['remaining_pairs']} "
+          f"elapsed={time.time() - t0:.1f}s out={args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Columnar builder for candidate tables.
+
+The loaders used to append one dict per candidate and build the frame at the end,
+which costs a dict (several hundred bytes) per row plus a slow row-wise DataFrame
+construction. `CandidateRows` keeps one growable buffer per column instead:
+
+- dataset / system: interned into small int32 codes (`array("i")`) and emitted as
+  pandas Categoricals built from those codes
+- pos: `array("b")` (int8)
+- prompt_id / prompt / candidate: plain lists, so repeated prompts (one per
+  candidate) are stored once and only referenced
+
+`frame()` wraps the typed buffers with `np.frombuffer` without copying them.
+"""
+
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["dataset", "prompt_id", "prompt", "candidate", "system", "pos"]
+
+
+class Interner:
+    """String -> dense int code, in first-seen order."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+
+    def __call__(self, s: str) -> int:
+        code = self.codes.get(s)
+        if code is None:
+            code = self.codes[s] = len(self.values)
+            self.values.append(s)
+        return code
+
+
+class CandidateRows:
+    def __init__(self):
+        self._datasets = Interner()
+        self._systems = Interner()
+        self.dataset = array("i")
+        self.system = array("i")
+        self.pos = array("b")
+        self.prompt_id: List[str] = []
+        self.prompt: List[str] = []
+        self.candidate: List[str] = []
+
+    def __len__(self) -> int:
+        return len(self.pos)
+
+    def add(self, dataset: str, prompt_id: str, prompt: str, candidate: str, system: str, pos: int) -> None:
+        self.dataset.append(self._datasets(dataset))
+        self.system.append(self._systems(system))
+        self.pos.append(1 if pos else 0)
+        self.prompt_id.append(prompt_id)
+        self.prompt.append(prompt)
+        self.candidate.append(candidate)
+
+    @staticmethod
+    def _categorical(codes: array, interner: Interner) -> pd.Categorical:
+        return pd.Categorical.from_codes(np.frombuffer(codes, dtype=np.int32) if len(codes) else
+                                         np.zeros(0, np.int32), categories=interner.values)
+
+    def frame(self) -> pd.DataFrame:
+        """The candidate table (COLUMNS order); dataset / system are categorical, pos is int8."""
+        pos = np.frombuffer(self.pos, dtype=np.int8) if len(self.pos) else np.zeros(0, np.int8)
+        return pd.DataFrame({
+            "dataset": self._categorical(self.dataset, self._datasets),
+            "prompt_id": self.prompt_id,
+            "prompt": self.prompt,
+            "candidate": self.candidate,
+            "system": self._categorical(self.system, self._systems),
+            "pos": pos,
+        }, columns=COLUMNS, copy=False)
@@ -0,0 +1,201 @@
+"""In-process metrics for long verification runs.
+
+Records:
+- latency histograms per operation (`with metrics.timer("wiki_search"): ...`)
+- errors by (operation, exception type); raised inside a timer they are counted automatically
+- LLM input/output tokens per model, with an optional cost estimate
+- progress: items done, rolling throughput over the last `window` seconds, and ETA
+  when the total is known
+
+`maybe_write()` periodically exports a JSON snapshot and a Prometheus text-format
+file (for node_exporter's textfile collector or just `cat`). Files are replaced
+atomically, so readers never see a partial snapshot.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.n = 0
+        self.max = 0.0
+
+    def observe(self, v: float) -> None:
+        i = 0
+        while i < len(self.buckets) and v > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.total += v
+        self.n += 1
+        self.max = max(self.max, v)
+
+    def quantile(self, q: float) -> float:
+        """Upper bucket bound containing quantile q, capped at the max seen."""
+        if not self.n:
+            return 0.0
+        target, acc = q * self.n, 0
+        for i, c in enumerate(self.counts):
+            acc += c
+            if acc >= target:
+                return min(self.buckets[i], self.max) if i < len(self.buckets) else self.max
+        return self.max
+
+    def to_dict(self) -> dict:
+        return {"count": self.n, "sum": self.total, "mean": self.total / self.n if self.n else 0.0,
+                "p50": self.quantile(0.5), "p90": self.quantile(0.9), "p99": self.quantile(0.99), "max": self.max,
+                "buckets": {str(b): c for b, c in zip(list(self.buckets) + ["+Inf"], self.counts)}}
+
+
+class RunMetrics:
+    def __init__(self, total: Optional[int] = None, window: float = 300.0, json_path: Optional[str] = None,
+                 prom_path: Optional[str] = None, every: float = 30.0, usd_per_mtok_in: float = 0.0,
+                 usd_per_mtok_out: float = 0.0, prefix: str = "verify"):
+        self.t0 = time.time()
+        self.total = total
+        self.window = window
+        self.json_path = json_path
+        self.prom_path = prom_path
+        self.every = every
+        self.price_in = usd_per_mtok_in
+        self.price_out = usd_per_mtok_out
+        self.prefix = prefix
+        self.latency: Dict[str, Histogram] = defaultdict(Histogram)
+        self.errors: Dict[tuple, int] = defaultdict(int)
+        self.tokens: Dict[str, Dict[str, int]] = defaultdict(lambda: {"input": 0, "output": 0, "calls": 0})
+        self.counters: Dict[str, int] = defaultdict(int)
+        self.done = 0
+        self._recent = deque()  # (time, done)
+        self._last_write = 0.0
+
+    @contextmanager
+    def timer(self, op: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.error(op, e)
+            raise
+        finally:
+            self.latency[op].observe(time.perf_counter() - t0)
+
+    def observe(self, op: str, seconds: float) -> None:
+        self.latency[op].observe(seconds)
+
+    def error(self, op: str, exc: BaseException) -> None:
+        self.errors[(op, type(exc).__name__)] += 1
+
+    def add_tokens(self, model: str, input_tokens: int, output_tokens: int) -> None:
+        t = self.tokens[model]
+        t["input"] += input_tokens
+        t["output"] += output_tokens
+        t["calls"] += 1
+
+    def incr(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+
+    def tick(self, n: int = 1) -> None:
+        self.done += n
+        now = time.time()
+        self._recent.append((now, self.done))
+        while len(self._recent) > 2 and self._recent[0][0] < now - self.window:
+            self._recent.popleft()
+
+    def throughput(self) -> float:
+        """Items per second over the rolling window (whole run until the window fills)."""
+        if len(self._recent) < 2:
+            elapsed = time.time() - self.t0
+            return self.done / elapsed if elapsed > 0 else 0.0
+        (t_a, n_a), (t_b, n_b) = self._recent[0], self._recent[-1]
+        return (n_b - n_a) / (t_b - t_a) if t_b > t_a else 0.0
+
+    def snapshot(self) -> dict:
+        rate = self.throughput()
+        remaining = None if self.total is None else max(self.total - self.done, 0)
+        in_tok = sum(t["input"] for t in self.tokens.values())
+        out_tok = sum(t["output"] for t in self.tokens.values())
+        return {
+            "time": time.time(),
+            "elapsed_s": time.time() - self.t0,
+            "done": self.done,
+            "total": self.total,
+            "throughput_per_s": rate,
+            "eta_s": (remaining / rate) if remaining is not None and rate > 0 else None,
+            "latency_s": {op: h.to_dict() for op, h in sorted(self.latency.items())},
+            "errors": [{"op": op, "type": t, "count": c} for (op, t), c in sorted(self.errors.items())],
+            "tokens": {m: dict(t) for m, t in sorted(self.tokens.items())},
+            "tokens_total": {"input": in_tok, "output": out_tok},
+            "cost_usd": (in_tok * self.price_in + out_tok * self.price_out) / 1e6,
+            "counters": dict(sorted(self.counters.items())),
+        }
+
+    def prometheus(self) -> str:
+        p = self.prefix
+        snap = self.snapshot()
+        lines = [
+            f"# TYPE {p}_items_done counter",
+            f"{p}_items_done {snap['done']}",
+            f"# TYPE {p}_throughput_per_second gauge",
+            f"{p}_throughput_per_second {snap['throughput_per_s']:.6f}",
+        ]
+        if snap["eta_s"] is not None:
+            lines += [f"# TYPE {p}_eta_seconds gauge", f"{p}_eta_seconds {snap['eta_s']:.1f}"]
+        lines.append(f"# TYPE {p}_latency_seconds histogram")
+        for op, h in sorted(self.latency.items()):
+            acc = 0
+            for b, c in zip(list(h.buckets) + ["+Inf"], h.counts):
+                acc += c
+                lines.append(f'{p}_latency_seconds_bucket{{op="{op}",le="{b}"}} {acc}')
+            lines.append(f'{p}_latency_seconds_sum{{op="{op}"}} {h.total:.6f}')
+            lines.append(f'{p}_latency_seconds_count{{op="{op}"}} {h.n}')
+        lines.append(f"# TYPE {p}_errors_total counter")
+        for (op, t), c in sorted(self.errors.items()):
+            lines.append(f'{p}_errors_total{{op="{op}",type="{t}"}} {c}')
+        lines.append(f"# TYPE {p}_llm_tokens_total counter")
+        for m, t in sorted(self.tokens.items()):
+            lines.append(f'{p}_llm_tokens_total{{model="{m}",kind="input"}} {t["input"]}')
+            lines.append(f'{p}_llm_tokens_total{{model="{m}",kind="output"}} {t["output"]}')
+        lines.append(f"# TYPE {p}_events_total counter")
+        for name, c in sorted(self.counters.items()):
+            lines.append(f'{p}_events_total{{event="{name}"}} {c}')
+        lines.append(f"# TYPE {p}_cost_usd gauge")
+        lines.append(f"{p}_cost_usd {snap['cost_usd']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self) -> str:
+        snap = self.snapshot()
+        eta = f"{snap['eta_s'] / 60:.1f}min" if snap["eta_s"] is not None else "?"
+        lat = " ".join(f"{op}_p50={h['p50']:.2f}s" for op, h in snap["latency_s"].items())
+        return (f"done={snap['done']}/{snap['total'] or '?'} rate={snap['throughput_per_s']:.2f}/s eta={eta} "
+                f"tok_in={snap['tokens_total']['input']} tok_out={snap['tokens_total']['output']} "
+                f"errors={sum(self.errors.values())} {lat}")
+
+    def write(self) -> None:
+        if self.json_path:
+            _atomic_write(self.json_path, json.dumps(self.snapshot(), indent=2))
+        if self.prom_path:
+            _atomic_write(self.prom_path, self.prometheus())
+        self._last_write = time.time()
+
+    def maybe_write(self) -> None:
+        if (self.json_path or self.prom_path) and time.time() - self._last_write >= self.every:
+            self.write()
+
+
+def _atomic_write(path: str, text: str) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.tmp{os.getpid()}"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
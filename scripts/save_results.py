@@ -8,7 +8,8 @@ Reads:
 
 Writes:
   - outputs/plausibleqa-verified2.csv (appends results)
-  - outputs/qa_offset.txt (updates offset)
+  - outputs/qa_offset.txt (updates offset; unchanged for --schedule threshold batches,
+    which are not read at the offset)
 
 Usage:
   python scripts/save_results.py
@@ -38,6 +39,7 @@ from pathlib import Path
 PROJECT_ROOT = Path(__file__).parent.parent
 VERIFIED2_CSV = PROJECT_ROOT / "outputs" / "plausibleqa-verified2.csv"
 OFFSET_FILE = PROJECT_ROOT / "outputs" / "qa_offset.txt"
+REMAINING_CSV = PROJECT_ROOT / "outputs" / "plausibleqa-remaining.csv"
 BATCH_INPUT = Path("/tmp/qa_batch.json")
 RESULTS_INPUT = Path("/tmp/qa_results.json")
 
@@ -47,6 +49,31 @@ def load_json(path):
     return json.loads(path.read_text())
 
 
+def count_remaining_rows() -> int:
+    """Data rows in remaining.csv (from reconcile_remaining.py's index when it is current)."""
+    idx_path = Path(f"{REMAINING_CSV}.idx.npy")
+    if not REMAINING_CSV.exists():
+        return 0
+    if idx_path.exists() and idx_path.stat().st_mtime >= REMAINING_CSV.stat().st_mtime:
+        import numpy as np
+
+        return len(np.load(idx_path, mmap_mode="r"))
+    with open(REMAINING_CSV, newline='', encoding='utf-8') as f:
+        return sum(1 for _ in csv.reader(f)) - 1
+
+
+def count_unverified_pairs() -> int:
+    """Pairs in remaining.csv not yet in the verified CSVs (what threshold batches draw from)."""
+    from prepare_batch import VERIFIED_CSVS
+    from verify_scheduler import load_verified
+
+    if not REMAINING_CSV.exists():
+        return 0
+    _, done, _ = load_verified([str(p) for p in VERIFIED_CSVS])
+    with open(REMAINING_CSV, newline='', encoding='utf-8') as f:
+        return sum((row["id"].strip(), row["answer"].strip()) not in done for row in csv.DictReader(f))
+
+
 def save_offset(offset: int):
     """Save offset to file."""
     OFFSET_FILE.write_text(str(offset))
@@ -81,6 +108,7 @@ def main():
     # Load batch info
     batch = load_json(BATCH_INPUT)
     batch_count = batch.get('count', 0)
+    scheduled = batch.get('schedule') == 'threshold'
     old_offset = batch.get('offset', 0)
     
     # Load results
@@ -94,9 +122,10 @@ def main():
     # Append to CSV
     append_results(results)
     
-    # Update offset
-    new_offset = old_offset + batch_count
-    save_offset(new_offset)
+    # Update offset (threshold batches were not read at the offset)
+    if not scheduled:
+        new_offset = old_offset + batch_count
+        save_offset(new_offset)
     
     # Count total verified
     if VERIFIED2_CSV.exists():
@@ -108,9 +137,15 @@ def main():
     # Print summary
     print(f"=== RESULTS SAVED ===")
     print(f"Results saved: {len(results)}")
-    print(f"Offset updated: {old_offset} → {new_offset}")
+    if scheduled:
+        print("Offset unchanged (threshold schedule)")
+    else:
+        print(f"Offset updated: {old_offset} → {new_offset}")
     print(f"Total in verified2.csv: {total_lines}")
-    print(f"Remaining: {5569 - new_offset}")
+    if scheduled:
+        print(f"Remaining (unverified): {count_unverified_pairs()}")
+    else:
+        print(f"Remaining: {max(count_remaining_rows() - new_offset, 0)}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""Generator-side scores: log p(candidate | prompt) for every row of the candidate table.
+
+Candidates cluster by prompt (dozens per MQM segment / SummEval article), so per prompt:
+- the prompt (BOS + prompt + separator) is run once and its KV cache kept
+- candidates are tokenized, sorted by length and packed into buckets
+  (`--batch-size` rows, at most `--batch-tokens` padded tokens)
+- each bucket runs only the candidate tokens on top of a copy of the prompt cache
+  (right padding, so positions stay aligned with the prompt)
+- the first candidate token is scored from the prompt's last logits
+- with `--token-cache`, token ids come from the shared on-disk cache (`token_cache.py`)
+
+Output columns: dataset, prompt_id, cand_idx, gen_logprob (sum over candidate tokens),
+gen_n_tokens, gen_mean_logprob. Rows are keyed by (dataset, prompt_id, cand_idx);
+see `scoring.py`.
+
+Usage:
+  python3 scripts/nnd_plots.py --nnd-data ... --out figures/nnd --write-candidates outputs/candidates.parquet
+  python3 scripts/score_generator.py --candidates outputs/candidates.parquet \
+    --model Qwen/Qwen2.5-0.5B --out outputs/gen_scores.parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import sys
+import time
+from typing import List, Sequence
+
+import numpy as np
+import pandas as pd
+import torch
+
+from scoring import (
+    BACKENDS,
+    KEY_COLUMNS,
+    clip_prompt,
+    encode,
+    length_buckets,
+    load_model,
+    open_token_cache,
+    prefix_ids,
+    prompt_groups,
+    read_candidates,
+    set_threads,
+    write_table,
+)
+
+
+def _expand_cache(past, n: int):
+    """Copy of a single-row KV cache repeated `n` times along the batch axis."""
+    if hasattr(past, "batch_repeat_interleave"):
+        c = copy.deepcopy(past)
+        c.batch_repeat_interleave(n)
+        return c
+    # legacy tuple-of-tuples cache
+    return tuple(tuple(t.expand(n, *t.shape[1:]).contiguous() for t in layer) for layer in past)
+
+
+@torch.no_grad()
+def score_prompt(model, prompt_ids: Sequence[int], cand_ids: List[List[int]], batch_size: int,
+                 batch_tokens: int, pad_id: int) -> np.ndarray:
+    """Summed log-probs of each candidate continuation given one shared prompt."""
+    device = model.device
+    out = np.zeros(len(cand_ids), dtype=np.float64)
+    if not any(cand_ids):
+        return out
+
+    prompt = torch.tensor([list(prompt_ids)], dtype=torch.long, device=device)
+    res = model(input_ids=prompt, use_cache=True)
+    past = res.past_key_values
+    first_lp = torch.log_softmax(res.logits[0, -1].float(), dim=-1)
+    p_len = prompt.shape[1]
+
+    lengths = [len(c) for c in cand_ids]
+    for bucket in length_buckets(lengths, batch_size, batch_tokens):
+        bucket = [i for i in bucket if lengths[i] > 0]
+        if not bucket:
+            continue
+        n = len(bucket)
+        longest = max(lengths[i] for i in bucket)
+        ids = torch.full((n, longest), pad_id, dtype=torch.long, device=device)
+        mask = torch.zeros((n, longest), dtype=torch.long, device=device)
+        for r, i in enumerate(bucket):
+            ids[r, : lengths[i]] = torch.tensor(cand_ids[i], dtype=torch.long)
+            mask[r, : lengths[i]] = 1
+
+        token_lp = torch.zeros((n, longest), dtype=torch.float32, device=device)
+        token_lp[:, 0] = first_lp[ids[:, 0]]
+        if longest > 1:
+            attn = torch.cat([torch.ones((n, p_len), dtype=torch.long, device=device), mask], dim=1)
+            res = model(input_ids=ids[:, :-1], attention_mask=attn[:, :-1],
+                        past_key_values=_expand_cache(past, n), use_cache=True)
+            lp = torch.log_softmax(res.logits.float(), dim=-1)
+            token_lp[:, 1:] = lp.gather(-1, ids[:, 1:].unsqueeze(-1)).squeeze(-1)
+        sums = (token_lp * mask).sum(dim=1).cpu().numpy()
+        out[bucket] = sums
+    return out
+
+
+def score_table(df: pd.DataFrame, tok, model, sep: str = "\n", batch_size: int = 16,
+                batch_tokens: int = 4096, max_prompt_tokens: int = 1536,
+                max_candidate_tokens: int = 512, log_every: int = 200, token_cache=None) -> pd.DataFrame:
+    """Score every row of a candidate table (see `scoring.read_candidates`)."""
+    logprob = np.zeros(len(df), dtype=np.float64)
+    n_tok = np.zeros(len(df), dtype=np.int32)
+    pad_id = tok.pad_token_id if tok.pad_token_id is not None else 0
+    bos = prefix_ids(tok)
+    prompts = df["prompt"].to_numpy()
+    cands = df["candidate"].to_numpy()
+    sep_ids = encode(tok, [sep])[0] if sep else []
+    if token_cache is not None:
+        token_cache.populate(pd.unique(prompts))
+        token_cache.populate(pd.unique(cands))
+
+    t0 = time.time()
+    for g, (_, rows) in enumerate(prompt_groups(df), start=1):
+        p_ids = bos + clip_prompt(encode(tok, [prompts[rows[0]]], token_cache)[0], max_prompt_tokens) + sep_ids
+        c_ids = [c[:max_candidate_tokens] for c in encode(tok, [cands[i] for i in rows], token_cache)]
+        logprob[rows] = score_prompt(model, p_ids, c_ids, batch_size, batch_tokens, pad_id)
+        n_tok[rows] = [len(c) for c in c_ids]
+        if log_every and g % log_every == 0:
+            print(f"prompts={g} rows={int((n_tok > 0).sum())} elapsed={time.time() - t0:.1f}s", file=sys.stderr)
+
+    out = df[KEY_COLUMNS].copy()
+    out["gen_logprob"] = logprob
+    out["gen_n_tokens"] = n_tok
+    out["gen_mean_logprob"] = np.where(n_tok > 0, logprob / np.maximum(n_tok, 1), 0.0)
+    return out
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", required=True, help="Candidate table (.parquet/.csv) from nnd_plots.py")
+    ap.add_argument("--model", required=True, help="HF model id or local path")
+    ap.add_argument("--out", required=True, help="Output .parquet/.csv")
+    ap.add_argument("--datasets", default=None, help="Comma-separated dataset filter")
+    ap.add_argument("--sep", default="\n", help="Separator between prompt and candidate")
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--batch-tokens", type=int, default=4096, help="Max padded candidate tokens per batch")
+    ap.add_argument("--max-prompt-tokens", type=int, default=1536,
+                    help="Prompts keep their first N tokens (as in score_validator.py)")
+    ap.add_argument("--max-candidate-tokens", type=int, default=512)
+    ap.add_argument("--device", default="cpu")
+    ap.add_argument("--dtype", default="float32")
+    ap.add_argument("--backend", default="torch", choices=BACKENDS, help="int8 = dynamic int8 quantization (CPU)")
+    ap.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = default)")
+    ap.add_argument("--interop-threads", type=int, default=0, help="torch inter-op threads (0 = default)")
+    ap.add_argument("--token-cache", default=None, help="Shared tokenization cache dir (see token_cache.py)")
+    ap.add_argument("--tokenize-workers", type=int, default=1, help="Processes for filling the token cache")
+    args = ap.parse_args()
+
+    set_threads(args.threads, args.interop_threads)
+    df = read_candidates(args.candidates)
+    if args.datasets:
+        df = df[df["dataset"].isin(args.datasets.split(","))].reset_index(drop=True)
+    tok, model = load_model(args.model, device=args.device, dtype=args.dtype, backend=args.backend)
+
+    t0 = time.time()
+    scores = score_table(df, tok, model, sep=args.sep, batch_size=args.batch_size,
+                         batch_tokens=args.batch_tokens, max_prompt_tokens=args.max_prompt_tokens,
+                         max_candidate_tokens=args.max_candidate_tokens,
+                         token_cache=open_token_cache(args.token_cache, tok, args.tokenize_workers))
+    write_table(scores, args.out)
+    dt = time.time() - t0
+    print(f"DONE: rows={len(scores)} prompts={scores.groupby(['dataset', 'prompt_id'], observed=True).ngroups} "
+          f"elapsed={dt:.1f}s rows_per_s={len(scores) / max(dt, 1e-9):.1f} out={args.out}")
+
+
+if __name__ == "__main__":
+    main()
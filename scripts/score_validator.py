@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""Validator-side scores: Yes/No log-odds of V(z, y) for every row of the candidate table.
+
+For each row the validator prompt is rendered from a per-dataset template, e.g.
+  Question: {prompt}
+  Proposed answer: {candidate}
+  Is the proposed answer correct? Answer Yes or No.
+  Answer:
+and the score is logit(" Yes") - logit(" No") at the last position, which equals
+log p(Yes) - log p(No) without computing the full-vocabulary softmax: only the final
+hidden state is projected onto the two target rows of the LM head.
+
+Speed-ups:
+- templates are split into literal fragments that are tokenized once per dataset;
+  prompts are tokenized once per prompt_id; only candidates are tokenized per row
+- with `--token-cache`, prompt/candidate ids come from the shared on-disk cache
+  (`token_cache.py`), so texts tokenized by another stage are not tokenized again
+- rows are sorted by length and packed into padded batches (see `scoring.length_buckets`)
+- progress is checkpointed every `--checkpoint-every` rows (table order) under
+  `<out>.partial/`, so an interrupted run resumes where it stopped
+
+Output columns: dataset, prompt_id, cand_idx, val_logit_yes, val_logit_no, val_logodds,
+val_n_tokens, in candidate-table order (row-aligned with score_generator.py output).
+
+Usage:
+  python3 scripts/score_validator.py --candidates outputs/candidates.parquet \
+    --model Qwen/Qwen2.5-0.5B-Instruct --out outputs/val_scores.parquet
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+import torch
+
+from scoring import (
+    BACKENDS,
+    KEY_COLUMNS,
+    clip_prompt,
+    encode,
+    length_buckets,
+    load_model,
+    open_token_cache,
+    prefix_ids,
+    read_candidates,
+    read_table,
+    set_threads,
+    write_table,
+)
+
+# dataset-name prefix -> template with {prompt} and {candidate}
+TEMPLATES = {
+    "mt_": (
+        "Source sentence: {prompt}\nTranslation: {candidate}\n"
+        "Is this translation free of errors? Answer Yes or No.\nAnswer:"
+    ),
+    "qgen_": (
+        "{prompt}\nGenerated question: {candidate}\n"
+        "Is this a good question for the answer span and context? Answer Yes or No.\nAnswer:"
+    ),
+    "summ_": (
+        "Article: {prompt}\nSummary: {candidate}\n"
+        "Is this summary accurate and well written? Answer Yes or No.\nAnswer:"
+    ),
+    "qa_": (
+        "Question: {prompt}\nProposed answer: {candidate}\n"
+        "Is the proposed answer correct? Answer Yes or No.\nAnswer:"
+    ),
+}
+DEFAULT_TEMPLATE = TEMPLATES["qa_"]
+# The space before {candidate} is encoded with the candidate, not the fragment before it:
+# BPE vocabularies carry it on the word (" Paris"), so a lone " " token would be out of
+# distribution.
+CANDIDATE_PREFIX = " "
+
+
+def template_for(dataset: str) -> str:
+    for prefix, tpl in TEMPLATES.items():
+        if dataset.startswith(prefix):
+            return tpl
+    return DEFAULT_TEMPLATE
+
+
+def split_template(tpl: str) -> Tuple[str, str, str]:
+    """(before {prompt}, between {prompt} and {candidate} minus CANDIDATE_PREFIX, after {candidate})."""
+    head, rest = tpl.split("{prompt}", 1)
+    mid, tail = rest.split("{candidate}", 1)
+    if mid.endswith(CANDIDATE_PREFIX):
+        mid = mid[: -len(CANDIDATE_PREFIX)]
+    return head, mid, tail
+
+
+class TemplateCache:
+    """Token ids of template fragments per dataset and of prompts per prompt_id."""
+
+    def __init__(self, tok, max_prompt_tokens: int, token_cache=None):
+        self.tok = tok
+        self.token_cache = token_cache
+        self.bos = prefix_ids(tok)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.fragments: Dict[str, Tuple[List[int], List[int], List[int]]] = {}
+        self.prompts: Dict[Tuple[str, str], List[int]] = {}
+
+    def fragment_ids(self, dataset: str):
+        frag = self.fragments.get(dataset)
+        if frag is None:
+            head, mid, tail = encode(self.tok, split_template(template_for(dataset)))
+            frag = self.fragments[dataset] = (self.bos + head, mid, tail)
+        return frag
+
+    def prompt_ids(self, dataset: str, prompt_id: str, prompt: str) -> List[int]:
+        key = (dataset, prompt_id)
+        ids = self.prompts.get(key)
+        if ids is None:
+            ids = clip_prompt(encode(self.tok, [prompt], self.token_cache)[0], self.max_prompt_tokens)
+            self.prompts[key] = ids
+        return ids
+
+
+def target_id(tok, text: str) -> int:
+    ids = tok(text, add_special_tokens=False)["input_ids"]
+    if not ids:
+        raise ValueError(f"target {text!r} tokenizes to nothing")
+    return ids[0]
+
+
+class TwoTokenHead:
+    """Final hidden state -> logits of the two target tokens only."""
+
+    def __init__(self, model, yes_id: int, no_id: int):
+        self.base = model.base_model
+        head = model.get_output_embeddings()
+        self.weight = head.weight[[yes_id, no_id]].detach().float()
+        bias = getattr(head, "bias", None)
+        self.bias = bias[[yes_id, no_id]].detach().float() if bias is not None else None
+
+    @torch.no_grad()
+    def __call__(self, ids: torch.Tensor, mask: torch.Tensor) -> torch.Tensor:
+        hidden = self.base(input_ids=ids, attention_mask=mask).last_hidden_state
+        last = mask.sum(dim=1) - 1
+        h = hidden[torch.arange(ids.shape[0], device=ids.device), last].float()
+        logits = h @ self.weight.T
+        return logits + self.bias if self.bias is not None else logits
+
+
+def score_rows(df: pd.DataFrame, cache: TemplateCache, head: TwoTokenHead, pad_id: int, device: str,
+               batch_size: int, batch_tokens: int, max_candidate_tokens: int) -> pd.DataFrame:
+    """Score a slice of the candidate table; returns score columns in the slice's order."""
+    datasets = df["dataset"].to_numpy()
+    pids = df["prompt_id"].to_numpy()
+    prompts = df["prompt"].to_numpy()
+    cand_ids = encode(cache.tok, [CANDIDATE_PREFIX + c for c in df["candidate"].tolist()], cache.token_cache)
+
+    seqs: List[List[int]] = []
+    for i, c in enumerate(cand_ids):
+        head_ids, mid, tail = cache.fragment_ids(datasets[i])
+        p = cache.prompt_ids(datasets[i], pids[i], prompts[i])
+        seqs.append(head_ids + p + mid + c[:max_candidate_tokens] + tail)
+
+    logits = np.zeros((len(seqs), 2), dtype=np.float32)
+    lengths = [len(s) for s in seqs]
+    for bucket in length_buckets(lengths, batch_size, batch_tokens):
+        longest = max(lengths[i] for i in bucket)
+        ids = torch.full((len(bucket), longest), pad_id, dtype=torch.long)
+        mask = torch.zeros((len(bucket), longest), dtype=torch.long)
+        for r, i in enumerate(bucket):
+            ids[r, : lengths[i]] = torch.tensor(seqs[i], dtype=torch.long)
+            mask[r, : lengths[i]] = 1
+        logits[bucket] = head(ids.to(device), mask.to(device)).cpu().numpy()
+
+    out = df[KEY_COLUMNS].copy()
+    out["val_logit_yes"] = logits[:, 0]
+    out["val_logit_no"] = logits[:, 1]
+    out["val_logodds"] = logits[:, 0] - logits[:, 1]
+    out["val_n_tokens"] = np.asarray(lengths, dtype=np.int32)
+    return out
+
+
+def _run_fingerprint(args, n_rows: int) -> str:
+    st = os.stat(args.candidates)
+    payload = {
+        "candidates": os.path.abspath(args.candidates),
+        "candidates_size": st.st_size,  # a regenerated file at the same path must not resume old parts
+        "candidates_mtime_ns": st.st_mtime_ns,
+        "datasets": args.datasets,
+        "n_rows": n_rows,
+        "chunk": args.checkpoint_every,
+        "model": args.model,
+        "backend": args.backend,
+        "yes": args.yes,
+        "no": args.no,
+        "templates": TEMPLATES,
+        "candidate_prefix": CANDIDATE_PREFIX,
+        "max_prompt_tokens": args.max_prompt_tokens,
+        "max_candidate_tokens": args.max_candidate_tokens,
+    }
+    return hashlib.sha1(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+def _part_path(partial_dir: str, chunk: int, out: str, prefix: str = "part") -> str:
+    ext = ".parquet" if out.endswith(".parquet") else ".csv"
+    return os.path.join(partial_dir, f"{prefix}-{chunk:06d}{ext}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--candidates", required=True, help="Candidate table (.parquet/.csv) from nnd_plots.py")
+    ap.add_argument("--model", required=True, help="HF model id or local path")
+    ap.add_argument("--out", required=True, help="Output .parquet/.csv")
+    ap.add_argument("--datasets", default=None, help="Comma-separated dataset filter")
+    ap.add_argument("--yes", default=" Yes", help="Positive target text (first token is used)")
+    ap.add_argument("--no", default=" No", help="Negative target text (first token is used)")
+    ap.add_argument("--batch-size", type=int, default=16)
+    ap.add_argument("--batch-tokens", type=int, default=8192, help="Max padded tokens per batch")
+    ap.add_argument("--max-prompt-tokens", type=int, default=1536, help="Prompts keep their first N tokens")
+    ap.add_argument("--max-candidate-tokens", type=int, default=512)
+    ap.add_argument("--checkpoint-every", type=int, default=2048, help="Rows per checkpointed chunk")
+    ap.add_argument("--device", default="cpu")
+    ap.add_argument("--dtype", default="float32")
+    ap.add_argument("--backend", default="torch", choices=BACKENDS, help="int8 = dynamic int8 quantization (CPU)")
+    ap.add_argument("--threads", type=int, default=0, help="torch intra-op threads (0 = default)")
+    ap.add_argument("--interop-threads", type=int, default=0, help="torch inter-op threads (0 = default)")
+    ap.add_argument("--token-cache", default=None, help="Shared tokenization cache dir (see token_cache.py)")
+    ap.add_argument("--tokenize-workers", type=int, default=1, help="Processes for filling the token cache")
+    args = ap.parse_args()
+
+    set_threads(args.threads, args.interop_threads)
+    df = read_candidates(args.candidates)
+    if args.datasets:
+        df = df[df["dataset"].isin(args.datasets.split(","))].reset_index(drop=True)
+
+    partial_dir = args.out + ".partial"
+    os.makedirs(partial_dir, exist_ok=True)
+    fp_path = os.path.join(partial_dir, "run.json")
+    fingerprint = _run_fingerprint(args, len(df))
+    if os.path.exists(fp_path) and json.load(open(fp_path)).get("fingerprint") != fingerprint:
+        raise SystemExit(f"{partial_dir} belongs to a different run; remove it or change --out")
+    with open(fp_path, "w") as f:
+        json.dump({"fingerprint": fingerprint}, f)
+
+    tok, model = load_model(args.model, device=args.device, dtype=args.dtype, backend=args.backend)
+    head = TwoTokenHead(model, target_id(tok, args.yes), target_id(tok, args.no))
+    token_cache = open_token_cache(args.token_cache, tok, args.tokenize_workers)
+    if token_cache is not None:
+        token_cache.populate(pd.unique(df["prompt"]))
+    cache = TemplateCache(tok, args.max_prompt_tokens, token_cache)
+    pad_id = tok.pad_token_id if tok.pad_token_id is not None else 0
+
+    step = args.checkpoint_every
+    n_chunks = -(-len(df) // step)
+    t0 = time.time()
+    done_rows = 0
+    for chunk in range(n_chunks):
+        part = _part_path(partial_dir, chunk, args.out)
+        if os.path.exists(part):
+            continue
+        sub = df.iloc[chunk * step: (chunk + 1) * step]
+        scores = score_rows(sub, cache, head, pad_id, args.device, args.batch_size, args.batch_tokens,
+                            args.max_candidate_tokens)
+        tmp = _part_path(partial_dir, chunk, args.out, prefix="tmp")
+        write_table(scores, tmp)
+        os.replace(tmp, part)
+        done_rows += len(sub)
+        dt = time.time() - t0
+        print(f"chunk={chunk + 1}/{n_chunks} rows_this_run={done_rows} rows_per_s={done_rows / max(dt, 1e-9):.1f}",
+              file=sys.stderr)
+
+    parts = [read_table(_part_path(partial_dir, c, args.out)) for c in range(n_chunks)]
+    scores = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=KEY_COLUMNS)
+    scores["prompt_id"] = scores["prompt_id"].astype(str)
+    write_table(scores, args.out)
+    shutil.rmtree(partial_dir)
+    print(f"DONE: rows={len(scores)} scored_this_run={done_rows} elapsed={time.time() - t0:.1f}s out={args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+"""Shared helpers for the generator / validator scoring stages.
+
+The scoring scripts read the candidate table written by
+  nnd_plots.py --write-candidates candidates.parquet
+and write score files keyed by (dataset, prompt_id, cand_idx), where `cand_idx` is the
+position of a row among the candidates of its (dataset, prompt_id), in table order.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Iterator, List, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ["dataset", "prompt_id", "cand_idx"]
+
+
+def read_table(path: str, columns: Sequence[str] = None) -> pd.DataFrame:
+    if path.endswith(".parquet"):
+        return pd.read_parquet(path, columns=list(columns) if columns else None)
+    return pd.read_csv(path, usecols=list(columns) if columns else None, keep_default_na=False,
+                       dtype={"prompt_id": str})
+
+
+def write_table(df: pd.DataFrame, path: str) -> None:
+    """Write a frame as parquet (``.parquet``) or CSV (anything else)."""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if path.endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def read_candidates(path: str) -> pd.DataFrame:
+    """Candidate table with string prompt/candidate columns and a `cand_idx` column."""
+    df = read_table(path)
+    df["prompt_id"] = df["prompt_id"].astype(str)
+    for col in ("prompt", "candidate"):
+        df[col] = df[col].fillna("").astype(str)
+    df["cand_idx"] = df.groupby(["dataset", "prompt_id"], sort=False, observed=True).cumcount().astype(np.int32)
+    return df
+
+
+def prompt_groups(df: pd.DataFrame) -> Iterator[Tuple[Tuple[str, str], np.ndarray]]:
+    """((dataset, prompt_id), row positions) per prompt, in first-appearance order."""
+    for key, rows in df.groupby(["dataset", "prompt_id"], sort=False, observed=True).indices.items():
+        yield key, np.asarray(rows)
+
+
+def length_buckets(lengths: Sequence[int], max_batch: int, max_tokens: int) -> List[np.ndarray]:
+    """Group indices into batches of similar length.
+
+    Indices are sorted by length; a batch is closed when it reaches `max_batch` rows or
+    when its padded size (rows * longest) would exceed `max_tokens`.
+    """
+    order = np.argsort(np.asarray(lengths), kind="stable")
+    batches: List[np.ndarray] = []
+    cur: List[int] = []
+    longest = 0
+    for i in order:
+        n = max(int(lengths[i]), 1)
+        if cur and (len(cur) >= max_batch or (len(cur) + 1) * max(longest, n) > max_tokens):
+            batches.append(np.asarray(cur))
+            cur, longest = [], 0
+        cur.append(int(i))
+        longest = max(longest, n)
+    if cur:
+        batches.append(np.asarray(cur))
+    return batches
+
+
+def set_threads(threads: int = 0, interop_threads: int = 0) -> None:
+    import torch
+
+    if threads:
+        torch.set_num_threads(threads)
+    if interop_threads:
+        torch.set_num_interop_threads(interop_threads)
+
+
+BACKENDS = ["torch", "int8"]
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of the transformer body's nn.Linear layers (CPU only).
+
+    The LM head stays in float so the generator log-softmax and the validator's
+    two-row projection see unquantized output weights. GPT-2 style `Conv1D`
+    projections are not nn.Linear and are left as-is.
+    """
+    import torch
+    from torch.ao.quantization import quantize_dynamic
+
+    quantize_dynamic(model.base_model, {torch.nn.Linear}, dtype=torch.qint8, inplace=True)
+    return model
+
+
+def load_model(name: str, device: str = "cpu", dtype: str = "float32", backend: str = "torch"):
+    """(tokenizer, model) for a local path or hub id, in eval mode.
+
+    backend: "torch" (as loaded) or "int8" (dynamic int8 quantization, CPU float32 only).
+    """
+    import torch
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}; expected one of {BACKENDS}")
+    if backend == "int8" and (device != "cpu" or dtype != "float32"):
+        raise ValueError("int8 backend requires --device cpu --dtype float32")
+
+    tok = AutoTokenizer.from_pretrained(name)
+    model = AutoModelForCausalLM.from_pretrained(name, dtype=getattr(torch, dtype))
+    model.to(device)
+    model.eval()
+    if backend == "int8":
+        quantize_int8(model)
+    return tok, model
+
+
+def encode(tok, texts: Sequence[str], cache=None) -> List[List[int]]:
+    """Token ids without special tokens (served from a `token_cache.TokenCache` when given)."""
+    if not len(texts):
+        return []
+    if cache is not None:
+        return [ids.tolist() for ids in cache.encode_many(texts)]
+    return tok(list(texts), add_special_tokens=False)["input_ids"]
+
+
+def open_token_cache(root: str, tok, workers: int = 1):
+    """`TokenCache` under `root`, or None when no cache directory is configured."""
+    if not root:
+        return None
+    from token_cache import TokenCache
+
+    return TokenCache(root, tok, workers=workers)
+
+
+def clip_prompt(ids: Sequence[int], max_tokens: int) -> List[int]:
+    """The first `max_tokens` prompt ids; generator and validator clip prompts the same way.
+
+    Prompts are source documents (articles, MT sources, quiz contexts), so the start is kept.
+    """
+    return list(ids[:max_tokens])
+
+
+def prefix_ids(tok) -> List[int]:
+    """Tokens prepended to every sequence (BOS when the tokenizer has one, else EOS)."""
+    tid = tok.bos_token_id if tok.bos_token_id is not None else tok.eos_token_id
+    return [tid] if tid is not None else []
+
+
+def merge_scores(df: pd.DataFrame, scores: pd.DataFrame) -> pd.DataFrame:
+    """Attach score columns to the candidate table on KEY_COLUMNS (row order of `df`)."""
+    return df.merge(scores, on=KEY_COLUMNS, how="left", validate="one_to_one")
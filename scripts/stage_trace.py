@@ -0,0 +1,315 @@
+"""Lightweight stage tracing shared by the research scripts.
+
+    from stage_trace import span, traced
+
+    @traced()                      # span named after the function; rows = len(result)
+    def load_mqm(path): ...
+
+    with span("wiki_search") as sp:
+        title = wiki_search(query, session)
+        sp.rows = 1
+
+Each span records wall time, CPU time (process), RSS delta and an optional row count.
+Tracing is off until `configure()` (or `from_args()` for scripts using
+`add_arguments()`, i.e. `--profile`); disabled spans cost one function call.
+
+`finish()` writes a Chrome trace-event JSON (open in chrome://tracing or
+https://ui.perfetto.dev) and prints a per-stage summary table. Spans named in
+`--profile-cprofile` also run under cProfile, accumulated per stage into
+`<trace>.<stage>.prof` (pstats / snakeviz); spans named in `--profile-sample` are
+stack-sampled from a background thread into `<trace>.<stage>.collapsed`, the format
+of `py-spy record --format raw` (flamegraph.pl / speedscope).
+"""
+
+from __future__ import annotations
+
+import cProfile
+import functools
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+try:
+    import psutil
+except Exception:  # pragma: no cover
+    psutil = None
+
+_PAGE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def rss_bytes() -> Optional[int]:
+    """Current resident set size, or None when it cannot be read."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE
+    except Exception:
+        pass
+    if psutil is not None:
+        return psutil.Process().memory_info().rss
+    return None
+
+
+class _NullSpan:
+    rows = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullSpan()
+
+
+class _Sampler:
+    """Background thread sampling the Python stack of every thread inside a sampled span."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.active: Dict[int, List[str]] = {}  # thread id -> stack of sampled stage names
+        self.stacks: Dict[str, Counter] = defaultdict(Counter)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def push(self, stage: str) -> None:
+        with self._lock:
+            self.active.setdefault(threading.get_ident(), []).append(stage)
+
+    def pop(self) -> None:
+        with self._lock:
+            stages = self.active.get(threading.get_ident())
+            if stages:
+                stages.pop()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            with self._lock:
+                active = {tid: st[-1] for tid, st in self.active.items() if st}
+            if not active:
+                continue
+            frames = sys._current_frames()
+            for tid, stage in active.items():
+                frame = frames.get(tid)
+                parts = []
+                while frame is not None:
+                    code = frame.f_code
+                    parts.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                    frame = frame.f_back
+                if parts:
+                    self.stacks[stage][";".join(reversed(parts))] += 1
+
+    def close(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+class Span:
+    __slots__ = ("tracer", "name", "args", "rows", "_t0", "_c0", "_rss0", "_prof", "_sampled")
+
+    def __init__(self, tracer: "Tracer", name: str, rows: Optional[int], args: dict):
+        self.tracer = tracer
+        self.name = name
+        self.rows = rows
+        self.args = args
+        self._prof = None
+        self._sampled = False
+
+    def __enter__(self):
+        t = self.tracer
+        self._prof = t.profiler(self.name)
+        if t.sampler is not None and (self.name in t.sample or "all" in t.sample):
+            t.sampler.push(self.name)
+            self._sampled = True
+        self._rss0 = rss_bytes()
+        self._c0 = time.process_time()
+        self._t0 = time.perf_counter()
+        if self._prof is not None:
+            self._prof.enable()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        t = self.tracer
+        if self._prof is not None:
+            self._prof.disable()
+            t.profiling = False
+        if self._sampled:
+            t.sampler.pop()
+        t1 = time.perf_counter()
+        cpu = time.process_time() - self._c0
+        rss1 = rss_bytes()
+        rss_delta = rss1 - self._rss0 if rss1 is not None and self._rss0 is not None else None
+        t.record(self.name, self._t0, t1 - self._t0, cpu, rss_delta, self.rows,
+                 dict(self.args, error=exc_type.__name__) if exc_type else self.args)
+        return False
+
+
+class Tracer:
+    def __init__(self):
+        self.enabled = False
+        self.path: Optional[str] = None
+        self.cprofile: set = set()
+        self.sample: set = set()
+        self.sample_interval = 0.005
+        self.max_events = 1_000_000
+        self.events: List[dict] = []
+        self.totals: Dict[str, dict] = defaultdict(lambda: {"count": 0, "wall": 0.0, "cpu": 0.0, "rss": 0,
+                                                            "rows": 0})
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.profiling = False
+        self.sampler: Optional[_Sampler] = None
+        self.t_origin = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def configure(self, path: Optional[str], cprofile=(), sample=(), sample_interval: float = 0.005,
+                  max_events: int = 1_000_000) -> "Tracer":
+        self.enabled = True
+        self.path = path
+        self.cprofile = set(cprofile)
+        self.sample = set(sample)
+        self.sample_interval = sample_interval
+        self.max_events = max_events
+        if self.sample and self.sampler is None:
+            self.sampler = _Sampler(sample_interval)
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return self
+
+    def profiler(self, name: str) -> Optional[cProfile.Profile]:
+        """Accumulating cProfile for a stage, unless one is already running (they cannot nest)."""
+        if self.profiling or not (name in self.cprofile or "all" in self.cprofile):
+            return None
+        self.profiling = True
+        return self.profiles.setdefault(name, cProfile.Profile())
+
+    def span(self, name: str, rows: Optional[int] = None, **args):
+        if not self.enabled:
+            return _NULL
+        return Span(self, name, rows, args)
+
+    def record(self, name, start, wall, cpu, rss_delta, rows, args) -> None:
+        with self._lock:
+            tot = self.totals[name]
+            tot["count"] += 1
+            tot["wall"] += wall
+            tot["cpu"] += cpu
+            tot["rss"] = max(tot["rss"], rss_delta or 0)
+            tot["rows"] += rows or 0
+            if len(self.events) < self.max_events:
+                ev_args = {"cpu_ms": round(cpu * 1000, 3)}
+                if rss_delta is not None:
+                    ev_args["rss_delta_mb"] = round(rss_delta / 2**20, 3)
+                if rows is not None:
+                    ev_args["rows"] = int(rows)
+                ev_args.update({k: v if isinstance(v, (int, float, bool)) else str(v) for k, v in args.items()})
+                self.events.append({"name": name, "cat": "stage", "ph": "X", "pid": os.getpid(),
+                                    "tid": threading.get_ident(), "ts": round((start - self.t_origin) * 1e6, 1),
+                                    "dur": round(wall * 1e6, 1), "args": ev_args})
+
+    def artifact(self, name: str, ext: str) -> str:
+        base = self.path or "trace.json"
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in name)
+        return f"{os.path.splitext(base)[0]}.{safe}.{ext}"
+
+    def summary(self) -> str:
+        rows = sorted(self.totals.items(), key=lambda kv: -kv[1]["wall"])
+        width = max([len("stage")] + [len(k) for k, _ in rows])
+        lines = [f"{'stage':<{width}} {'calls':>7} {'wall_s':>9} {'cpu_s':>9} {'max_rss_mb':>10} {'rows':>10} {'rows/s':>10}"]
+        for name, t in rows:
+            rate = t["rows"] / t["wall"] if t["rows"] and t["wall"] > 0 else 0.0
+            lines.append(f"{name:<{width}} {t['count']:>7} {t['wall']:>9.3f} {t['cpu']:>9.3f} "
+                         f"{t['rss'] / 2**20:>10.1f} {t['rows']:>10} {rate:>10.0f}")
+        return "\n".join(lines)
+
+    def write(self) -> None:
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump({"traceEvents": self.events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_events": sum(t["count"] for t in self.totals.values()) - len(self.events)}}, f)
+        os.replace(tmp, self.path)
+        for name, prof in self.profiles.items():
+            prof.dump_stats(self.artifact(name, "prof"))
+        if self.sampler is not None:
+            for name, stacks in self.sampler.stacks.items():
+                with open(self.artifact(name, "collapsed"), "w") as f:
+                    for stack, n in stacks.most_common():
+                        f.write(f"{stack} {n}\n")
+
+    def finish(self, file=sys.stderr) -> None:
+        if not self.enabled:
+            return
+        if self.sampler is not None:
+            self.sampler.close()
+        self.write()
+        print(self.summary(), file=file)
+        if self.path:
+            print(f"trace: {self.path}", file=file)
+
+
+TRACER = Tracer()
+
+
+def span(name: str, rows: Optional[int] = None, **args):
+    """Context manager timing one stage on the shared tracer (no-op while tracing is off)."""
+    return TRACER.span(name, rows, **args)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator: run the function inside a span; rows = len(result) when it has one."""
+
+    def wrap(fn):
+        stage = name or fn.__name__
+
+        @functools.wraps(fn)
+        def inner(*a, **kw):
+            if not TRACER.enabled:
+                return fn(*a, **kw)
+            with TRACER.span(stage) as sp:
+                out = fn(*a, **kw)
+                try:
+                    sp.rows = len(out)
+                except TypeError:
+                    pass
+                return out
+
+        return inner
+
+    return wrap
+
+
+def configure(path: Optional[str], **kw) -> Tracer:
+    return TRACER.configure(path, **kw)
+
+
+def finish(file=sys.stderr) -> None:
+    TRACER.finish(file)
+
+
+def add_arguments(ap, default_path: str = "outputs/profile/trace.json") -> None:
+    ap.add_argument("--profile", nargs="?", const=default_path, default=None, metavar="TRACE_JSON",
+                    help=f"Trace stages: Chrome trace JSON (default {default_path}) + summary table on stderr")
+    ap.add_argument("--profile-cprofile", default="", help="Comma-separated stage names (or 'all') to run under cProfile")
+    ap.add_argument("--profile-sample", default="",
+                    help="Comma-separated stage names (or 'all') to stack-sample into collapsed-stack files")
+    ap.add_argument("--profile-sample-ms", type=float, default=5.0, help="Stack sampling interval")
+    ap.set_defaults(profile_default=default_path)
+
+
+def from_args(args) -> Tracer:
+    """Enable tracing when any --profile* flag was given."""
+    cprofile = [s for s in args.profile_cprofile.split(",") if s]
+    sample = [s for s in args.profile_sample.split(",") if s]
+    if args.profile is None and (cprofile or sample):
+        args.profile = args.profile_default
+    if args.profile is not None:
+        TRACER.configure(args.profile, cprofile=cprofile, sample=sample,
+                         sample_interval=args.profile_sample_ms / 1000)
+    return TRACER
@@ -0,0 +1,169 @@
+"""Persistent tokenization cache shared by the scoring and training-export stages.
+
+Long prompts (CNN/DM articles, SummEval documents, QuizDesign contexts) recur across
+generator scoring, validator scoring and pair export; this cache tokenizes each unique
+text once per tokenizer and stores the ids on disk as a ragged array:
+
+  <root>/<tokenizer fingerprint>/
+    keys.bin     sha1(text) digests, 20 bytes per entry
+    ends.bin     int64 end offset per entry (entry i = tokens[ends[i-1]:ends[i]])
+    tokens.bin   flat int32 token ids, memory-mapped for reads
+
+The fingerprint hashes the tokenizer's serialized vocab/merges/normalizer and special
+tokens, so a different tokenizer never reads stale ids. Ids are encoded with
+`add_special_tokens=False`. Appends take an exclusive `flock`, so concurrent stages can
+share one cache directory; an entry counts once its key is written, and bytes left by an
+append that died earlier are truncated before the next one.
+
+Example:
+  cache = TokenCache("outputs/token_cache", tok, workers=8)
+  cache.populate(df["prompt"].unique())
+  ids = cache.encode_many(["some text"])[0]   # np.int32 array
+"""
+
+from __future__ import annotations
+
+import fcntl
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Sequence
+
+import numpy as np
+
+_DIGEST = 20
+
+# Worker-global tokenizer for process-pool encoding.
+_TOK = None
+
+
+def tokenizer_fingerprint(tok) -> str:
+    h = hashlib.sha1()
+    h.update(type(tok).__name__.encode("utf-8"))
+    backend = getattr(tok, "backend_tokenizer", None)
+    if backend is not None:
+        h.update(backend.to_str().encode("utf-8"))
+    else:
+        h.update(json.dumps(sorted(tok.get_vocab().items())).encode("utf-8"))
+    h.update(json.dumps(tok.special_tokens_map, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+
+def _digest(text: str) -> bytes:
+    return hashlib.sha1(text.encode("utf-8")).digest()
+
+
+def _init_worker(tok) -> None:
+    global _TOK
+    _TOK = tok
+
+
+def _encode_chunk(texts: List[str]) -> List[List[int]]:
+    return _TOK(texts, add_special_tokens=False)["input_ids"]
+
+
+class TokenCache:
+    def __init__(self, root: str, tok, workers: int = 1, chunk_size: int = 1024):
+        self.tok = tok
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.dir = os.path.join(root, tokenizer_fingerprint(tok))
+        os.makedirs(self.dir, exist_ok=True)
+        self._keys_path = os.path.join(self.dir, "keys.bin")
+        self._ends_path = os.path.join(self.dir, "ends.bin")
+        self._tokens_path = os.path.join(self.dir, "tokens.bin")
+        self._lock_path = os.path.join(self.dir, "lock")
+        self.index: Dict[bytes, int] = {}
+        self.ends = np.zeros(0, dtype=np.int64)
+        self.tokens = np.zeros(0, dtype=np.int32)
+        self._refresh()
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def _refresh(self) -> None:
+        """Pick up entries appended since the last read (by this or another process)."""
+        if not os.path.exists(self._ends_path):
+            return
+        ends = np.fromfile(self._ends_path, dtype=np.int64)
+        n = min(len(ends), os.path.getsize(self._keys_path) // _DIGEST if os.path.exists(self._keys_path) else 0)
+        ends = ends[:n]
+        if n > len(self.index):
+            with open(self._keys_path, "rb") as f:
+                f.seek(len(self.index) * _DIGEST)
+                raw = f.read((n - len(self.index)) * _DIGEST)
+            for j in range(len(raw) // _DIGEST):
+                self.index[raw[j * _DIGEST:(j + 1) * _DIGEST]] = len(self.index)
+        self.ends = ends
+        size = int(ends[-1]) if n else 0
+        self.tokens = (np.memmap(self._tokens_path, dtype=np.int32, mode="r", shape=(size,))
+                       if size else np.zeros(0, dtype=np.int32))
+
+    def _truncate_partial(self) -> None:
+        """Drop bytes left behind by an append that died part-way (call under the lock).
+
+        Entries are committed by their key, so anything in tokens.bin / ends.bin past
+        the last keyed entry is garbage that would shift the offsets of later appends.
+        """
+        n, size = len(self.ends), (int(self.ends[-1]) if len(self.ends) else 0)
+        for path, nbytes in ((self._tokens_path, size * 4), (self._ends_path, n * 8),
+                             (self._keys_path, n * _DIGEST)):
+            if os.path.exists(path) and os.path.getsize(path) > nbytes:
+                os.truncate(path, nbytes)
+
+    def _bounds(self, row: int):
+        return (int(self.ends[row - 1]) if row else 0), int(self.ends[row])
+
+    def _tokenize(self, texts: List[str]) -> List[List[int]]:
+        chunks = [texts[i:i + self.chunk_size] for i in range(0, len(texts), self.chunk_size)]
+        if self.workers <= 1 or len(chunks) <= 1:
+            return [ids for c in chunks for ids in self.tok(c, add_special_tokens=False)["input_ids"]]
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.tok,)) as ex:
+            return [ids for part in ex.map(_encode_chunk, chunks) for ids in part]
+
+    def populate(self, texts: Iterable[str]) -> int:
+        """Tokenize and store every text not yet cached; returns the number added."""
+        pending: Dict[bytes, str] = {}
+        for t in texts:
+            d = _digest(t)
+            if d not in self.index:
+                pending.setdefault(d, t)
+        if not pending:
+            return 0
+        ids = self._tokenize(list(pending.values()))
+
+        with open(self._lock_path, "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self._refresh()
+            self._truncate_partial()
+            keys, lens, flat = [], [], []
+            for d, seq in zip(pending, ids):
+                if d in self.index:
+                    continue
+                keys.append(d)
+                lens.append(len(seq))
+                flat.extend(seq)
+            if keys:
+                # tokens first, then ends, then keys: readers only see complete entries
+                base = int(self.ends[-1]) if len(self.ends) else 0
+                ends = base + np.cumsum(np.asarray(lens, dtype=np.int64))
+                with open(self._tokens_path, "ab") as f:
+                    f.write(np.asarray(flat, dtype=np.int32).tobytes())
+                with open(self._ends_path, "ab") as f:
+                    f.write(ends.tobytes())
+                with open(self._keys_path, "ab") as f:
+                    f.write(b"".join(keys))
+            self._refresh()
+        return len(keys)
+
+    def encode_many(self, texts: Sequence[str]) -> List[np.ndarray]:
+        """Token id arrays (int32, read-only views) for `texts`, tokenizing misses."""
+        digests = [_digest(t) for t in texts]
+        if any(d not in self.index for d in digests):
+            self.populate(texts)
+        out = []
+        for d in digests:
+            start, stop = self._bounds(self.index[d])
+            out.append(self.tokens[start:stop])
+        return out
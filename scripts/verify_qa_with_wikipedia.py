@@ -9,10 +9,32 @@ Design goals:
 
 Online lookup:
 - Uses Wikipedia's public APIs to retrieve a *citation* (page + summary text).
+- With `--evidence-mode rank` (default) the full plain-text page is fetched and only
+  the sentences most relevant to the question and answer variants are sent, within
+  `--evidence-tokens` (see passage_rank.py). `--evidence-mode truncate` keeps the old
+  behaviour: the summary cut to `--max-summary-chars`.
 
 Decision:
 - Uses an LLM (Anthropic) to judge whether the provided answer is supported by
   the retrieved evidence.
+- `--fast-path supported` marks an answer SUPPORTED without the LLM when it is the only
+  answer to the question found in evidence retrieved for the question alone (see
+  answer_match.py). The per-answer query contains the answer itself, so a match there
+  says little; the question-only evidence is fetched once per question. Such rows
+  carry `{"fast_path": ...}` in llm_output.
+- `--cascade-model` asks a cheaper model first and escalates UNKNOWN or
+  below-`--cascade-threshold` verdicts to `--model`; llm_output then holds both
+  stages as JSON, and per-stage latency / tokens / escalation rate are reported.
+- `--llm-cache` serves repeated prompts from a local SQLite cache (llm_cache.py).
+- `--shard i/n` processes only the pairs whose key hashes to shard i, writing to a
+  per-shard output; independent processes can split one input this way and
+  merge_shards.py combines their outputs.
+- `--schedule threshold` verifies answers of the questions closest to `--n1` POS /
+  `--n2` NEG first (verify_scheduler.py); every pair is still processed.
+- `--metrics-json` / `--metrics-prom` export latency histograms, token counts, errors
+  and throughput/ETA every `--metrics-every` seconds (run_metrics.py).
+- `--profile` traces every network / LLM phase into a Chrome trace JSON plus a
+  summary table (stage_trace.py).
 
 Input format (CSV): columns: id, question, Num answers, Answers
 - Answers are separated by ';'
@@ -35,23 +57,35 @@ from __future__ import annotations
 import argparse
 import csv
 import hashlib
+import json
 import os
 import re
 import sys
 import time
+from contextlib import nullcontext
 from dataclasses import dataclass
-from typing import Iterable, Optional, Tuple
+from typing import Iterable, Optional, Sequence, Tuple
 
 import requests
 
+from answer_match import FAST_PATH_RULES, QuestionMatcher
+from llm_cache import LLMCache
+from run_metrics import RunMetrics
+from stage_trace import span
+import stage_trace
+from verify_scheduler import ThresholdScheduler, load_verified
+from passage_rank import select_passage
+
 # Optional: Anthropic LLM for verification (recommended)
 try:
     from anthropic import Anthropic
 except Exception:  # pragma: no cover
     Anthropic = None
 
-WIKI_API = "https://en.wikipedia.org/w/api.php"
-WIKI_REST_SUMMARY = "https://en.wikipedia.org/api/rest_v1/page/summary/{}"
+# Overridable so the pipeline can run against a mirror or local stubs (bench_verify.py);
+# the Anthropic client likewise honours ANTHROPIC_BASE_URL.
+WIKI_API = os.environ.get("WIKI_API", "https://en.wikipedia.org/w/api.php")
+WIKI_REST_SUMMARY = os.environ.get("WIKI_REST_SUMMARY", "https://en.wikipedia.org/api/rest_v1/page/summary/{}")
 
 
 def norm_text(s: str) -> str:
@@ -120,13 +154,64 @@ def wiki_summary(title: str, session: requests.Session, timeout: float = 20.0) -
     return Evidence(url=page_url, text=extract)
 
 
-def llm_verify(question: str, answer: str, ev: Evidence, client: Anthropic, model: str) -> Tuple[str, float, str]:
-    """LLM-based verifier.
+def wiki_extract(title: str, session: requests.Session, timeout: float = 20.0) -> str:
+    """Plain-text body of a page (all sections), or "" if missing."""
+    params = {
+        "action": "query",
+        "prop": "extracts",
+        "explaintext": 1,
+        "redirects": 1,
+        "titles": title,
+        "format": "json",
+    }
+    r = session.get(WIKI_API, params=params, timeout=timeout)
+    r.raise_for_status()
+    pages = r.json().get("query", {}).get("pages", {})
+    for page in pages.values():
+        return page.get("extract") or ""
+    return ""
 
-    Returns (verdict, confidence, llm_output_json_text).
-    """
 
-    prompt = f"""
+def select_evidence(ev: Evidence, question: str, answer: str, page_text: str, max_tokens: int,
+                    max_sentences: int) -> Evidence:
+    """Evidence restricted to the page sentences that best match the question and answer."""
+    text, _ = select_passage(page_text or ev.text, question, answer_variants(answer), max_tokens, max_sentences)
+    return Evidence(url=ev.url, text=text or ev.text)
+
+
+def retrieve_evidence(query: str, question: str, answer: str, session: requests.Session, page_texts: dict,
+                      args, metrics: RunMetrics) -> Optional[Evidence]:
+    """Search `query`, fetch the top page and cut it down per --evidence-mode.
+
+    `page_texts` caches full page texts by title; answers of one question often hit the same page.
+    """
+    with metrics.timer("wiki_search"), span("wiki_search"):
+        title = wiki_search(query, session)
+    time.sleep(args.sleep)
+    if not title:
+        return None
+    with metrics.timer("wiki_summary"), span("wiki_summary"):
+        evidence = wiki_summary(title, session)
+    time.sleep(args.sleep)
+    if evidence and args.evidence_mode == "rank":
+        page_text = page_texts.get(title)
+        if page_text is None:
+            with metrics.timer("wiki_extract"), span("wiki_extract"):
+                page_text = wiki_extract(title, session)
+            time.sleep(args.sleep)
+            if len(page_texts) >= 256:
+                page_texts.clear()
+            page_texts[title] = page_text
+        with span("select_evidence"):
+            evidence = select_evidence(evidence, question, answer, page_text, args.evidence_tokens,
+                                       args.evidence_sentences)
+    elif evidence and evidence.text and len(evidence.text) > args.max_summary_chars:
+        evidence = Evidence(url=evidence.url, text=evidence.text[: args.max_summary_chars] + "…")
+    return evidence
+
+
+def verify_prompt(question: str, answer: str, ev: Evidence) -> str:
+    return f"""
 You are verifying whether a proposed answer is correct for a question.
 You MUST base your decision ONLY on the provided evidence text and URL.
 If the evidence is insufficient or ambiguous, say UNKNOWN.
@@ -143,22 +228,11 @@ EVIDENCE_TEXT:
 {ev.text}
 """.strip()
 
-    msg = client.messages.create(
-        model=model,
-        max_tokens=250,
-        temperature=0,
-        messages=[{"role": "user", "content": prompt}],
-    )
-
-    # Anthropic SDK returns content blocks
-    out = "".join(getattr(b, "text", "") for b in msg.content)
-    out_s = out.strip()
 
+def parse_verdict(out_s: str) -> Tuple[str, float]:
     verdict = "unknown"
     confidence = 0.0
     try:
-        import json
-
         j = json.loads(out_s)
         v = (j.get("verdict") or "").strip().upper()
         if v in {"SUPPORTED", "UNSUPPORTED", "UNKNOWN"}:
@@ -170,8 +244,141 @@ EVIDENCE_TEXT:
         # If parsing fails, record raw output; keep unknown
         verdict = "unknown"
         confidence = 0.0
+    return verdict, confidence
+
+
+@dataclass
+class LLMResult:
+    model: str
+    verdict: str
+    confidence: float
+    output: str
+    input_tokens: int = 0
+    output_tokens: int = 0
+    seconds: float = 0.0
+    cached: bool = False
+
+
+LLM_MAX_TOKENS = 250
+LLM_TEMPERATURE = 0
+
+
+def llm_call(prompt: str, client: Anthropic, model: str, cache: Optional[LLMCache] = None,
+             metrics: Optional[RunMetrics] = None) -> LLMResult:
+    """One verification call, with latency and token usage; served from `cache` when possible."""
+    if cache is not None:
+        with span("llm_cache_get"):
+            hit = cache.get(model, LLM_TEMPERATURE, LLM_MAX_TOKENS, prompt)
+        if hit is not None:
+            out_s, in_tok, out_tok = hit
+            verdict, confidence = parse_verdict(out_s)
+            if metrics is not None:
+                metrics.incr("llm_cache_hit")
+            return LLMResult(model=model, verdict=verdict, confidence=confidence, output=out_s,
+                             input_tokens=in_tok, output_tokens=out_tok, cached=True)
+
+    t0 = time.perf_counter()
+    with (metrics.timer("llm") if metrics is not None else nullcontext()), span("llm", model=model):
+        msg = client.messages.create(
+            model=model,
+            max_tokens=LLM_MAX_TOKENS,
+            temperature=LLM_TEMPERATURE,
+            messages=[{"role": "user", "content": prompt}],
+        )
+    dt = time.perf_counter() - t0
 
-    return verdict, confidence, out_s
+    # Anthropic SDK returns content blocks
+    out_s = "".join(getattr(b, "text", "") for b in msg.content).strip()
+    verdict, confidence = parse_verdict(out_s)
+    usage = getattr(msg, "usage", None)
+    r = LLMResult(model=model, verdict=verdict, confidence=confidence, output=out_s,
+                  input_tokens=int(getattr(usage, "input_tokens", 0) or 0),
+                  output_tokens=int(getattr(usage, "output_tokens", 0) or 0), seconds=dt)
+    if metrics is not None:
+        metrics.add_tokens(model, r.input_tokens, r.output_tokens)
+    if cache is not None:
+        cache.put(model, LLM_TEMPERATURE, LLM_MAX_TOKENS, prompt, out_s, r.input_tokens, r.output_tokens)
+    return r
+
+
+def llm_verify(question: str, answer: str, ev: Evidence, client: Anthropic, model: str,
+               cache: Optional[LLMCache] = None, metrics: Optional[RunMetrics] = None) -> Tuple[str, float, str]:
+    """LLM-based verifier.
+
+    Returns (verdict, confidence, llm_output_json_text).
+    """
+    r = llm_call(verify_prompt(question, answer, ev), client, model, cache, metrics)
+    return r.verdict, r.confidence, r.output
+
+
+class CascadeStats:
+    """Per-stage call counts, latency and tokens, plus the escalation rate."""
+
+    def __init__(self, stages: Sequence[str]):
+        self.stages = list(stages)
+        self.calls = {s: 0 for s in self.stages}
+        self.seconds = {s: 0.0 for s in self.stages}
+        self.input_tokens = {s: 0 for s in self.stages}
+        self.output_tokens = {s: 0 for s in self.stages}
+        self.pairs = 0
+        self.escalated = 0
+        self.escalation_failed = 0
+
+    def record(self, stage: str, r: LLMResult) -> None:
+        if r.cached:  # cache hits cost nothing; keep latency/tokens to real calls
+            return
+        self.calls[stage] += 1
+        self.seconds[stage] += r.seconds
+        self.input_tokens[stage] += r.input_tokens
+        self.output_tokens[stage] += r.output_tokens
+
+    def summary(self) -> str:
+        parts = [f"escalation_rate={self.escalated / max(self.pairs, 1):.3f} ({self.escalated}/{self.pairs})",
+                 f"escalation_failed={self.escalation_failed}"]
+        for s in self.stages:
+            n = max(self.calls[s], 1)
+            parts.append(f"{s}: calls={self.calls[s]} mean_s={self.seconds[s] / n:.2f} "
+                         f"in_tok={self.input_tokens[s]} out_tok={self.output_tokens[s]}")
+        return " | ".join(parts)
+
+
+def cascade_verify(question: str, answer: str, ev: Evidence, client: Anthropic, small_model: str,
+                   large_model: str, threshold: float, stats: CascadeStats,
+                   cache: Optional[LLMCache] = None, metrics: Optional[RunMetrics] = None) -> Tuple[str, float, str]:
+    """Ask `small_model` first; escalate UNKNOWN or low-confidence verdicts to `large_model`.
+
+    llm_output records both stages: {"escalated": bool, "stages": [{model, verdict, confidence, output}, ...]}.
+    If the escalated call fails, the small model's verdict is kept and the record gets
+    "escalation_error" instead of a second stage.
+    """
+    prompt = verify_prompt(question, answer, ev)
+    first = llm_call(prompt, client, small_model, cache, metrics)
+    stats.record("small", first)
+    stats.pairs += 1
+    results = [first]
+    error = None
+    escalate = first.verdict == "unknown" or first.confidence < threshold
+    if escalate:
+        stats.escalated += 1
+        try:
+            second = llm_call(prompt, client, large_model, cache, metrics)
+        except Exception as e:
+            stats.escalation_failed += 1
+            if metrics is not None:
+                metrics.incr("cascade_escalation_error")
+            error = f"{type(e).__name__}: {e}"
+        else:
+            stats.record("large", second)
+            results.append(second)
+    final = results[-1]
+    record = {
+        "escalated": escalate,
+        "stages": [{"model": r.model, "verdict": r.verdict, "confidence": r.confidence, "output": r.output}
+                   for r in results],
+    }
+    if error is not None:
+        record["escalation_error"] = error
+    return final.verdict, final.confidence, json.dumps(record)
 
 
 def iter_input_rows(path: str) -> Iterable[dict]:
@@ -207,6 +414,56 @@ def key_for(qid: str, answer: str) -> str:
     return h.hexdigest()
 
 
+def parse_shard(spec: str) -> Tuple[int, int]:
+    """'i/n' -> (i, n), with 0 <= i < n."""
+    i, n = (int(x) for x in spec.split("/"))
+    if n < 1 or not 0 <= i < n:
+        raise ValueError(f"bad shard {spec!r}; expected i/n with 0 <= i < n")
+    return i, n
+
+
+def in_shard(key: str, shard: Optional[Tuple[int, int]]) -> bool:
+    """Stable partition of pairs by their sha1 key (same on every machine and restart)."""
+    return shard is None or int(key[:16], 16) % shard[1] == shard[0]
+
+
+def shard_path(path: str, shard: Tuple[int, int]) -> str:
+    """outputs/results.csv -> outputs/results.shard0of4.csv"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.shard{shard[0]}of{shard[1]}{ext}"
+
+
+def schedule_pairs(rows: list, sched: Optional[ThresholdScheduler], done: set,
+                   shard: Optional[Tuple[int, int]]) -> Iterable[Tuple[int, Optional[int]]]:
+    """(row index, answer index) work items; answer index None marks a question without answers.
+
+    Without a scheduler, pairs come in file order. With one, already-done pairs and
+    answerless questions come first (they cost nothing), then pending pairs in
+    scheduler order; the caller feeds verdicts back with `sched.record`.
+    """
+    if sched is None:
+        for r_idx, (qid, _, answers) in enumerate(rows):
+            for a_idx in (range(len(answers)) if answers else [None]):
+                if in_shard(key_for(qid, answers[a_idx] if a_idx is not None else ""), shard):
+                    yield r_idx, a_idx
+        return
+    for r_idx, (qid, _, answers) in enumerate(rows):
+        for a_idx in (range(len(answers)) if answers else [None]):
+            k = key_for(qid, answers[a_idx] if a_idx is not None else "")
+            if not in_shard(k, shard):
+                continue
+            if a_idx is None or k in done:
+                yield r_idx, a_idx
+            else:
+                sched.add(qid, (r_idx, a_idx))
+    sched.start()
+    while True:
+        nxt = sched.pop()
+        if nxt is None:
+            return
+        yield nxt[1]
+
+
 def ensure_out_header(out_csv: str):
     if os.path.exists(out_csv) and os.path.getsize(out_csv) > 0:
         return
@@ -248,13 +505,51 @@ def main():
     ap.add_argument("--input", required=True, help="Input CSV path")
     ap.add_argument("--output", default="outputs/results.csv", help="Output CSV path")
     ap.add_argument("--sleep", type=float, default=0.2, help="Sleep between network calls (seconds)")
-    ap.add_argument("--max-summary-chars", type=int, default=600, help="Truncate evidence text")
+    ap.add_argument("--max-summary-chars", type=int, default=600, help="Truncate evidence text (truncate mode)")
+    ap.add_argument("--evidence-mode", choices=["rank", "truncate"], default="rank",
+                    help="rank = top page sentences for the question/answer; truncate = first summary chars")
+    ap.add_argument("--evidence-tokens", type=int, default=200, help="Evidence token budget (rank mode)")
+    ap.add_argument("--evidence-sentences", type=int, default=6, help="Max evidence sentences (rank mode)")
     ap.add_argument("--model", default="claude-3-5-sonnet-latest", help="Anthropic model name")
+    ap.add_argument("--cascade-model", default=None,
+                    help="Cheaper model asked first; only UNKNOWN / low-confidence verdicts go to --model")
+    ap.add_argument("--cascade-threshold", type=float, default=0.8,
+                    help="Escalate when the cascade model's confidence is below this")
+    ap.add_argument("--llm-cache", default=None, help="SQLite response cache (e.g. outputs/llm_cache.sqlite)")
+    ap.add_argument("--llm-cache-max-mb", type=float, default=512, help="Evict LRU cache entries beyond this size")
+    ap.add_argument("--shard", default=None,
+                    help="i/n: only process pairs whose key falls in shard i of n; output goes to "
+                         "<output>.shard<i>of<n>.csv (combine with merge_shards.py)")
+    ap.add_argument("--schedule", choices=["file", "threshold"], default="file",
+                    help="threshold = verify answers of questions closest to N1 POS / N2 NEG first")
+    ap.add_argument("--n1", type=int, default=1, help="Target supported answers per question (threshold schedule)")
+    ap.add_argument("--n2", type=int, default=1, help="Target unsupported answers per question (threshold schedule)")
+    ap.add_argument("--verified", nargs="*", default=[],
+                    help="Earlier result CSVs whose verdicts count toward the thresholds (their pairs are skipped)")
+    ap.add_argument("--metrics-json", default=None, help="Periodic JSON metrics snapshot (see run_metrics.py)")
+    ap.add_argument("--metrics-prom", default=None, help="Periodic Prometheus text-format metrics file")
+    ap.add_argument("--metrics-every", type=float, default=30.0, help="Seconds between metrics snapshots")
+    ap.add_argument("--usd-per-mtok-in", type=float, default=0.0, help="Input token price, for the cost estimate")
+    ap.add_argument("--usd-per-mtok-out", type=float, default=0.0, help="Output token price, for the cost estimate")
     ap.add_argument("--no-llm", action="store_true", help="Disable LLM verification (NOT recommended)")
+    ap.add_argument("--fast-path", choices=sorted(FAST_PATH_RULES), default="off",
+                    help="Decide lexically clear cases without the LLM (see answer_match.py)")
+    ap.add_argument("--fast-path-confidence", type=float, default=0.9, help="Confidence recorded for fast-path verdicts")
+    ap.add_argument("--fast-path-min-chars", type=int, default=3, help="Ignore shorter answer variants when matching")
+    stage_trace.add_arguments(ap, "outputs/profile/verify.trace.json")
     args = ap.parse_args()
+    stage_trace.from_args(args)
+
+    shard = parse_shard(args.shard) if args.shard else None
+    if shard is not None:
+        args.output = shard_path(args.output, shard)
+        args.metrics_json = args.metrics_json and shard_path(args.metrics_json, shard)
+        args.metrics_prom = args.metrics_prom and shard_path(args.metrics_prom, shard)
 
     ensure_out_header(args.output)
-    done = load_done_keys(args.output)
+    with span("load_done_keys") as sp:
+        done = load_done_keys(args.output)
+        sp.rows = len(done)
 
     session = requests.Session()
     session.headers.update({"User-Agent": "openclaw-v2g-verifier/0.2 (contact: local)"})
@@ -264,19 +559,59 @@ def main():
         if Anthropic is None:
             raise RuntimeError("anthropic python package not installed; install it or pass --no-llm")
         llm_client = Anthropic()  # reads ANTHROPIC_API_KEY from env
+    llm_cache = LLMCache(args.llm_cache, int(args.llm_cache_max_mb * (1 << 20))) if args.llm_cache else None
+
+    sched = None
+    if args.schedule == "threshold":
+        counts, verified, (p_pos, p_neg) = load_verified([args.output] + args.verified)
+        sched = ThresholdScheduler(args.n1, args.n2, p_pos, p_neg)
+        for qid, c in counts.items():
+            sched.set_counts(qid, *c)
+        # pairs with a verdict in a --verified CSV are already counted above: skip them too
+        done |= {key_for(qid, a) for qid, a in verified}
+
+    n_pending = 0
+    for r in iter_input_rows(args.input):
+        for a in parse_answers_field(r.get("Answers") or ""):
+            k = key_for((r.get("id") or "").strip(), a)
+            n_pending += in_shard(k, shard) and k not in done
+    metrics = RunMetrics(total=n_pending, json_path=args.metrics_json, prom_path=args.metrics_prom,
+                         every=args.metrics_every, usd_per_mtok_in=args.usd_per_mtok_in,
+                         usd_per_mtok_out=args.usd_per_mtok_out)
+
+    page_texts: dict[str, str] = {}  # title -> page text, see retrieve_evidence
 
     n_q = 0
     n_ans = 0
     n_skipped = 0
-
-    for row in iter_input_rows(args.input):
-        n_q += 1
-        qid = (row.get("id") or "").strip()
-        question = (row.get("question") or "").strip()
-        answers = parse_answers_field(row.get("Answers") or "")
+    n_llm_calls = 0
+    n_fast = 0
+    fast_rules = FAST_PATH_RULES[args.fast_path]
+    cascade = CascadeStats(["small", "large"]) if args.cascade_model else None
+
+    rows = [((r.get("id") or "").strip(), (r.get("question") or "").strip(),
+             parse_answers_field(r.get("Answers") or "")) for r in iter_input_rows(args.input)]
+    work = schedule_pairs(rows, sched, done, shard)
+    seen_questions: set[int] = set()
+    matchers: dict[int, QuestionMatcher] = {}
+    fast_hits: dict[int, tuple] = {}  # row -> (question-only evidence, indices of answers found in it)
+
+    for r_idx, a_idx in work:
+        qid, question, answers = rows[r_idx]
+        if r_idx not in seen_questions:
+            seen_questions.add(r_idx)
+            n_q += 1
+            if n_q % 100 == 0:
+                print(f"processed_questions={n_q} processed_answers={n_ans} skipped={n_skipped} "
+                      f"llm_calls={n_llm_calls} fast_supported={n_fast} out={args.output}", file=sys.stderr)
+                print(f"metrics: {metrics.summary()}", file=sys.stderr)
+                if cascade is not None:
+                    print(f"cascade: {cascade.summary()}", file=sys.stderr)
+                if sched is not None:
+                    print(f"schedule: {sched.summary()}", file=sys.stderr)
 
         # If answers field is empty, still record a row so we can assert we processed the question.
-        if not answers:
+        if a_idx is None:
             k = key_for(qid, "")
             if k in done:
                 n_skipped += 1
@@ -286,49 +621,92 @@ def main():
                 done.add(k)
             continue
 
-        for ans in answers:
-            n_ans += 1
-            k = key_for(qid, ans)
-            if k in done:
-                n_skipped += 1
-                continue
+        ans = answers[a_idx]
+        k = key_for(qid, ans)
+        n_ans += 1
+        if k in done:
+            n_skipped += 1
+            continue
+
+        matcher = None
+        if fast_rules:
+            matcher = matchers.get(r_idx)
+            if matcher is None:
+                if len(matchers) >= 1024:
+                    matchers.clear()
+                    fast_hits.clear()
+                matcher = matchers[r_idx] = QuestionMatcher(answers, answer_variants, norm_text,
+                                                            args.fast_path_min_chars)
 
-            # Query strategy: use both question and answer terms.
-            query = f"{question} {ans}".strip()
+        # Query strategy: use both question and answer terms.
+        query = f"{question} {ans}".strip()
 
-            evidence = None
+        evidence = None
+        verdict = "unknown"
+        conf = 0.0
+        llm_out = ""
+        t_pair = time.perf_counter()
+
+        try:
+            fast = None
+            if matcher is not None:
+                if r_idx not in fast_hits:
+                    # question-only query: the per-answer query would pull in the answer itself
+                    q_evidence = retrieve_evidence(question, question, "", session, page_texts, args, metrics)
+                    with span("fast_path_match"):
+                        hits = (matcher.matched_answers(q_evidence.text)
+                                if q_evidence and q_evidence.text else set())
+                    fast_hits[r_idx] = (q_evidence, hits)
+                q_evidence, hits = fast_hits[r_idx]
+                match = matcher.classify(a_idx, hits)
+                fast = fast_rules.get(match)
+            if fast is not None:
+                evidence = q_evidence
+                verdict, conf = fast, args.fast_path_confidence
+                llm_out = json.dumps({"fast_path": match})
+                n_fast += 1
+                metrics.incr(f"fast_path_{fast}")
+            else:
+                evidence = retrieve_evidence(query, question, ans, session, page_texts, args, metrics)
+                if llm_client is not None and evidence and evidence.text and cascade is not None:
+                    escalated = cascade.escalated
+                    verdict, conf, llm_out = cascade_verify(question, ans, evidence, llm_client, args.cascade_model,
+                                                            args.model, args.cascade_threshold, cascade, llm_cache,
+                                                            metrics)
+                    n_llm_calls += 1 + (cascade.escalated - escalated)  # small + large stage
+                elif llm_client is not None and evidence and evidence.text:
+                    verdict, conf, llm_out = llm_verify(question, ans, evidence, llm_client, args.model, llm_cache,
+                                                        metrics)
+                    n_llm_calls += 1
+
+        except Exception as e:
+            # Record the failure as unknown, but do not stop the run.
+            metrics.incr("pair_error")
             verdict = "unknown"
             conf = 0.0
+            evidence = Evidence(url="", text=f"ERROR: {type(e).__name__}: {e}")
             llm_out = ""
 
-            try:
-                title = wiki_search(query, session)
-                time.sleep(args.sleep)
-                if title:
-                    evidence = wiki_summary(title, session)
-                    time.sleep(args.sleep)
-
-                if evidence and evidence.text and len(evidence.text) > args.max_summary_chars:
-                    evidence = Evidence(url=evidence.url, text=evidence.text[: args.max_summary_chars] + "…")
-
-                if llm_client is not None and evidence and evidence.text:
-                    verdict, conf, llm_out = llm_verify(question, ans, evidence, llm_client, args.model)
-
-            except Exception as e:
-                # Record the failure as unknown, but do not stop the run.
-                verdict = "unknown"
-                conf = 0.0
-                evidence = Evidence(url="", text=f"ERROR: {type(e).__name__}: {e}")
-                llm_out = ""
-
+        with span("append_result"):
             append_result(args.output, key=k, qid=qid, question=question, answer=ans,
                           verdict=verdict, confidence=conf, evidence=evidence, llm_output=llm_out)
-            done.add(k)
-
-        if n_q % 100 == 0:
-            print(f"processed_questions={n_q} processed_answers={n_ans} skipped={n_skipped} out={args.output}", file=sys.stderr)
-
-    print(f"DONE: questions={n_q} answers={n_ans} skipped={n_skipped} out={args.output}")
+        done.add(k)
+        metrics.observe("pair", time.perf_counter() - t_pair)
+        if sched is not None:
+            sched.record(qid, verdict)
+        metrics.incr(f"verdict_{verdict}")
+        metrics.tick()
+        metrics.maybe_write()
+
+    metrics.write()
+    print(f"DONE: questions={n_q} answers={n_ans} skipped={n_skipped} llm_calls={n_llm_calls} "
+          f"llm_calls_avoided={n_fast} out={args.output}")
+    if cascade is not None:
+        print(f"cascade: {cascade.summary()}")
+    if llm_cache is not None:
+        print(f"llm_cache: {llm_cache.stats()}")
+    print(f"metrics: {metrics.summary()}")
+    stage_trace.finish()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,168 @@
+"""Threshold-aware ordering of verification work.
+
+A question is usable for training once it has at least N1 supported (POS) and N2
+unsupported (NEG) answers, the N1_min_pos / N2_min_neg thresholds explored in
+figures/nnd/filter_grid.csv. Verifying answers in file order spends most calls on
+questions that already qualify or never can, so the scheduler ranks questions by
+
+  P(question reaches the thresholds | verified counts, pending answers) / answers still needed
+
+where the probability treats each pending answer as an independent draw with the
+observed supported / unsupported rates. Questions are served in three tiers:
+
+  0. can still qualify and are not there yet, best score first
+  1. already qualify (or enough answers are in flight to get there)
+  2. cannot qualify any more (too few pending answers for the missing POS + NEG)
+
+Every pending answer is still handed out eventually; the order only decides what
+gets verified first. `record()` feeds verdicts back so the ranking stays current.
+
+Used by verify_qa_with_wikipedia.py --schedule threshold and prepare_batch.py --schedule threshold.
+"""
+
+from __future__ import annotations
+
+import csv
+import heapq
+import math
+import os
+import sys
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+POS = "supported"
+NEG = "unsupported"
+
+
+def qualify_prob(need_pos: int, need_neg: int, pending: int, p_pos: float, p_neg: float) -> float:
+    """P(at least need_pos POS and need_neg NEG among `pending` multinomial draws)."""
+    if need_pos + need_neg > pending:
+        return 0.0
+    p_other = max(1.0 - p_pos - p_neg, 0.0)
+    total = 0.0
+    for a in range(need_pos, pending + 1):
+        for b in range(need_neg, pending - a + 1):
+            c = pending - a - b
+            total += (math.comb(pending, a) * math.comb(pending - a, b)
+                      * p_pos ** a * p_neg ** b * p_other ** c)
+    return min(total, 1.0)
+
+
+class ThresholdScheduler:
+    def __init__(self, n1: int, n2: int, p_pos: float = 0.85, p_neg: float = 0.08):
+        self.n1 = n1
+        self.n2 = n2
+        self.p_pos = p_pos
+        self.p_neg = p_neg
+        self.pending: Dict[str, List[Any]] = defaultdict(list)
+        self.counts: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+        self.in_flight: Dict[str, int] = defaultdict(int)
+        self.order: Dict[str, int] = {}
+        self.version: Dict[str, int] = defaultdict(int)
+        self.heap: List[Tuple] = []
+
+    def add(self, qid: str, item: Any) -> None:
+        self.order.setdefault(qid, len(self.order))
+        self.pending[qid].append(item)
+
+    def set_counts(self, qid: str, n_pos: int, n_neg: int) -> None:
+        self.counts[qid] = [n_pos, n_neg]
+
+    def _needs(self, qid: str) -> Tuple[int, int]:
+        pos, neg = self.counts[qid]
+        return max(self.n1 - pos, 0), max(self.n2 - neg, 0)
+
+    def priority(self, qid: str) -> Tuple[int, float]:
+        """(tier, -score); lower sorts first."""
+        need_pos, need_neg = self._needs(qid)
+        need = need_pos + need_neg
+        if need - self.in_flight[qid] <= 0:
+            return 1, 0.0
+        p = qualify_prob(need_pos, need_neg, len(self.pending[qid]) + self.in_flight[qid], self.p_pos, self.p_neg)
+        if p <= 0.0:
+            return 2, 0.0
+        return 0, -p / need
+
+    def _push(self, qid: str) -> None:
+        self.version[qid] += 1
+        if self.pending[qid]:
+            tier, neg_score = self.priority(qid)
+            heapq.heappush(self.heap, (tier, neg_score, self.order[qid], self.version[qid], qid))
+
+    def start(self) -> "ThresholdScheduler":
+        for qid in self.pending:
+            self._push(qid)
+        return self
+
+    def pop(self) -> Optional[Tuple[str, Any]]:
+        """Next (qid, item) to verify, or None when nothing is pending."""
+        while self.heap:
+            _, _, _, version, qid = heapq.heappop(self.heap)
+            if version != self.version[qid] or not self.pending[qid]:
+                continue
+            item = self.pending[qid].pop(0)
+            self.in_flight[qid] += 1
+            self._push(qid)
+            return qid, item
+        return None
+
+    def take(self, n: int) -> List[Tuple[str, Any]]:
+        out = []
+        while len(out) < n:
+            nxt = self.pop()
+            if nxt is None:
+                break
+            out.append(nxt)
+        return out
+
+    def record(self, qid: str, verdict: str) -> None:
+        """Feed back the verdict of an item handed out by pop()."""
+        self.in_flight[qid] = max(self.in_flight[qid] - 1, 0)
+        if verdict == POS:
+            self.counts[qid][0] += 1
+        elif verdict == NEG:
+            self.counts[qid][1] += 1
+        self._push(qid)
+
+    def summary(self) -> str:
+        qids = set(self.order) | set(self.counts)
+        met = sum(1 for q in qids if self._needs(q) == (0, 0))
+        tiers = defaultdict(int)
+        for q in self.order:
+            if self.pending[q]:
+                tiers[self.priority(q)[0]] += 1
+        return (f"N1={self.n1} N2={self.n2} qualifying_questions={met} "
+                f"pending_questions: active={tiers[0]} met={tiers[1]} infeasible={tiers[2]}")
+
+
+def load_verified(paths: Iterable[str]) -> Tuple[Dict[str, List[int]], Set[Tuple[str, str]], Tuple[float, float]]:
+    """Verdict counts per id, verified (id, answer) pairs and (POS rate, NEG rate) from result CSVs.
+
+    Any CSV with `id`, `answer` and `verdict` columns works (plausibleqa-verified*.csv,
+    verify_qa_with_wikipedia.py outputs). Missing files are skipped.
+    """
+    csv.field_size_limit(sys.maxsize)
+    counts: Dict[str, List[int]] = defaultdict(lambda: [0, 0])
+    done: Set[Tuple[str, str]] = set()
+    n = n_pos = n_neg = 0
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                qid = (row.get("id") or "").strip()
+                pair = (qid, (row.get("answer") or "").strip())
+                if pair in done:
+                    continue
+                done.add(pair)
+                verdict = (row.get("verdict") or "").strip().lower()
+                n += 1
+                if verdict == POS:
+                    counts[qid][0] += 1
+                    n_pos += 1
+                elif verdict == NEG:
+                    counts[qid][1] += 1
+                    n_neg += 1
+    # floor the rates so a verdict never seen yet does not make every question infeasible
+    rates = (max(n_pos / n, 0.01), max(n_neg / n, 0.01)) if n else (0.85, 0.08)
+    return dict(counts), done, rates
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+
+from tokenizers import Tokenizer, models, pre_tokenizers  # noqa: E402
+from transformers import PreTrainedTokenizerFast  # noqa: E402
+
+from token_cache import TokenCache  # noqa: E402
+
+WORDS = ["[UNK]", "some", "text", "new", "here", "old", "entry"]
+
+
+def make_tokenizer():
+    tok = Tokenizer(models.WordLevel({w: i for i, w in enumerate(WORDS)}, unk_token="[UNK]"))
+    tok.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tok, unk_token="[UNK]")
+
+
+def test_roundtrip_and_reopen(tmp_path):
+    tok = make_tokenizer()
+    cache = TokenCache(str(tmp_path), tok)
+    assert cache.populate(["some text", "new entry here"]) == 2
+    assert cache.populate(["some text"]) == 0
+    reopened = TokenCache(str(tmp_path), tok)
+    assert len(reopened) == 2
+    assert reopened.encode_many(["new entry here"])[0].tolist() == [3, 6, 4]
+
+
+def test_partial_append_is_discarded(tmp_path):
+    tok = make_tokenizer()
+    cache = TokenCache(str(tmp_path), tok)
+    cache.populate(["old entry"])
+    # an append that died after writing tokens (and ends) but before its key
+    with open(cache._tokens_path, "ab") as f:
+        f.write(np.full(3, 1, dtype=np.int32).tobytes())
+    with open(cache._ends_path, "ab") as f:
+        f.write(np.asarray([5], dtype=np.int64).tobytes())
+
+    fresh = TokenCache(str(tmp_path), tok)
+    assert len(fresh) == 1
+    ids = fresh.encode_many(["new text here", "old entry"])
+    assert [a.tolist() for a in ids] == [[3, 2, 4], [5, 6]]
+    assert [a.tolist() for a in TokenCache(str(tmp_path), tok).encode_many(["new text here"])] == [[3, 2, 4]]